@@ -1,8 +1,8 @@
 from __future__ import annotations
 
+import argparse
 import itertools
 import json
-import math
 import sys
 from dataclasses import dataclass
 from datetime import datetime
@@ -16,6 +16,8 @@ from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Inches, Pt
 
+from sampling_stats import cp_lower, cp_upper, find_accept_rule, find_reject_rule, oc_curves, sampling_plan_grid
+
 
 ROOT = Path.cwd()
 OUT = ROOT / "paper_output"
@@ -63,97 +65,51 @@ def setup_plot_style() -> None:
         break
 
 
-def binom_pmf(n: int, k: int, p: float) -> float:
-    return math.comb(n, k) * (p**k) * ((1 - p) ** (n - k))
-
-
-def binom_cdf(n: int, x: int, p: float) -> float:
-    return sum(binom_pmf(n, k, p) for k in range(0, x + 1))
-
-
-def binom_sf(n: int, x: int, p: float) -> float:
-    return sum(binom_pmf(n, k, p) for k in range(x, n + 1))
-
-
-def cp_upper(x: int, n: int, confidence: float) -> float:
-    alpha = 1 - confidence
-    if x >= n:
-        return 1.0
-    lo, hi = 0.0, 1.0
-    for _ in range(70):
-        mid = (lo + hi) / 2
-        if binom_cdf(n, x, mid) > alpha:
-            lo = mid
-        else:
-            hi = mid
-    return (lo + hi) / 2
-
-
-def cp_lower(x: int, n: int, confidence: float) -> float:
-    alpha = 1 - confidence
-    if x <= 0:
-        return 0.0
-    lo, hi = 0.0, 1.0
-    for _ in range(70):
-        mid = (lo + hi) / 2
-        if binom_sf(n, x, mid) < alpha:
-            lo = mid
-        else:
-            hi = mid
-    return (lo + hi) / 2
-
-
-def find_sampling_rules(p0: float = 0.10) -> tuple[dict[str, Any], pd.DataFrame]:
-    reject_rule = None
-    for n in range(1, 301):
-        for x in range(0, n + 1):
-            lower = cp_lower(x, n, 0.95)
-            if lower > p0:
-                reject_rule = {
-                    "scenario": "95%信度拒收",
-                    "n": n,
-                    "threshold": f"x >= {x}",
-                    "defect_count": x,
-                    "one_sided_bound": lower,
-                    "interpretation": f"抽检 {n} 件，若发现不少于 {x} 件次品，则95%单侧置信下认为次品率超过10%。",
-                }
-                break
-        if reject_rule:
-            break
-
-    accept_rule = None
-    for n in range(1, 301):
-        for x in range(0, n + 1):
-            upper = cp_upper(x, n, 0.90)
-            if upper <= p0:
-                accept_rule = {
-                    "scenario": "90%信度接收",
-                    "n": n,
-                    "threshold": f"x <= {x}",
-                    "defect_count": x,
-                    "one_sided_bound": upper,
-                    "interpretation": f"抽检 {n} 件，若发现不超过 {x} 件次品，则90%单侧置信上界不超过10%，可接收。",
-                }
-                break
-        if accept_rule:
-            break
-
-    if not reject_rule or not accept_rule:
+def percent_text(value: float) -> str:
+    return f"{value * 100:g}%"
+
+
+def find_sampling_rules(
+    p0: float = 0.10,
+    reject_confidence: float = 0.95,
+    accept_confidence: float = 0.90,
+    max_n: int = 300,
+) -> tuple[dict[str, Any], pd.DataFrame]:
+    reject = find_reject_rule(p0, reject_confidence, max_n)
+    accept = find_accept_rule(p0, accept_confidence, max_n)
+    if not reject or not accept:
         raise RuntimeError("未找到抽样规则")
 
+    p0_text, reject_text, accept_text = percent_text(p0), percent_text(reject_confidence), percent_text(accept_confidence)
+    reject_rule = {
+        "scenario": f"{reject_text}信度拒收",
+        "n": reject[0],
+        "threshold": f"x >= {reject[1]}",
+        "defect_count": reject[1],
+        "one_sided_bound": cp_lower(reject[1], reject[0], reject_confidence),
+        "interpretation": f"抽检 {reject[0]} 件，若发现不少于 {reject[1]} 件次品，则{reject_text}单侧置信下认为次品率超过{p0_text}。",
+    }
+    accept_rule = {
+        "scenario": f"{accept_text}信度接收",
+        "n": accept[0],
+        "threshold": f"x <= {accept[1]}",
+        "defect_count": accept[1],
+        "one_sided_bound": cp_upper(accept[1], accept[0], accept_confidence),
+        "interpretation": f"抽检 {accept[0]} 件，若发现不超过 {accept[1]} 件次品，则{accept_text}单侧置信上界不超过{p0_text}，可接收。",
+    }
+
     df = pd.DataFrame([reject_rule, accept_rule])
     df.to_csv(TABLES / "q1_sampling_plan.csv", index=False, encoding="utf-8-sig")
 
     p_grid = np.linspace(0, 0.30, 301)
-    reject_prob = [binom_sf(reject_rule["n"], reject_rule["defect_count"], p) for p in p_grid]
-    accept_prob = [binom_cdf(accept_rule["n"], accept_rule["defect_count"], p) for p in p_grid]
+    reject_prob, accept_prob = oc_curves(reject, accept, p_grid)
     oc = pd.DataFrame({"defect_rate": p_grid, "reject_probability": reject_prob, "accept_probability": accept_prob})
     oc.to_csv(TABLES / "q1_oc_curve.csv", index=False, encoding="utf-8-sig")
 
     plt.figure(figsize=(7.2, 4.6), dpi=160)
-    plt.plot(p_grid, reject_prob, label="拒收概率（95%规则）", linewidth=2.2)
-    plt.plot(p_grid, accept_prob, label="接收概率（90%规则）", linewidth=2.2)
-    plt.axvline(p0, color="#444", linestyle="--", linewidth=1.2, label="标称次品率 10%")
+    plt.plot(p_grid, reject_prob, label=f"拒收概率（{reject_text}规则）", linewidth=2.2)
+    plt.plot(p_grid, accept_prob, label=f"接收概率（{accept_text}规则）", linewidth=2.2)
+    plt.axvline(p0, color="#444", linestyle="--", linewidth=1.2, label=f"标称次品率 {p0_text}")
     plt.xlabel("真实次品率")
     plt.ylabel("触发概率")
     plt.title("问题一抽样方案的操作特性曲线")
@@ -166,6 +122,12 @@ def find_sampling_rules(p0: float = 0.10) -> tuple[dict[str, Any], pd.DataFrame]
     return {"reject": reject_rule, "accept": accept_rule}, oc
 
 
+def tabulate_sampling_plans(p0_values: list[float], confidences: list[float], max_n: int = 300) -> pd.DataFrame:
+    grid = pd.DataFrame(sampling_plan_grid(p0_values, confidences, max_n))
+    grid.to_csv(TABLES / "q1_sampling_plan_grid.csv", index=False, encoding="utf-8-sig")
+    return grid
+
+
 @dataclass(frozen=True)
 class Q2Scenario:
     scenario: int
@@ -239,6 +201,51 @@ def q2_profit(row: Q2Scenario, policy: tuple[bool, bool, bool, bool]) -> dict[st
     }
 
 
+def q2_profit_batch(
+    row: Q2Scenario,
+    policies: np.ndarray,
+    p1: np.ndarray | float | None = None,
+    p2: np.ndarray | float | None = None,
+    pf: np.ndarray | float | None = None,
+) -> dict[str, np.ndarray]:
+    """Vectorized ``q2_profit`` over a (n_policies, 4) bit matrix.
+
+    Rates default to the scenario values; passing 1-D sample arrays yields outputs
+    of shape (n_samples, n_policies).
+    """
+    p1 = np.asarray(row.p1 if p1 is None else p1, dtype=float)[..., None]
+    p2 = np.asarray(row.p2 if p2 is None else p2, dtype=float)[..., None]
+    pf = np.asarray(row.pf if pf is None else pf, dtype=float)[..., None]
+    d1, d2, final_test, disassemble = (policies[:, k] for k in range(4))
+    comp1_cost = np.where(d1, (row.c1 + row.t1) / np.maximum(1e-9, 1 - p1), row.c1)
+    comp2_cost = np.where(d2, (row.c2 + row.t2) / np.maximum(1e-9, 1 - p2), row.c2)
+    g1 = np.where(d1, 1.0, 1 - p1)
+    g2 = np.where(d2, 1.0, 1 - p2)
+    base_cost = comp1_cost + comp2_cost + row.assembly + np.where(final_test, row.final_test, 0)
+    good_prob = g1 * g2 * (1 - pf)
+    bad_prob = 1 - good_prob
+
+    safe_bad = np.where(bad_prob > 0, bad_prob, 1.0)
+    good1_given_bad = np.where(bad_prob > 0, g1 * (1 - g2 * (1 - pf)) / safe_bad, 0.0)
+    good2_given_bad = np.where(bad_prob > 0, g2 * (1 - g1 * (1 - pf)) / safe_bad, 0.0)
+    salvage = good1_given_bad * row.c1 + good2_given_bad * row.c2
+    disassembly_value = np.where(disassemble, bad_prob * (salvage - row.disassembly), 0.0)
+
+    expected_profit = np.where(
+        final_test,
+        good_prob * row.sale - base_cost + disassembly_value,
+        row.sale - base_cost - bad_prob * row.exchange_loss + disassembly_value,
+    )
+    return {
+        "expected_profit": expected_profit,
+        "expected_cost": row.sale - expected_profit,
+        "defect_risk": bad_prob,
+        "good_probability": good_prob,
+        "base_cost": base_cost,
+        "salvage_value_if_bad": salvage,
+    }
+
+
 def solve_q2() -> tuple[pd.DataFrame, pd.DataFrame]:
     policies = list(itertools.product([False, True], repeat=4))
     rows = []
@@ -406,6 +413,98 @@ def q3_profit(policy: tuple[bool, ...], comp_df: pd.DataFrame = COMPONENTS_Q3) -
     }
 
 
+def q3_policy_matrix() -> np.ndarray:
+    codes = np.arange(2**16)
+    return ((codes[:, None] >> np.arange(15, -1, -1)) & 1).astype(bool)
+
+
+def q3_part_tables(comp_df: pd.DataFrame = COMPONENTS_Q3, p: np.ndarray | None = None) -> dict[str, np.ndarray]:
+    rates = comp_df["p"].to_numpy(dtype=float) if p is None else np.asarray(p, dtype=float)
+    cost = comp_df["cost"].to_numpy(dtype=float)
+    test = comp_df["test"].to_numpy(dtype=float)
+    return {
+        "semi": comp_df["semi"].to_numpy(dtype=int),
+        "value": cost,
+        "plain_cost": np.broadcast_to(cost, rates.shape),
+        "inspected_cost": (cost + test) / np.maximum(1e-9, 1 - rates),
+        "plain_good": 1 - rates,
+    }
+
+
+def _product(values: list[np.ndarray]) -> np.ndarray | float:
+    result: np.ndarray | float = 1.0
+    for value in values:
+        result = result * value
+    return result
+
+
+def _salvage_if_bad_batch(good_probs: list[np.ndarray], values: list[Any], defect_p: float, bad_prob: np.ndarray) -> np.ndarray:
+    safe_bad = np.where(bad_prob > 0, bad_prob, 1.0)
+    salvage: np.ndarray | float = 0.0
+    for idx, value in enumerate(values):
+        others_good = _product([good_probs[j] for j in range(len(good_probs)) if j != idx])
+        part_good_and_bad = good_probs[idx] * (1 - others_good * (1 - defect_p))
+        salvage = salvage + value * part_good_and_bad / safe_bad
+    return np.where(bad_prob > 0, salvage, 0.0)
+
+
+def q3_profit_batch(
+    policies: np.ndarray,
+    comp_df: pd.DataFrame = COMPONENTS_Q3,
+    p: np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    """Score every row of a (n_policies, 16) bit matrix in one pass.
+
+    Mirrors ``q3_profit`` operation by operation so results match the scalar path
+    exactly. ``p`` may carry leading sample dimensions, e.g. shape (n_samples, 8),
+    in which case every output has shape (n_samples, n_policies).
+    """
+    tables = q3_part_tables(comp_df, p)
+    comp_bits = policies[:, :8]
+    part_cost = np.where(comp_bits, tables["inspected_cost"][..., None, :], tables["plain_cost"][..., None, :])
+    part_good = np.where(comp_bits, 1.0, tables["plain_good"][..., None, :])
+
+    effective_costs = []
+    pass_probs = []
+    for k, semi_id in enumerate((1, 2, 3)):
+        info = SEMI_INFO[semi_id]
+        semi_inspect = policies[:, 8 + k]
+        semi_disassemble = policies[:, 11 + k]
+        columns = np.flatnonzero(tables["semi"] == semi_id)
+        goods = [part_good[..., j] for j in columns]
+        cost: np.ndarray | float = 0.0
+        for j in columns:
+            cost = cost + part_cost[..., j]
+        cost = cost + (info["assembly"] + np.where(semi_inspect, info["test"], 0))
+        good_prob = _product(goods) * (1 - info["p"])
+        bad_prob = 1 - good_prob
+        salvage = _salvage_if_bad_batch(goods, [tables["value"][j] for j in columns], info["p"], bad_prob)
+        recovered = np.where(semi_disassemble, bad_prob * (salvage - info["disassembly"]), 0.0)
+        effective_costs.append(np.where(semi_inspect, (cost - recovered) / np.maximum(1e-9, good_prob), cost))
+        pass_probs.append(np.where(semi_inspect, 1.0, good_prob))
+
+    final_inspect = policies[:, 14]
+    final_disassemble = policies[:, 15]
+    base_cost = effective_costs[0] + effective_costs[1] + effective_costs[2]
+    base_cost = base_cost + FINAL_INFO["assembly"] + np.where(final_inspect, FINAL_INFO["test"], 0)
+    good_prob = _product(pass_probs) * (1 - FINAL_INFO["p"])
+    bad_prob = 1 - good_prob
+    salvage = _salvage_if_bad_batch(pass_probs, effective_costs, FINAL_INFO["p"], bad_prob)
+    disassembly_value = np.where(final_disassemble, bad_prob * (salvage - FINAL_INFO["disassembly"]), 0.0)
+    expected_profit = np.where(
+        final_inspect,
+        good_prob * FINAL_INFO["sale"] - base_cost + disassembly_value,
+        FINAL_INFO["sale"] - base_cost - bad_prob * FINAL_INFO["exchange_loss"] + disassembly_value,
+    )
+    return {
+        "expected_profit": expected_profit,
+        "defect_risk": bad_prob,
+        "good_probability": good_prob,
+        "base_cost": base_cost,
+        "final_salvage_value_if_bad": salvage,
+    }
+
+
 def q3_policy_label(policy: tuple[bool, ...]) -> str:
     comp = "".join("1" if x else "0" for x in policy[:8])
     semi_i = "".join("1" if x else "0" for x in policy[8:11])
@@ -413,22 +512,38 @@ def q3_policy_label(policy: tuple[bool, ...]) -> str:
     return f"零检={comp}; 半检={semi_i}; 半拆={semi_d}; 成检={bool_text(policy[14])}; 成拆={bool_text(policy[15])}"
 
 
+def bit_strings(bits: np.ndarray) -> list[str]:
+    width = bits.shape[1]
+    lookup = [format(code, f"0{width}b") for code in range(2**width)]
+    codes = bits.astype(int) @ (1 << np.arange(width - 1, -1, -1))
+    return [lookup[code] for code in codes]
+
+
+def q3_policy_frame(policies: np.ndarray, scores: dict[str, np.ndarray]) -> pd.DataFrame:
+    comp = bit_strings(policies[:, :8])
+    semi_i = bit_strings(policies[:, 8:11])
+    semi_d = bit_strings(policies[:, 11:14])
+    labels = [
+        f"零检={c}; 半检={si}; 半拆={sd}; 成检={bool_text(fi)}; 成拆={bool_text(fd)}"
+        for c, si, sd, fi, fd in zip(comp, semi_i, semi_d, policies[:, 14], policies[:, 15])
+    ]
+    return pd.DataFrame(
+        {
+            "policy": labels,
+            "component_inspection_bits": comp,
+            "semi_inspection_bits": semi_i,
+            "semi_disassembly_bits": semi_d,
+            "inspect_final": policies[:, 14],
+            "disassemble_final": policies[:, 15],
+            **scores,
+        }
+    )
+
+
 def solve_q3() -> tuple[pd.DataFrame, pd.DataFrame]:
-    rows = []
-    for policy in itertools.product([False, True], repeat=16):
-        score = q3_profit(policy)
-        rows.append(
-            {
-                "policy": q3_policy_label(policy),
-                "component_inspection_bits": "".join("1" if x else "0" for x in policy[:8]),
-                "semi_inspection_bits": "".join("1" if x else "0" for x in policy[8:11]),
-                "semi_disassembly_bits": "".join("1" if x else "0" for x in policy[11:14]),
-                "inspect_final": policy[14],
-                "disassemble_final": policy[15],
-                **score,
-            }
-        )
-    all_df = pd.DataFrame(rows).sort_values("expected_profit", ascending=False).reset_index(drop=True)
+    policies = q3_policy_matrix()
+    scores = q3_profit_batch(policies)
+    all_df = q3_policy_frame(policies, scores).sort_values("expected_profit", ascending=False).reset_index(drop=True)
     best = all_df.head(1).copy()
     top = all_df.head(20).copy()
     best.to_csv(TABLES / "q3_best_policy.csv", index=False, encoding="utf-8-sig")
@@ -462,79 +577,75 @@ def solve_q3() -> tuple[pd.DataFrame, pd.DataFrame]:
     return best, all_df
 
 
-def solve_q4(q2_all: pd.DataFrame, q3_all: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+POSTERIOR_SAMPLE_N = 80
+ROBUST_CHUNK_SIZE = 4096
+
+
+def beta_posterior_draws(rng: np.random.Generator, rates: np.ndarray, n_samples: int, sample_n: int = POSTERIOR_SAMPLE_N) -> np.ndarray:
+    rates = np.asarray(rates, dtype=float)
+    return rng.beta(rates * sample_n + 1, (1 - rates) * sample_n + 1, size=(n_samples, len(rates)))
+
+
+def robust_summary(profits: np.ndarray) -> dict[str, np.ndarray]:
+    return {
+        "mean_profit": profits.mean(axis=0),
+        "p10_profit": np.percentile(profits, 10, axis=0),
+        "p90_profit": np.percentile(profits, 90, axis=0),
+    }
+
+
+def solve_q4(
+    q2_all: pd.DataFrame,
+    q3_all: pd.DataFrame,
+    q2_samples: int = 120,
+    q3_samples: int = 50,
+    q3_candidates: int = 50,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
     rng = np.random.default_rng(20240520)
-    sample_n = 80
     q2_rows = []
-    policies = list(itertools.product([False, True], repeat=4))
+    policies = np.array(list(itertools.product([False, True], repeat=4)))
 
     for scenario in Q2_SCENARIOS:
-        sampled_rates = []
-        for _ in range(120):
-            p1 = rng.beta(scenario.p1 * sample_n + 1, (1 - scenario.p1) * sample_n + 1)
-            p2 = rng.beta(scenario.p2 * sample_n + 1, (1 - scenario.p2) * sample_n + 1)
-            pf = rng.beta(scenario.pf * sample_n + 1, (1 - scenario.pf) * sample_n + 1)
-            sampled_rates.append((p1, p2, pf))
-
-        robust_records = []
-        for policy in policies:
-            profits = []
-            for p1, p2, pf in sampled_rates:
-                varied = Q2Scenario(
-                    scenario.scenario,
-                    float(p1),
-                    scenario.c1,
-                    scenario.t1,
-                    float(p2),
-                    scenario.c2,
-                    scenario.t2,
-                    float(pf),
-                    scenario.assembly,
-                    scenario.final_test,
-                    scenario.sale,
-                    scenario.exchange_loss,
-                    scenario.disassembly,
-                )
-                profits.append(q2_profit(varied, policy)["expected_profit"])
-            robust_records.append(
-                {
-                    "scenario": scenario.scenario,
-                    "policy": q2_policy_label(policy),
-                    "mean_profit": float(np.mean(profits)),
-                    "p10_profit": float(np.percentile(profits, 10)),
-                    "p90_profit": float(np.percentile(profits, 90)),
-                }
-            )
-        q2_rows.append(max(robust_records, key=lambda item: item["p10_profit"]))
+        draws = beta_posterior_draws(rng, np.array([scenario.p1, scenario.p2, scenario.pf]), q2_samples)
+        profits = q2_profit_batch(scenario, policies, draws[:, 0], draws[:, 1], draws[:, 2])["expected_profit"]
+        summary = robust_summary(profits)
+        best = int(np.argmax(summary["p10_profit"]))
+        q2_rows.append(
+            {
+                "scenario": scenario.scenario,
+                "policy": q2_policy_label(tuple(bool(bit) for bit in policies[best])),
+                **{key: float(values[best]) for key, values in summary.items()},
+            }
+        )
 
     q2_robust = pd.DataFrame(q2_rows)
     q2_robust.to_csv(TABLES / "q4_q2_robust_policy.csv", index=False, encoding="utf-8-sig")
 
-    candidate_policies = []
-    for _, row in q3_all.head(50).iterrows():
-        bits = tuple(ch == "1" for ch in row["component_inspection_bits"])
-        semi_i = tuple(ch == "1" for ch in row["semi_inspection_bits"])
-        semi_d = tuple(ch == "1" for ch in row["semi_disassembly_bits"])
-        policy = bits + semi_i + semi_d + (bool(row["inspect_final"]), bool(row["disassemble_final"]))
-        candidate_policies.append(policy)
-
-    q3_records = []
-    for policy in candidate_policies:
-        profits = []
-        for _ in range(50):
-            varied_components = COMPONENTS_Q3.copy()
-            varied_components["p"] = [
-                rng.beta(0.10 * sample_n + 1, 0.90 * sample_n + 1) for _ in range(len(varied_components))
-            ]
-            profits.append(q3_profit(policy, varied_components)["expected_profit"])
-        q3_records.append(
-            {
-                "policy": q3_policy_label(policy),
-                "mean_profit": float(np.mean(profits)),
-                "p10_profit": float(np.percentile(profits, 10)),
-                "p90_profit": float(np.percentile(profits, 90)),
-            }
-        )
+    head = q3_all.head(q3_candidates)
+    bits = head["component_inspection_bits"] + head["semi_inspection_bits"] + head["semi_disassembly_bits"]
+    candidate_policies = np.column_stack(
+        [
+            np.array([[ch == "1" for ch in text] for text in bits], dtype=bool).reshape(-1, 14),
+            head["inspect_final"].to_numpy(dtype=bool),
+            head["disassemble_final"].to_numpy(dtype=bool),
+        ]
+    )
+
+    draws = beta_posterior_draws(rng, COMPONENTS_Q3["p"].to_numpy(dtype=float), q3_samples)
+    profits = np.concatenate(
+        [
+            q3_profit_batch(candidate_policies, p=draws[start : start + ROBUST_CHUNK_SIZE])["expected_profit"]
+            for start in range(0, q3_samples, ROBUST_CHUNK_SIZE)
+        ]
+    )
+    summary = robust_summary(profits)
+    q3_records = [
+        {
+            "policy": label,
+            **{key: float(values[index]) for key, values in summary.items()},
+        }
+        for index, label in enumerate(head["policy"])
+    ]
     q3_robust = pd.DataFrame(q3_records).sort_values("p10_profit", ascending=False).head(10)
     q3_robust.to_csv(TABLES / "q4_q3_robust_policy.csv", index=False, encoding="utf-8-sig")
 
@@ -710,7 +821,7 @@ def build_contracts(
                     "q2_robust": q4_q2.to_dict("records"),
                     "q3_robust_top": q4_q3.head(3).to_dict("records"),
                 },
-                "parameters": [{"name": "posterior_sample_n", "value": 80}, {"name": "robust_percentile", "value": 10}],
+                "parameters": [{"name": "posterior_sample_n", "value": POSTERIOR_SAMPLE_N}, {"name": "robust_percentile", "value": 10}],
                 "evidence_status": "ready",
                 "status": "generated",
             },
@@ -730,7 +841,7 @@ def build_contracts(
             {"question_id": "Q2", "status": "generated", "metric_name": "mean_improvement", "metric_role": "相对基准平均收益提升", "value": round(float(q2_best["improvement"].mean()), 4), "unit": "元/件"},
             {"question_id": "Q3", "status": "generated", "metric_name": "policy_count", "metric_role": "多工序枚举策略数", "value": 65536, "unit": "个"},
             {"question_id": "Q3", "status": "generated", "metric_name": "best_expected_profit", "metric_role": "最优期望利润", "value": round(float(q3_best.iloc[0]["expected_profit"]), 4), "unit": "元/件"},
-            {"question_id": "Q4", "status": "generated", "metric_name": "posterior_sample_n", "metric_role": "每个次品率的等效抽样量", "value": 80, "unit": "件"},
+            {"question_id": "Q4", "status": "generated", "metric_name": "posterior_sample_n", "metric_role": "每个次品率的等效抽样量", "value": POSTERIOR_SAMPLE_N, "unit": "件"},
             {"question_id": "Q4", "status": "generated", "metric_name": "robust_percentile", "metric_role": "稳健优化分位数", "value": 10, "unit": "%"},
         ],
     }
@@ -1028,15 +1139,31 @@ def build_docx(markdown_text: str, sampling: dict[str, Any], q2_best: pd.DataFra
     doc.save(OUT / "final_paper.docx")
 
 
+def positive_int(text: str) -> int:
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {text}")
+    return value
+
+
 def main() -> int:
     configure_utf8_stdio()
+    parser = argparse.ArgumentParser(description="Solve CUMCM 2024 B and write evidence contracts, figures and the demo paper.")
+    parser.add_argument("--q2-samples", type=positive_int, default=120, help="Beta posterior draws per Q2 scenario in the Q4 robustness check.")
+    parser.add_argument("--q3-samples", type=positive_int, default=50, help="Beta posterior draws shared by all Q3 candidates in the Q4 robustness check.")
+    parser.add_argument("--q3-candidates", type=positive_int, default=50, help="Number of top nominal Q3 policies re-scored under uncertainty.")
+    parser.add_argument("--q1-grid-p0", type=float, nargs="*", default=None, help="Also tabulate Q1 sampling plans for these nominal defect rates.")
+    parser.add_argument("--q1-grid-confidence", type=float, nargs="*", default=[0.90, 0.95, 0.99], help="Confidence levels used by --q1-grid-p0.")
+    args = parser.parse_args()
     ensure_dirs()
     setup_plot_style()
     update_model_route()
     sampling, _ = find_sampling_rules()
+    if args.q1_grid_p0:
+        tabulate_sampling_plans(args.q1_grid_p0, args.q1_grid_confidence)
     q2_best, q2_all = solve_q2()
     q3_best, q3_all = solve_q3()
-    q4_q2, q4_q3 = solve_q4(q2_all, q3_all)
+    q4_q2, q4_q3 = solve_q4(q2_all, q3_all, args.q2_samples, args.q3_samples, args.q3_candidates)
     build_contracts(sampling, q2_best, q3_best, q4_q2, q4_q3)
     markdown = build_markdown(sampling, q2_best, q3_best, q4_q2, q4_q3)
     (OUT / "final_paper.md").write_text(markdown, encoding="utf-8")
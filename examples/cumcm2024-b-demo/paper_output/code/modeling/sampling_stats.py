@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import math
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+
+
+# math.comb(n, k) stays a finite float up to n = 1020; beyond that use log space.
+LINEAR_PMF_MAX_N = 1000
+
+
+@lru_cache(maxsize=None)
+def binom_coef(n: int) -> np.ndarray:
+    return np.array([float(math.comb(n, k)) for k in range(n + 1)])
+
+
+@lru_cache(maxsize=None)
+def log_binom_coef(n: int) -> np.ndarray:
+    k = np.arange(1, n + 1, dtype=float)
+    return np.concatenate([[0.0], np.cumsum(np.log(n - k + 1) - np.log(k))])
+
+
+def binom_pmf_table(n: int, p: np.ndarray | float) -> np.ndarray:
+    """P(X=k) for k=0..n, shape p.shape + (n + 1,)."""
+    p = np.asarray(p, dtype=float)[..., None]
+    k = np.arange(n + 1, dtype=float)
+    if n <= LINEAR_PMF_MAX_N:
+        return binom_coef(n) * np.power(p, k) * np.power(1 - p, n - k)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_p = np.where(k > 0, k * np.log(p), 0.0)
+        log_q = np.where(k < n, (n - k) * np.log1p(-p), 0.0)
+    return np.exp(log_binom_coef(n) + log_p + log_q)
+
+
+def binom_cdf_table(n: int, p: np.ndarray | float) -> np.ndarray:
+    """P(X<=x) for x=0..n."""
+    return np.minimum(np.cumsum(binom_pmf_table(n, p), axis=-1), 1.0)
+
+
+def binom_sf_table(n: int, p: np.ndarray | float) -> np.ndarray:
+    """P(X>=x) for x=0..n, summed from the upper tail to keep small tails accurate."""
+    pmf = binom_pmf_table(n, p)
+    return np.minimum(np.cumsum(pmf[..., ::-1], axis=-1)[..., ::-1], 1.0)
+
+
+def binom_cdf(n: int, x: int, p: np.ndarray | float) -> np.ndarray:
+    return binom_cdf_table(n, p)[..., x]
+
+
+def binom_sf(n: int, x: int, p: np.ndarray | float) -> np.ndarray:
+    return binom_sf_table(n, p)[..., x]
+
+
+def _bisect(move_lo, iterations: int = 70) -> float:
+    lo, hi = 0.0, 1.0
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        if move_lo(mid):
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+@lru_cache(maxsize=None)
+def cp_lower(x: int, n: int, confidence: float) -> float:
+    """One-sided Clopper-Pearson lower bound, i.e. the Beta(x, n-x+1) quantile at 1-confidence."""
+    if x <= 0:
+        return 0.0
+    alpha = 1 - confidence
+    return _bisect(lambda p: float(binom_sf(n, x, p)) < alpha)
+
+
+@lru_cache(maxsize=None)
+def cp_upper(x: int, n: int, confidence: float) -> float:
+    """One-sided Clopper-Pearson upper bound, i.e. the Beta(x+1, n-x) quantile at confidence."""
+    if x >= n:
+        return 1.0
+    alpha = 1 - confidence
+    return _bisect(lambda p: float(binom_cdf(n, x, p)) > alpha)
+
+
+def find_reject_rule(p0: float, confidence: float, max_n: int = 300) -> tuple[int, int] | None:
+    """Smallest (n, x) such that x or more defects put the CP lower bound above p0.
+
+    The lower bound exceeds p0 exactly when P(X>=x | n, p0) < 1-confidence, so the
+    search needs one upper-tail table per n instead of a bisection per (n, x).
+    """
+    alpha = 1 - confidence
+    for n in range(1, max_n + 1):
+        hits = np.flatnonzero(binom_sf_table(n, p0)[1:] < alpha)
+        if hits.size:
+            return n, int(hits[0]) + 1
+    return None
+
+
+def find_accept_rule(p0: float, confidence: float, max_n: int = 300) -> tuple[int, int] | None:
+    """Smallest (n, x) such that at most x defects keep the CP upper bound at or below p0."""
+    alpha = 1 - confidence
+    for n in range(1, max_n + 1):
+        hits = np.flatnonzero(binom_cdf_table(n, p0)[:n] <= alpha)
+        if hits.size:
+            return n, int(hits[0])
+    return None
+
+
+def oc_curves(reject: tuple[int, int], accept: tuple[int, int], p_grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Reject/accept trigger probabilities over the whole defect-rate grid in one call each."""
+    reject_prob = binom_sf(reject[0], reject[1], p_grid)
+    accept_prob = binom_cdf(accept[0], accept[1], p_grid)
+    return reject_prob, accept_prob
+
+
+def sampling_plan_grid(p0_values: list[float], confidences: list[float], max_n: int = 300) -> list[dict[str, Any]]:
+    rows = []
+    for p0 in p0_values:
+        for confidence in confidences:
+            reject = find_reject_rule(p0, confidence, max_n)
+            accept = find_accept_rule(p0, confidence, max_n)
+            rows.append(
+                {
+                    "p0": p0,
+                    "confidence": confidence,
+                    "reject_n": reject[0] if reject else None,
+                    "reject_min_defects": reject[1] if reject else None,
+                    "reject_lower_bound": cp_lower(reject[1], reject[0], confidence) if reject else None,
+                    "accept_n": accept[0] if accept else None,
+                    "accept_max_defects": accept[1] if accept else None,
+                    "accept_upper_bound": cp_upper(accept[1], accept[0], confidence) if accept else None,
+                }
+            )
+    return rows
@@ -0,0 +1,133 @@
+"""Encoding/delimiter detection shared by every CSV reader in the workflow.
+
+One byte sample per file: BOM check, a strict decode trial of the first
+SAMPLE_BYTES, then csv.Sniffer on the complete lines. Results are cached in
+paper_output/cache/csv_sniff.json, keyed by a content fingerprint (size plus
+head and tail bytes). Later stages can then open the file with the right
+parameters on the first try. Callers keep their old trial loops as a fallback
+for files whose tail does not match the sample. Cache updates are merged under
+file_lock.locked(), because parallel stages and figure workers sniff at the
+same time.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from file_lock import locked
+
+SAMPLE_BYTES = 64 * 1024
+CACHE_FILE = Path("paper_output") / "cache" / "csv_sniff.json"
+ENCODINGS = ("utf-8", "gbk", "gb18030")
+DELIMITERS = ",\t;|"
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def file_fingerprint(path: Path) -> str:
+    size = path.stat().st_size
+    digest = hashlib.sha1(f"{size}:".encode("ascii"))
+    with path.open("rb") as handle:
+        digest.update(handle.read(SAMPLE_BYTES))
+        if size > SAMPLE_BYTES:
+            handle.seek(max(SAMPLE_BYTES, size - SAMPLE_BYTES))
+            digest.update(handle.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+
+def detect_encoding(sample: bytes, complete: bool) -> str:
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+    for encoding in ENCODINGS:
+        try:
+            # final=False tolerates a multi-byte character cut at the sample edge.
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=complete)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return "gb18030"
+
+
+def detect_delimiter(text: str) -> str:
+    lines = text.splitlines()
+    if len(lines) > 1 and not text.endswith(("\n", "\r")):
+        lines = lines[:-1]
+    sample = "\n".join(lines[:200])
+    if not sample.strip():
+        return ","
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        header = lines[0]
+        counts = {sep: header.count(sep) for sep in DELIMITERS}
+        best = max(counts, key=counts.get)
+        return best if counts[best] else ","
+
+
+def sniff_bytes(sample: bytes, complete: bool) -> dict[str, str]:
+    encoding = detect_encoding(sample, complete)
+    text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(sample, final=complete)
+    return {"encoding": encoding, "sep": detect_delimiter(text)}
+
+
+def load_cache(cache_file: Path) -> dict[str, Any]:
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache_entry(cache_file: Path, key: str, entry: dict[str, str]) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with locked(cache_file):
+            data = load_cache(cache_file)
+            data[key] = entry
+            tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, cache_file)
+    except OSError:  # includes TimeoutError: the cache is only an optimisation
+        pass
+
+
+def sniff_csv(path: Path, cache_file: Path | None = CACHE_FILE) -> dict[str, str]:
+    """{"encoding": ..., "sep": ...} for a delimited text file, cached by content fingerprint."""
+    key = file_fingerprint(path)
+    if cache_file is not None:
+        cached = load_cache(cache_file).get(key)
+        if isinstance(cached, dict) and cached.get("encoding") and cached.get("sep"):
+            return {"encoding": cached["encoding"], "sep": cached["sep"]}
+    with path.open("rb") as handle:
+        sample = handle.read(SAMPLE_BYTES + 1)
+    result = sniff_bytes(sample[:SAMPLE_BYTES], complete=len(sample) <= SAMPLE_BYTES)
+    if cache_file is not None:
+        save_cache_entry(cache_file, key, result)
+    return result
+
+
+def read_attempts(
+    path: Path,
+    encodings: tuple[str, ...],
+    seps: tuple[str | None, ...] = (None,),
+    cache_file: Path | None = CACHE_FILE,
+) -> list[tuple[str, str | None]]:
+    """The sniffed (encoding, sep) first, then the caller's legacy trial order."""
+    attempts: list[tuple[str, str | None]] = []
+    try:
+        sniffed = sniff_csv(path, cache_file)
+        attempts.append((sniffed["encoding"], sniffed["sep"]))
+    except Exception:
+        pass
+    attempts.extend((encoding, sep) for encoding in encodings for sep in seps if (encoding, sep) not in attempts)
+    return attempts
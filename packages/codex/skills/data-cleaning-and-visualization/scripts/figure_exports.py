@@ -0,0 +1,75 @@
+"""Figure variants: vector masters and docx-sized rasters.
+
+Every template figure is saved as the 300-dpi PNG that the rest of the
+workflow references, plus SVG/PDF masters for typesetting. format_formal_docx
+embeds pictures at Cm(14.2), so a full-resolution PNG only inflates the docx.
+Each PNG therefore also gets a copy resampled to exactly that width at
+DOCX_DPI and palette-quantized. The copy lives in a docx/ folder next to the
+PNG, e.g. figures/fig_q1_trend.png -> figures/docx/fig_q1_trend.png.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+VECTOR_FORMATS = ("svg", "pdf")
+DOCX_WIDTH_CM = 14.2
+DOCX_DPI = 220
+
+
+def docx_asset_path(png: Path) -> Path:
+    return png.parent / "docx" / png.name
+
+
+def save_vector_masters(fig, png: Path, formats: tuple[str, ...] = VECTOR_FORMATS) -> list[Path]:
+    paths = []
+    for fmt in formats:
+        path = png.with_suffix(f".{fmt}")
+        fig.savefig(path, format=fmt, bbox_inches="tight")
+        paths.append(path)
+    return paths
+
+
+def make_docx_raster(png: Path, width_cm: float = DOCX_WIDTH_CM, dpi: int = DOCX_DPI) -> Path:
+    """Resample to the docx embed width, flatten onto white and quantize to a 256-colour palette."""
+    from PIL import Image
+
+    target = docx_asset_path(png)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    width = round(width_cm / 2.54 * dpi)
+    with Image.open(png) as source:
+        image = source.convert("RGBA")
+    flat = Image.new("RGB", image.size, "white")
+    flat.paste(image, mask=image.getchannel("A"))
+    if flat.width > width:
+        flat = flat.resize((width, max(1, round(flat.height * width / flat.width))), Image.Resampling.LANCZOS)
+    quantized = flat.quantize(colors=256, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE)
+    tmp = target.with_name(f".{target.name}.tmp")
+    quantized.save(tmp, format="PNG", optimize=True, dpi=(dpi, dpi))
+    tmp.replace(target)
+    return target
+
+
+def docx_asset(png: Path) -> Path:
+    """The optimized raster for png, built on demand; falls back to png itself."""
+    if png.suffix.lower() != ".png" or not png.exists():
+        return png
+    target = docx_asset_path(png)
+    try:
+        if not target.exists() or target.stat().st_mtime_ns < png.stat().st_mtime_ns:
+            make_docx_raster(png)
+    except Exception:
+        return png
+    return target
+
+
+def figure_variants(png: Path, base_dir: Path | None = None) -> dict[str, dict[str, Any]]:
+    """{"png"|"svg"|"pdf"|"docx_png": {"path", "bytes"}} for the variants that exist on disk."""
+    candidates = {"png": png, **{fmt: png.with_suffix(f".{fmt}") for fmt in VECTOR_FORMATS}, "docx_png": docx_asset_path(png)}
+    variants = {}
+    for name, path in candidates.items():
+        if path.exists():
+            shown = path.relative_to(base_dir) if base_dir and path.is_relative_to(base_dir) else path
+            variants[name] = {"path": shown.as_posix(), "bytes": path.stat().st_size}
+    return variants
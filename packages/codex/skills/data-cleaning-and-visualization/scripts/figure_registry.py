@@ -0,0 +1,150 @@
+"""Registry of paper figure templates.
+
+Each template is registered by name with the metadata used to pick and
+validate it: description, title/purpose keywords, and the module/function
+that renders it. The renderer module is imported only when a spec of that
+type is rendered. Listing templates, inferring a spec's template and
+validating a plan therefore never import Matplotlib, pandas or seaborn;
+validation checks candidate columns against data_profile.json.
+
+Every renderer takes (df, spec, output_path, profile=None, notes=None) and
+returns the saved path. To add a template, call register_template() before
+rendering.
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+DEFAULT_TEMPLATE = "line"
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg"}
+TABLE_SUFFIXES = {".csv", ".xlsx", ".xls"}
+
+
+@dataclass(frozen=True)
+class TemplateInfo:
+    name: str
+    module: str
+    function: str
+    description: str
+    keywords: tuple[str, ...] = ()
+
+
+REGISTRY: dict[str, TemplateInfo] = {}
+
+
+def register_template(name: str, module: str, function: str, description: str, keywords: tuple[str, ...] = ()) -> TemplateInfo:
+    """Add or replace a template. Keyword matching follows registration order."""
+    info = TemplateInfo(name, module, function, description, tuple(keywords))
+    REGISTRY[name] = info
+    return info
+
+
+for _name, _function, _description, _keywords in [
+    ("prediction_comparison", "plot_prediction_comparison", "真实值-预测值对比折线", ("预测", "预报", "真实值", "forecast", "prediction")),
+    ("residual_distribution", "plot_residual_distribution", "残差直方图与分位参考", ("残差", "误差分布", "residual")),
+    ("sensitivity_curve", "plot_sensitivity_curve", "参数扰动下的响应曲线", ("敏感性", "灵敏度", "扰动", "sensitivity")),
+    ("model_comparison", "plot_model_comparison", "模型/方案分组柱状对比", ("模型对比", "方案对比", "基线", "对照", "comparison")),
+    ("weight_bar", "plot_weight_bar", "指标权重横向条形图", ("权重", "指标权重", "weight")),
+    ("score_ranking", "plot_score_ranking", "综合得分排序条形图", ("得分", "排序", "排名", "score", "ranking")),
+    ("heatmap", "plot_heatmap", "数值变量相关性热力图", ("热力", "相关", "矩阵", "heatmap", "correlation")),
+    ("scatter", "plot_scatter", "二维关系散点图", ("聚类", "分群", "散点", "cluster", "scatter")),
+    ("bar", "plot_model_comparison", "通用分组柱状图", ()),
+    ("line", "plot_generic_line", "通用趋势折线图", ()),
+]:
+    register_template(_name, "paper_figure_templates", _function, _description, _keywords)
+
+
+def infer_template(spec: dict[str, Any]) -> str:
+    """template_hint wins; then title/purpose keywords; then a chart_type naming a template; else line."""
+    hint = str(spec.get("template_hint") or "").strip().lower()
+    if hint:
+        return hint[5:] if hint.startswith("plot_") else hint
+    text = f"{spec.get('chart_type', '')} {spec.get('title', '')} {spec.get('purpose', '')}".lower()
+    for info in REGISTRY.values():
+        if any(keyword in text for keyword in info.keywords):
+            return info.name
+    chart_type = str(spec.get("chart_type") or "").strip().lower()
+    return chart_type if chart_type in REGISTRY else DEFAULT_TEMPLATE
+
+
+def resolve_template(name: str) -> TemplateInfo:
+    """Unknown names render with the default template, as before."""
+    return REGISTRY.get(name) or REGISTRY[DEFAULT_TEMPLATE]
+
+
+def load_renderer(name: str) -> Callable[..., str]:
+    info = resolve_template(name)
+    return getattr(importlib.import_module(info.module), info.function)
+
+
+def template_source(name: str) -> Path | None:
+    """Source file of the template's module, located without importing it."""
+    spec = importlib.util.find_spec(resolve_template(name).module)
+    return Path(spec.origin) if spec and spec.origin else None
+
+
+def missing_columns(spec: dict[str, Any], path: Path) -> list[str]:
+    """candidate_x/candidate_y names absent from the table, read from the cached data profile."""
+    candidate_y = spec.get("candidate_y") if isinstance(spec.get("candidate_y"), list) else []
+    wanted = [str(name).strip() for name in [spec.get("candidate_x"), *candidate_y] if str(name or "").strip()]
+    if not wanted:
+        return []
+    try:
+        from data_profile import profile_path
+
+        columns = {str(item["name"]) for item in profile_path(path)["columns"]}
+    except Exception:
+        return []
+    return [name for name in wanted if name not in columns]
+
+
+def validate_plan(plan: Any, base_dir: Path) -> list[dict[str, Any]]:
+    """[{"figure_id", "level": "error"|"warning", "message"}] without rendering or loading tables into pandas."""
+    figures = plan.get("figures") if isinstance(plan, dict) else None
+    if not isinstance(figures, list) or not figures:
+        return [{"figure_id": "", "level": "error", "message": "visualization_plan.json has no figures[]"}]
+    issues: list[dict[str, Any]] = []
+    seen_ids: set[str] = set()
+    seen_outputs: set[str] = set()
+    for position, spec in enumerate(figures):
+        if not isinstance(spec, dict):
+            issues.append({"figure_id": f"#{position}", "level": "error", "message": "figure spec is not an object"})
+            continue
+        figure_id = str(spec.get("figure_id") or f"#{position}")
+
+        def add(level: str, message: str) -> None:
+            issues.append({"figure_id": figure_id, "level": level, "message": message})
+
+        if figure_id in seen_ids:
+            add("error", "duplicate figure_id")
+        seen_ids.add(figure_id)
+        output = str(spec.get("output_path") or "").strip().replace("\\", "/")
+        if not output:
+            add("error", "missing output_path")
+        elif Path(output).suffix.lower() not in IMAGE_SUFFIXES:
+            add("warning", f"output_path is not a PNG/JPG image: {output}")
+        if output and output in seen_outputs:
+            add("error", f"output_path reused by another figure: {output}")
+        seen_outputs.add(output)
+        source = str(spec.get("data_source") or "").strip().replace("\\", "/")
+        if not source:
+            add("error", "missing data_source")
+        else:
+            path = Path(source) if Path(source).is_absolute() else base_dir / source
+            if not path.is_file():
+                add("error", f"data_source not found: {source}")
+            elif path.suffix.lower() not in TABLE_SUFFIXES:
+                add("warning", f"data_source is not CSV/Excel: {source}")
+            else:
+                missing = missing_columns(spec, path)
+                if missing:
+                    add("warning", f"candidate columns not in {source}: {', '.join(missing)}")
+        template = infer_template(spec)
+        if template not in REGISTRY:
+            add("warning", f"unknown template '{template}', falls back to {DEFAULT_TEMPLATE}")
+    return issues
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable
+
+
+def resolve_workers(workers: int) -> int:
+    """0 means one worker per CPU."""
+    return workers if workers > 0 else os.cpu_count() or 1
+
+
+def _run_job(func: Callable[[Path], Any], path: Path, conn) -> None:
+    try:
+        conn.send(("ok", func(path)))
+    except Exception as exc:
+        conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def map_files(
+    func: Callable[[Path], Any],
+    paths: list[Path],
+    workers: int = 1,
+    timeout: float | None = None,
+) -> list[tuple[str, Any]]:
+    """Run func(path) for every path, returning (status, value) in input order.
+
+    status is "ok", "error" (value is the message) or "timeout" (value is None).
+    Each file gets its own process so a file that exceeds the time budget can be
+    terminated without stalling the rest of the run. With one worker and no
+    budget the files run inline, exactly like a plain loop.
+    """
+    workers = resolve_workers(workers)
+    if workers <= 1 and not timeout:
+        results: list[tuple[str, Any]] = []
+        for path in paths:
+            try:
+                results.append(("ok", func(path)))
+            except Exception as exc:
+                results.append(("error", f"{type(exc).__name__}: {exc}"))
+        return results
+
+    results = [("error", "not run")] * len(paths)
+    pending = list(enumerate(paths))
+    running: dict[int, tuple[Any, Any, float]] = {}
+    while pending or running:
+        while pending and len(running) < workers:
+            index, path = pending.pop(0)
+            receiver, sender = mp.Pipe(duplex=False)
+            process = mp.Process(target=_run_job, args=(func, path, sender), daemon=True)
+            process.start()
+            sender.close()
+            running[index] = (process, receiver, time.monotonic())
+        ready = wait([receiver for _, receiver, _ in running.values()], timeout=0.2)
+        now = time.monotonic()
+        for index, (process, receiver, started) in list(running.items()):
+            if receiver in ready:
+                try:
+                    results[index] = receiver.recv()
+                except EOFError:
+                    results[index] = ("error", f"worker exited with code {process.exitcode}")
+            elif timeout and now - started > timeout:
+                process.terminate()
+                results[index] = ("timeout", None)
+            else:
+                continue
+            process.join()
+            receiver.close()
+            del running[index]
+    return results
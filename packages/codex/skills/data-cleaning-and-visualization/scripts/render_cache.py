@@ -0,0 +1,90 @@
+"""Content-addressed render cache for generated figures.
+
+A figure is re-rendered only when its cache key changes. The key hashes the
+spec dict, the source table bytes, the renderer's own source file (the
+template version) and the active Matplotlib rcParams (the style). Entries
+live in paper_output/figures/render_manifest.json, keyed by output path. The
+eda and paper_figures stages share that file and may run concurrently, so
+save_manifest() merges under file_lock.locked().
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from file_lock import locked
+
+MANIFEST_FILE = Path("paper_output") / "figures" / "render_manifest.json"
+# Backend selection does not change the saved pixels, and differs between the
+# main process and render workers.
+NON_STYLE_PARAMS = {"backend", "backend_fallback", "interactive"}
+
+
+@lru_cache(maxsize=256)
+def _hash_file(path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_hash(path: Path) -> str:
+    stat = path.stat()
+    return _hash_file(str(path), stat.st_size, stat.st_mtime_ns)
+
+
+def style_fingerprint() -> str:
+    import matplotlib
+
+    items = {key: str(value) for key, value in matplotlib.rcParams.items() if key not in NON_STYLE_PARAMS}
+    return hashlib.sha256(json.dumps(items, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def render_key(spec: Any, source: Path, template_file: Path) -> str:
+    payload = {
+        "spec": spec,
+        "source": file_hash(source),
+        "template": file_hash(template_file),
+        "style": style_fingerprint(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+
+def load_manifest(manifest_file: Path = MANIFEST_FILE) -> dict[str, Any]:
+    try:
+        data = json.loads(manifest_file.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    entries = data.get("entries") if isinstance(data, dict) else None
+    return entries if isinstance(entries, dict) else {}
+
+
+def is_fresh(entry: Any, key: str) -> bool:
+    """True when the entry was rendered with this key and every file it produced still exists."""
+    if not isinstance(entry, dict) or entry.get("key") != key:
+        return False
+    files = entry.get("files") or []
+    return bool(files) and all(Path(item).exists() for item in files)
+
+
+def save_manifest(updates: dict[str, Any], manifest_file: Path = MANIFEST_FILE) -> None:
+    """Merge this stage's entries into the manifest so other stages' entries survive."""
+    if not updates:
+        return
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        with locked(manifest_file):
+            entries = load_manifest(manifest_file)
+            entries.update(updates)
+            tmp = manifest_file.with_name(f".{manifest_file.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"schema_version": "1.0", "entries": entries}, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, manifest_file)
+    except TimeoutError:
+        # Losing this update only means the figures are re-rendered next run.
+        pass
@@ -9,6 +9,10 @@ from importlib import import_module
 from pathlib import Path
 from typing import Any
 
+from csv_sniff import read_attempts
+from parallel_files import map_files
+from xlsx_inspect import inspect_workbook
+
 
 BASE_DIR = Path.cwd().resolve()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -16,6 +20,14 @@ REPORT_FILE = OUTPUT_DIR / "data_cleaned" / "load_report.json"
 
 DATA_EXTS = {".xlsx", ".xls", ".csv", ".tsv", ".json"}
 PDF_EXTS = {".pdf"}
+KIND_BY_EXT = {
+    ".xlsx": "spreadsheet",
+    ".xls": "spreadsheet",
+    ".csv": "table",
+    ".tsv": "table",
+    ".json": "json",
+    ".pdf": "pdf_diagnostic",
+}
 
 
 def configure_utf8_stdio() -> None:
@@ -53,41 +65,21 @@ def file_entry(path: Path, kind: str) -> dict[str, Any]:
 
 def inspect_xlsx(path: Path) -> dict[str, Any]:
     info = file_entry(path, "spreadsheet")
-    openpyxl = safe_import("openpyxl")
-    if openpyxl is None:
+    if safe_import("openpyxl") is None:
         info["errors"].append("缺少依赖 openpyxl，无法读取 .xlsx。")
         return info
     try:
-        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        workbook = inspect_workbook(path, sample_limit=12)
     except Exception as exc:
         info["errors"].append(f"无法打开 xlsx：{type(exc).__name__}: {exc}")
         return info
-    sheets = []
-    try:
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            rows = ws.max_row or 0
-            cols = ws.max_column or 0
-            sample_cols: list[str] = []
-            if rows and cols:
-                first_row = next(ws.iter_rows(min_row=1, max_row=1, max_col=min(cols, 12), values_only=True), None)
-                if first_row:
-                    sample_cols = [str(value) if value is not None else "" for value in first_row]
-            sheets.append({"name": sheet_name, "rows": rows, "cols": cols, "sample_cols": sample_cols})
-            if rows == 0 or cols == 0:
-                info["warnings"].append(f"工作表 {sheet_name} 为空。")
-    finally:
-        wb.close()
-    try:
-        wb2 = openpyxl.load_workbook(path, read_only=False, data_only=True)
-        merged_count = sum(len(wb2[name].merged_cells.ranges) for name in wb2.sheetnames)
-        wb2.close()
-        if merged_count:
-            info["warnings"].append(f"检测到 {merged_count} 处合并单元格，自动读取结果需人工核对。")
-    except Exception:
-        pass
+    for sheet in workbook["sheets"]:
+        if sheet["rows"] == 0 or sheet["cols"] == 0:
+            info["warnings"].append(f"工作表 {sheet['name']} 为空。")
+    if workbook["merged_cells"]:
+        info["warnings"].append(f"检测到 {workbook['merged_cells']} 处合并单元格，自动读取结果需人工核对。")
     info["readable"] = True
-    info["sheets"] = sheets
+    info["sheets"] = workbook["sheets"]
     return info
 
 
@@ -112,38 +104,39 @@ def inspect_csv(path: Path) -> dict[str, Any]:
     pandas = safe_import("pandas")
     if pandas is not None:
         last_error: Exception | None = None
-        for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
-            for sep in (None, ",", "\t", ";"):
-                try:
-                    df = pandas.read_csv(path, nrows=20, encoding=encoding, sep=sep, engine="python")
-                    info.update(
-                        {
-                            "readable": True,
-                            "encoding": encoding,
-                            "sep": sep if sep is not None else "auto",
-                            "rows_sampled": int(len(df)),
-                            "cols": int(len(df.columns)),
-                            "sample_cols": [str(col) for col in df.columns.tolist()],
-                        }
-                    )
-                    if df.empty:
-                        info["warnings"].append("CSV 读取成功但样本为空。")
-                    return info
-                except Exception as exc:
-                    last_error = exc
+        for encoding, sep in read_attempts(path, ("utf-8-sig", "utf-8", "gbk", "gb18030"), (None, ",", "\t", ";")):
+            try:
+                # The sniffed delimiter is explicit, so only the sep=None fallbacks need the python engine.
+                df = pandas.read_csv(path, nrows=20, encoding=encoding, sep=sep, engine="python" if sep is None else "c")
+                info.update(
+                    {
+                        "readable": True,
+                        "encoding": encoding,
+                        "sep": sep if sep is not None else "auto",
+                        "rows_sampled": int(len(df)),
+                        "cols": int(len(df.columns)),
+                        "sample_cols": [str(col) for col in df.columns.tolist()],
+                    }
+                )
+                if df.empty:
+                    info["warnings"].append("CSV 读取成功但样本为空。")
+                return info
+            except Exception as exc:
+                last_error = exc
         info["errors"].append(f"pandas 无法读取：{type(last_error).__name__}: {last_error}")
         return info
 
     # Fallback without pandas.
-    for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
+    for encoding, sep in read_attempts(path, ("utf-8-sig", "utf-8", "gbk", "gb18030")):
         try:
             with path.open("r", encoding=encoding, newline="") as handle:
-                sample = handle.read(4096)
-                dialect = csv.Sniffer().sniff(sample) if sample.strip() else csv.excel
-                handle.seek(0)
-                reader = csv.reader(handle, dialect)
-                first = next(reader, [])
-            info.update({"readable": True, "encoding": encoding, "sep": getattr(dialect, "delimiter", ","), "sample_cols": [str(item) for item in first]})
+                if sep is None:
+                    sample = handle.read(4096)
+                    dialect = csv.Sniffer().sniff(sample) if sample.strip() else csv.excel
+                    handle.seek(0)
+                    sep = getattr(dialect, "delimiter", ",")
+                first = next(csv.reader(handle, delimiter=sep), [])
+            info.update({"readable": True, "encoding": encoding, "sep": sep, "sample_cols": [str(item) for item in first]})
             return info
         except Exception:
             continue
@@ -256,17 +249,32 @@ def inspect_file(path: Path) -> dict[str, Any] | None:
     return None
 
 
-def evaluate(input_dirs: list[str]) -> dict[str, Any]:
+def inspect_results(paths: list[Path], workers: int = 1, file_timeout: float | None = None) -> list[dict[str, Any]]:
+    """Inspect files in a process pool; entries keep the sorted file order regardless of completion order."""
+    entries = []
+    for path, (status, value) in zip(paths, map_files(inspect_file, paths, workers, file_timeout)):
+        if status == "ok":
+            entries.append(value)
+            continue
+        info = file_entry(path, KIND_BY_EXT[path.suffix.lower()])
+        if status == "timeout":
+            info["timed_out"] = True
+            info["warnings"].append(f"读取诊断超过 {file_timeout:g} 秒时限，已跳过；请单独检查该文件或调大 --file-timeout。")
+        else:
+            info["errors"].append(f"诊断进程失败：{value}")
+        entries.append(info)
+    return entries
+
+
+def evaluate(input_dirs: list[str], workers: int = 1, file_timeout: float | None = None) -> dict[str, Any]:
     files = iter_input_files(input_dirs)
     data_files: list[dict[str, Any]] = []
     pdf_diagnostics: list[dict[str, Any]] = []
     warnings: list[str] = []
     errors: list[str] = []
 
-    for path in files:
-        info = inspect_file(path)
-        if info is None:
-            continue
+    inspectable = [path for path in files if path.suffix.lower() in KIND_BY_EXT]
+    for path, info in zip(inspectable, inspect_results(inspectable, workers, file_timeout)):
         if path.suffix.lower() in PDF_EXTS:
             pdf_diagnostics.append(info)
         else:
@@ -295,6 +303,7 @@ def evaluate(input_dirs: list[str]) -> dict[str, Any]:
             "data_file_count": len(data_files),
             "readable_data_file_count": len(readable_data),
             "pdf_file_count": len(pdf_diagnostics),
+            "timed_out_file_count": sum(1 for item in data_files + pdf_diagnostics if item.get("timed_out")),
         },
         "warnings": warnings,
         "errors": errors,
@@ -310,9 +319,11 @@ def main() -> int:
     configure_utf8_stdio()
     parser = argparse.ArgumentParser(description="Diagnose MathModel input data files and write load_report.json.")
     parser.add_argument("--input-dir", action="append", dest="input_dirs", default=None, help="Input directory to scan. Can be repeated.")
+    parser.add_argument("--workers", type=int, default=1, help="Inspect files in N worker processes; 0 uses all CPUs.")
+    parser.add_argument("--file-timeout", type=float, default=None, help="Per-file time budget in seconds; slower files are marked timed_out.")
     args = parser.parse_args()
     input_dirs = args.input_dirs or ["problem_files", "crawled_data"]
-    report = evaluate(input_dirs)
+    report = evaluate(input_dirs, workers=args.workers, file_timeout=args.file_timeout)
     write_report(report)
     print(f"load report: {rel(REPORT_FILE)}")
     if report["status"] == "PASS":
@@ -0,0 +1,549 @@
+"""Artifact dependency graph and make-style executor for the workflow scripts.
+
+Each Stage names the script it runs and the project-relative files it reads
+(inputs) and writes (outputs), following docs/workflow-contracts.md. Edges are
+derived from those paths: a stage depends on every earlier stage whose outputs
+overlap its inputs or its own outputs, plus the names listed in ``after``.
+
+Before a stage runs, its script and input files are hashed (SHA-256, reused
+while size/mtime are unchanged). The stage is skipped when that digest equals
+the one recorded after its last successful run, its outputs still exist and no upstream stage rewrote
+a file it also writes. Ready stages run in parallel up to ``--jobs``. Digests
+are kept in paper_output/cache/workflow_state.json; every run writes
+paper_output/build_log.json with the status and timing of each stage.
+
+run_pipeline.py runs DATA_STAGES; quickstart_run.py runs WORKFLOW_STAGES.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+STATE_FILE = Path("paper_output/cache/workflow_state.json")
+BUILD_LOG_FILE = Path("paper_output/build_log.json")
+GENERATED_BY = "data-cleaning-and-visualization/scripts/workflow_dag.py"
+STATE_VERSION = 1
+WILDCARD = re.compile(r"[*?\[]")
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One workflow step.
+
+    script is relative to the skills directory; a "./" prefix makes it relative
+    to the project root instead. inputs/outputs are project-relative files,
+    directories (trailing "/") or glob patterns. listed_outputs names one of
+    the outputs, a JSON report whose "file" values are further files the stage
+    wrote (names not known in advance); a missing one makes the stage stale. A
+    failed required stage stops the build; any other failure prints on_failure
+    and the build continues.
+    """
+
+    name: str
+    title: str
+    script: str
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    after: tuple[str, ...] = ()
+    listed_outputs: str = ""
+    required: bool = False
+    on_failure: str = ""
+
+
+DATA_STAGES = (
+    Stage(
+        "load_report",
+        "附件读取诊断",
+        "data-cleaning-and-visualization/scripts/robust_loader.py",
+        inputs=("problem_files/", "crawled_data/"),
+        outputs=("paper_output/data_cleaned/load_report.json",),
+        required=True,
+        on_failure="❌ 附件读取诊断失败，停止执行。",
+    ),
+    Stage(
+        "data_plan",
+        "数据与图表计划",
+        "data-cleaning-and-visualization/scripts/build_data_visualization_plan.py",
+        inputs=("paper_output/step1/problem_analysis.json", "paper_output/plan/model_route.json", "problem_files/", "crawled_data/"),
+        outputs=("paper_output/plan/data_plan.json", "paper_output/plan/visualization_plan.json", "paper_output/figure_index.json"),
+        on_failure="⚠️ 数据与图表计划未成功生成，继续执行清洗与可视化。",
+    ),
+    Stage(
+        "clean",
+        "数据清洗 (Data Cleaning)",
+        "data-cleaning-and-visualization/scripts/clean_data.py",
+        inputs=("problem_files/", "crawled_data/"),
+        outputs=("paper_output/data_cleaned/",),
+        required=True,
+        on_failure="❌ 数据清洗步骤失败，停止执行。",
+    ),
+    Stage(
+        "eda",
+        "数据可视化 (Data Visualization)",
+        "data-cleaning-and-visualization/scripts/visualize_data.py",
+        inputs=("paper_output/data_cleaned/*.csv",),
+        outputs=("paper_output/figures/eda_report.json",),
+        listed_outputs="paper_output/figures/eda_report.json",
+        required=True,
+        on_failure="❌ 数据可视化步骤失败。",
+    ),
+    Stage(
+        "paper_figures",
+        "论文级图表模板 (Paper Figure Templates)",
+        "data-cleaning-and-visualization/scripts/generate_paper_figures_from_plan.py",
+        inputs=("paper_output/plan/visualization_plan.json", "paper_output/data_cleaned/*.csv"),
+        outputs=("paper_output/figure_index.json",),
+        on_failure="⚠️ 论文级图表模板未成功生成，保留基础 EDA 图表并继续。",
+    ),
+)
+
+WORKFLOW_STAGES = (
+    Stage(
+        "output_layout",
+        "输出目录规划",
+        "paper-workflow-orchestrator/scripts/prepare_output_layout.py",
+        outputs=("paper_output/OUTPUT_LAYOUT.md",),
+    ),
+    Stage(
+        "problem_analysis",
+        "赛题结构化分析",
+        "problem-doc-model-selector/scripts/analyze_problem.py",
+        inputs=("problem_files/",),
+        outputs=("paper_output/step1/problem_analysis.json", "data_requirements.json"),
+        on_failure="⚠️ 赛题结构化分析未成功执行，后续将使用通用任务模板。",
+    ),
+    Stage(
+        "model_route",
+        "模型路线与评分闭环",
+        "modeling-paper-rubric-and-model-selector/scripts/build_model_route.py",
+        inputs=("paper_output/step1/problem_analysis.json",),
+        outputs=("paper_output/plan/model_route.json", "paper_output/plan/rubric_alignment.json", "paper_output/plan/scoring_strategy.md"),
+        on_failure="⚠️ 模型路线契约未成功生成，QA 将回退到结构化题意分析。",
+    ),
+    Stage(
+        "harvest",
+        "外部资源获取 (可选)",
+        "authoritative-data-harvester/scripts/run.py",
+        inputs=("data_requirements.json",),
+    ),
+    # In the full workflow a data-stage failure (e.g. no attachments) is not fatal.
+    *(
+        replace(stage, after=("harvest",), required=False, on_failure="⚠️ 数据清洗步骤未成功执行（可能是没有数据文件），继续后续步骤...")
+        for stage in DATA_STAGES
+    ),
+    Stage(
+        "calc_results",
+        "结果计算与出图（可选自定义）",
+        "./step2_calc_results.py",
+        inputs=("paper_output/data_cleaned/*.csv",),
+        on_failure="⚠️ 结果计算脚本执行失败，但流程继续...",
+    ),
+    Stage(
+        "result_contracts",
+        "建模代码与结果证据生成",
+        "model-code-and-result-generator/scripts/build_result_contracts.py",
+        inputs=(
+            "paper_output/plan/model_route.json",
+            "paper_output/plan/data_plan.json",
+            "paper_output/plan/visualization_plan.json",
+            "paper_output/data_cleaned/*.csv",
+        ),
+        outputs=(
+            "paper_output/results/model_results.json",
+            "paper_output/results/metrics.json",
+            "paper_output/results/conclusions.json",
+            "paper_output/tables/table_index.json",
+        ),
+        after=("calc_results",),
+        on_failure="⚠️ 结果证据契约未成功生成，QA 将提示真实建模结果待补。",
+    ),
+    Stage(
+        "qa_tasks",
+        "质量审计与任务清单",
+        "quality-assurance-auditor/scripts/pipeline.py",
+        inputs=(
+            "problem_files/",
+            "paper_output/step1/problem_analysis.json",
+            "paper_output/plan/model_route.json",
+            "paper_output/plan/rubric_alignment.json",
+            "paper_output/plan/data_plan.json",
+            "paper_output/plan/visualization_plan.json",
+            "paper_output/figure_index.json",
+            "paper_output/results/model_results.json",
+            "paper_output/results/metrics.json",
+            "paper_output/results/conclusions.json",
+            "paper_output/tables/table_index.json",
+        ),
+        outputs=("paper_output/tasks.json",),
+        required=True,
+    ),
+    Stage(
+        "micro_units",
+        "微单元离线生成",
+        "paper-micro-unit-generator/scripts/generate_all_offline.py",
+        inputs=("paper_output/tasks.json", "paper_output/step2_calc_results.json", "step3_filled_placeholder.py"),
+        outputs=("paper_output/micro_units/", "paper_output/generate_log.json"),
+        required=True,
+    ),
+    Stage(
+        "merge",
+        "合并",
+        "paper-micro-unit-generator/scripts/merge.py",
+        inputs=("paper_output/tasks.json", "paper_output/micro_units/"),
+        outputs=("paper_output/final_paper.md", "paper_output/ref_check.md"),
+        required=True,
+    ),
+)
+
+
+def static_prefix(pattern: str) -> str:
+    return WILDCARD.split(pattern, 1)[0].rstrip("/")
+
+
+def overlaps(output: str, pattern: str) -> bool:
+    """True when the output path and the input/output pattern can refer to the same file."""
+    output = output.rstrip("/")
+    prefix = static_prefix(pattern)
+    return output == prefix or output.startswith(prefix + "/") or prefix.startswith(output + "/")
+
+
+def dependencies(stages: Iterable[Stage]) -> dict[str, list[str]]:
+    """Stage name -> names of earlier stages it waits for, in declaration order."""
+    stages = list(stages)
+    graph: dict[str, list[str]] = {}
+    for index, stage in enumerate(stages):
+        wanted = (*stage.inputs, *stage.outputs)
+        graph[stage.name] = [
+            earlier.name
+            for earlier in stages[:index]
+            if earlier.name in stage.after or any(overlaps(output, pattern) for output in earlier.outputs for pattern in wanted)
+        ]
+    return graph
+
+
+def shares_output(first: Stage, second: Stage) -> bool:
+    return any(overlaps(output, pattern) for output in first.outputs for pattern in second.outputs)
+
+
+def script_path(stage: Stage, root: Path) -> Path:
+    return root / stage.script[2:] if stage.script.startswith("./") else SKILLS_DIR / stage.script
+
+
+def expand(pattern: str, root: Path) -> list[Path]:
+    """Files matched by a project-relative path, directory or glob, sorted."""
+    if WILDCARD.search(pattern):
+        matches = root.glob(pattern)
+    else:
+        path = root / pattern.rstrip("/")
+        matches = path.rglob("*") if path.is_dir() else [path]
+    return sorted(path for path in matches if path.is_file() and "__pycache__" not in path.parts)
+
+
+def output_present(pattern: str, root: Path) -> bool:
+    return bool(expand(pattern, root)) if WILDCARD.search(pattern) else (root / pattern.rstrip("/")).exists()
+
+
+def listed_files(report: Path) -> list[str]:
+    """Every "file" string anywhere in a JSON report; [] when it cannot be read."""
+    try:
+        data = json.loads(report.read_text(encoding="utf-8"))
+    except Exception:
+        return []
+    found: list[str] = []
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            if isinstance(value.get("file"), str):
+                found.append(value["file"])
+            pending.extend(item for key, item in value.items() if key != "file")
+        elif isinstance(value, list):
+            pending.extend(value)
+    return found
+
+
+class InputHashes:
+    """SHA-256 per project file, reused while the file's (size, mtime_ns) is unchanged."""
+
+    def __init__(self, root: Path, entries: dict[str, Any] | None = None) -> None:
+        self.root = root
+        self.entries = dict(entries or {})
+        self.rehashed = 0
+
+    def sha256(self, path: Path) -> str:
+        key = path.as_posix()
+        stat = path.stat()
+        cached = self.entries.get(key)
+        if isinstance(cached, list) and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return str(cached[2])
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        self.entries[key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self.rehashed += 1
+        return digest.hexdigest()
+
+    def stage_digest(self, stage: Stage) -> str:
+        """Hash of the stage's script plus every input file (path and content)."""
+        digest = hashlib.sha256()
+        script = script_path(stage, self.root)
+        digest.update(f"script {stage.script} {self.sha256(script) if script.is_file() else '-'}\n".encode("utf-8"))
+        for pattern in stage.inputs:
+            files = expand(pattern, self.root)
+            digest.update(f"input {pattern} {len(files)}\n".encode("utf-8"))
+            for path in files:
+                relative = path.relative_to(self.root).as_posix()
+                digest.update(f"{relative} {self.sha256(path)}\n".encode("utf-8"))
+        return digest.hexdigest()
+
+    def prune(self) -> dict[str, Any]:
+        return {key: value for key, value in self.entries.items() if Path(key).is_file()}
+
+
+def load_state(path: Path) -> dict[str, Any]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) and state.get("version") == STATE_VERSION else {}
+
+
+def write_json(path: Path, payload: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temporary, path)
+
+
+def stale_reason(stage: Stage, digest: str, previous: dict[str, Any], root: Path, rewritten: bool, force: bool) -> str:
+    """Why the stage must run, or "" when it is up to date."""
+    if force:
+        return "forced"
+    if not previous:
+        return "no previous run"
+    if previous.get("status") != "ok":
+        return "previous run failed"
+    if previous.get("digest") != digest:
+        return "inputs changed"
+    if not all(output_present(pattern, root) for pattern in stage.outputs):
+        return "outputs missing"
+    if stage.listed_outputs and not all((root / path).exists() for path in listed_files(root / stage.listed_outputs)):
+        return "listed outputs missing"
+    if rewritten:
+        return "upstream stage rewrote a shared output"
+    return ""
+
+
+def run_script(stage: Stage, root: Path, capture: bool) -> tuple[int, str]:
+    env = os.environ.copy()
+    env.setdefault("PYTHONIOENCODING", "utf-8")
+    env.setdefault("PYTHONUTF8", "1")
+    command = [sys.executable, str(script_path(stage, root))]
+    if not capture:
+        sys.stdout.flush()
+        return subprocess.run(command, cwd=root, env=env, check=False).returncode, ""
+    result = subprocess.run(command, cwd=root, env=env, check=False, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    return result.returncode, result.stdout.decode("utf-8", errors="replace")
+
+
+def build(
+    stages: Iterable[Stage],
+    root: Path,
+    jobs: int = 1,
+    force: bool = False,
+    dry_run: bool = False,
+    state_file: Path = STATE_FILE,
+    log_file: Path = BUILD_LOG_FILE,
+) -> dict[str, Any]:
+    """Run the stale stages of the graph and return the build log (also written to log_file)."""
+    stages = list(stages)
+    by_name = {stage.name: stage for stage in stages}
+    graph = dependencies(stages)
+    root = root.resolve()
+    state_path = root / state_file
+    state = load_state(state_path)
+    history: dict[str, Any] = dict(state.get("stages") or {})
+    hashes = InputHashes(root, state.get("files"))
+    jobs = max(1, jobs)
+    capture = jobs > 1
+    print_lock = threading.Lock()
+    started = time.perf_counter()
+    records: dict[str, dict[str, Any]] = {}
+    ran: set[str] = set()
+    returncode = 0
+
+    def emit(text: str) -> None:
+        with print_lock:
+            print(text, flush=True)
+
+    def execute(stage: Stage) -> tuple[int, str, float, float]:
+        if not capture:
+            emit(f"\n=== {stage.name}: {stage.title} ===")
+        begin = time.perf_counter()
+        code, output = run_script(stage, root, capture)
+        return code, output, begin, time.perf_counter()
+
+    def record(stage: Stage, status: str, reason: str = "", **extra: Any) -> None:
+        records[stage.name] = {
+            "name": stage.name,
+            "title": stage.title,
+            "script": stage.script,
+            "depends_on": graph[stage.name],
+            "status": status,
+            "reason": reason,
+            **extra,
+        }
+
+    pending = [stage.name for stage in stages]
+    running: dict[Any, tuple[Stage, str, str]] = {}
+    stopped = False
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            progressed = True
+            while progressed and not stopped:
+                progressed = False
+                for name in list(pending):
+                    if len(running) >= jobs:
+                        break
+                    if any(dep not in records for dep in graph[name]):
+                        continue
+                    pending.remove(name)
+                    progressed = True
+                    stage = by_name[name]
+                    if not script_path(stage, root).is_file():
+                        emit(f"   未检测到 {stage.script}，跳过 {name}。")
+                        record(stage, "missing", "script not found")
+                        continue
+                    upstream = [by_name[dep] for dep in graph[name]]
+                    if dry_run:
+                        reason = stale_reason(stage, hashes.stage_digest(stage), history.get(name, {}), root, False, force)
+                        if not reason and any(dep.name in ran for dep in upstream):
+                            reason = "upstream stage will run"
+                        record(stage, "would_run" if reason else "skipped", reason or "up to date")
+                        if reason:
+                            ran.add(name)
+                        continue
+                    digest = hashes.stage_digest(stage)
+                    rewritten = any(dep.name in ran and shares_output(dep, stage) for dep in upstream)
+                    reason = stale_reason(stage, digest, history.get(name, {}), root, rewritten, force)
+                    if not reason:
+                        record(stage, "skipped", "up to date", elapsed_ms=0.0)
+                        emit(f"=== {name}: {stage.title} === 输入未变化，跳过。")
+                        continue
+                    running[pool.submit(execute, stage)] = (stage, digest, reason)
+            if not running:
+                for name in pending:
+                    record(by_name[name], "blocked", "a required stage failed")
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, digest, reason = running.pop(future)
+                code, output, begin, end = future.result()
+                if capture:
+                    emit("\n".join(filter(None, [f"\n=== {stage.name}: {stage.title} ===", output.rstrip()])))
+                status = "ok" if code == 0 else "failed"
+                record(
+                    stage,
+                    status,
+                    reason,
+                    returncode=code,
+                    started_ms=round((begin - started) * 1000, 1),
+                    elapsed_ms=round((end - begin) * 1000, 1),
+                )
+                ran.add(stage.name)
+                if code == 0:
+                    # Re-hash so a stage that creates or rewrites its own inputs is not stale next time.
+                    digest = hashes.stage_digest(stage)
+                history[stage.name] = {"digest": digest, "status": status, "finished_at": datetime.now().isoformat(timespec="seconds")}
+                if code != 0:
+                    if stage.on_failure:
+                        emit(stage.on_failure)
+                    if stage.required and not stopped:
+                        stopped = True
+                        returncode = code
+                if not dry_run:
+                    write_json(state_path, {"version": STATE_VERSION, "stages": history, "files": hashes.entries})
+            if stopped and not running:
+                for name in pending:
+                    record(by_name[name], "blocked", "a required stage failed")
+                pending = []
+
+    if not dry_run:
+        write_json(state_path, {"version": STATE_VERSION, "stages": history, "files": hashes.prune()})
+    log = {
+        "schema_version": "1.0",
+        "generated_by": GENERATED_BY,
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "jobs": jobs,
+        "force": force,
+        "dry_run": dry_run,
+        "returncode": returncode,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "files_rehashed": hashes.rehashed,
+        "stages": [records[stage.name] for stage in stages if stage.name in records],
+    }
+    if not dry_run:
+        write_json(root / log_file, log)
+    return log
+
+
+def print_summary(log: dict[str, Any]) -> None:
+    print("\n=== 构建摘要 ===")
+    for item in log["stages"]:
+        timing = f"{item['elapsed_ms'] / 1000:.1f}s" if "elapsed_ms" in item else "-"
+        print(f"   {item['name']:<18} {item['status']:<9} {timing:>7}  {item['reason']}")
+    if not log["dry_run"]:
+        print(f"   用时 {log['elapsed_ms'] / 1000:.1f}s，构建日志：{BUILD_LOG_FILE.as_posix()}")
+
+
+def print_graph(stages: Iterable[Stage]) -> None:
+    stages = list(stages)
+    graph = dependencies(stages)
+    for stage in stages:
+        print(f"{stage.name}: {stage.title}{' [required]' if stage.required else ''}")
+        print(f"   script:  {stage.script}")
+        print(f"   after:   {', '.join(graph[stage.name]) or '-'}")
+        print(f"   inputs:  {', '.join(stage.inputs) or '-'}")
+        print(f"   outputs: {', '.join(stage.outputs) or '-'}")
+
+
+def add_build_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--jobs", "-j", type=int, default=min(4, os.cpu_count() or 1), help="Stages run in parallel (default: min(4, CPU count)).")
+    parser.add_argument("--force", action="store_true", help="Rerun every stage even if its inputs are unchanged.")
+    parser.add_argument("--dry-run", action="store_true", help="Show which stages would run without running them.")
+    parser.add_argument("--list", action="store_true", help="Print the stage graph and exit.")
+
+
+def run_cli(stages: Iterable[Stage], root: Path, args: argparse.Namespace) -> int:
+    if args.list:
+        print_graph(stages)
+        return 0
+    log = build(stages, root, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    print_summary(log)
+    return int(log["returncode"])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the MathModel Skill workflow stages incrementally.")
+    add_build_arguments(parser)
+    args = parser.parse_args()
+    return run_cli(WORKFLOW_STAGES, Path.cwd(), args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
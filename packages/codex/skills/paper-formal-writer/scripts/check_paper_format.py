@@ -7,6 +7,15 @@ from typing import Any
 
 from docx import Document
 
+QA_SKILL_SCRIPTS = Path(__file__).resolve().parents[2] / "quality-assurance-auditor" / "scripts"
+if str(QA_SKILL_SCRIPTS) not in sys.path:
+    sys.path.append(str(QA_SKILL_SCRIPTS))
+
+try:
+    from contract_context import shared_context
+except ImportError:
+    shared_context = None
+
 
 BASE_DIR = Path.cwd()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -53,6 +62,13 @@ def configure_utf8_stdio() -> None:
 
 
 def load_json(path: Path) -> Any:
+    if shared_context is not None:
+        contract = shared_context(BASE_DIR).load_path(path)
+        if not contract.exists:
+            return {}
+        if contract.error is not None:
+            return {"__error__": str(contract.error)}
+        return contract.data
     if not path.exists():
         return {}
     try:
@@ -74,6 +90,10 @@ def source_path() -> Path:
     return FALLBACK_SOURCE_FILE
 
 
+def read_source(path: Path) -> str:
+    return path.read_text(encoding="utf-8")
+
+
 def compact_text(text: str) -> str:
     text = re.sub(r"!\[[^\]]*\]\([^)]+\)", "", text)
     text = re.sub(r"\[[^\]]+\]\([^)]+\)", "", text)
@@ -211,7 +231,7 @@ def evaluate() -> dict[str, Any]:
         failures.append(f"缺少正式论文源文件：{rel(SOURCE_FILE)}")
         text = ""
     else:
-        text = source.read_text(encoding="utf-8")
+        text = read_source(source)
 
     counts = char_count(text)
     target_words = outline.get("target_words", {}) if isinstance(outline, dict) else {}
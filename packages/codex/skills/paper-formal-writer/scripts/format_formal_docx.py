@@ -15,6 +15,18 @@ from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.shared import Cm, Pt, RGBColor
 
+# Shared CSV sniffer and docx-sized figure rasters from data-cleaning-and-visualization.
+DATA_SKILL_SCRIPTS = Path(__file__).resolve().parents[2] / "data-cleaning-and-visualization" / "scripts"
+if str(DATA_SKILL_SCRIPTS) not in sys.path:
+    sys.path.append(str(DATA_SKILL_SCRIPTS))
+try:
+    from csv_sniff import read_attempts
+except ImportError:
+    read_attempts = None
+try:
+    from figure_exports import docx_asset
+except ImportError:
+    docx_asset = None
 
 BASE_DIR = Path.cwd()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -194,10 +206,11 @@ def read_csv_rows(path: Path, max_rows: int = 18, max_cols: int = 8) -> list[lis
     if not path.exists():
         return []
     encodings = ("utf-8-sig", "utf-8", "gbk")
-    for encoding in encodings:
+    attempts = read_attempts(path, encodings, (",",)) if read_attempts is not None else [(encoding, ",") for encoding in encodings]
+    for encoding, sep in attempts:
         try:
             with path.open("r", encoding=encoding, newline="") as handle:
-                rows = [[str(cell) for cell in row[:max_cols]] for row in csv.reader(handle)]
+                rows = [[str(cell) for cell in row[:max_cols]] for row in csv.reader(handle, delimiter=sep)]
             return rows[:max_rows]
         except Exception:
             continue
@@ -288,11 +301,13 @@ def add_image(document: Document, path: Path, caption: str | None = None) -> boo
     paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
     paragraph.paragraph_format.first_line_indent = None
     run = paragraph.add_run()
+    # The 14.2 cm raster is a fraction of the 300-dpi master's size.
+    picture = docx_asset(path) if docx_asset else path
     try:
-        run.add_picture(str(path), width=Cm(14.2))
+        run.add_picture(str(picture), width=Cm(14.2))
     except Exception:
         try:
-            run.add_picture(str(path), width=Cm(12.8))
+            run.add_picture(str(picture), width=Cm(12.8))
         except Exception:
             add_body_paragraph(document, f"图片无法插入：{rel(path)}。")
             return False
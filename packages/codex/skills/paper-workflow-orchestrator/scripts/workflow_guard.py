@@ -7,6 +7,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+QA_SKILL_SCRIPTS = Path(__file__).resolve().parents[2] / "quality-assurance-auditor" / "scripts"
+if str(QA_SKILL_SCRIPTS) not in sys.path:
+    sys.path.append(str(QA_SKILL_SCRIPTS))
+
+try:
+    from contract_context import shared_context
+except ImportError:
+    shared_context = None
+
 
 BASE_DIR = Path.cwd().resolve()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -43,6 +52,13 @@ def rel(path: Path) -> str:
 
 
 def load_json(path: Path) -> Any:
+    if shared_context is not None:
+        contract = shared_context(BASE_DIR).load_path(path)
+        if not contract.exists:
+            return None
+        if contract.error is not None:
+            return {"__error__": f"{type(contract.error).__name__}: {contract.error}"}
+        return contract.data
     if not path.exists():
         return None
     try:
@@ -65,6 +81,8 @@ def check_json_file(path: Path, failures: list[str]) -> Any:
     if isinstance(data, dict) and data.get("__error__"):
         failures.append(f"JSON 无法读取：{rel(path)} ({data['__error__']})")
         return None
+    if shared_context is not None:
+        failures.extend(f"契约结构错误：{error}" for error in shared_context(BASE_DIR).schema_errors(path))
     return data
 
 
@@ -1,11 +1,15 @@
 import argparse
+import hashlib
 import json
 import os
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from contract_context import shared_context
+
 
 BASE_DIR = Path.cwd()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -19,6 +23,13 @@ TABLE_INDEX_FILE = OUTPUT_DIR / "tables" / "table_index.json"
 TASKS_FILE = OUTPUT_DIR / "tasks.json"
 REPORT_JSON = QA_DIR / "evidence_gate_report.json"
 REPORT_MD = QA_DIR / "evidence_gate_report.md"
+# (size, mtime_ns) -> sha256 of every provenance file, plus the stat state the last verdict was computed from;
+# keys are relative to BASE_DIR and the whole cache is dropped when the project root changes.
+VERIFY_CACHE_FILE = OUTPUT_DIR / "cache" / "evidence_gate.json"
+# The cached verdict is only valid for the checking code that produced it.
+CHECKER_FILES = tuple(Path(__file__).resolve().parent / name for name in ("evidence_gate.py", "contract_context.py", "contract_schema.py"))
+CONTRACT_FILES = (MODEL_ROUTE_FILE, FIGURE_INDEX_FILE, MODEL_RESULTS_FILE, METRICS_FILE, CONCLUSIONS_FILE, TABLE_INDEX_FILE, TASKS_FILE)
+ROLE_LABELS = {"source_code": "源代码", "helper": "辅助代码", "input": "输入数据", "output": "输出产物"}
 
 BAD_STATUSES = {
     "missing",
@@ -40,62 +51,12 @@ def configure_utf8_stdio() -> None:
 
 
 def load_json(path: Path) -> Any:
-    if not path.exists():
+    contract = shared_context(BASE_DIR).load_path(path)
+    if not contract.exists:
         return None
-    try:
-        return json.loads(path.read_text(encoding="utf-8"))
-    except Exception as exc:
-        return {"__error__": str(exc)}
-
-
-def question_ids(model_route: Any) -> list[str]:
-    questions = model_route.get("questions") if isinstance(model_route, dict) else []
-    if not isinstance(questions, list):
-        return []
-    result = []
-    for item in questions:
-        if not isinstance(item, dict):
-            continue
-        qid = str(item.get("question_id") or item.get("id") or "").strip()
-        if qid:
-            result.append(qid)
-    return sorted(set(result))
-
-
-def grouped_items(data: Any, key: str) -> dict[str, list[dict[str, Any]]]:
-    items = data.get(key) if isinstance(data, dict) else []
-    grouped: dict[str, list[dict[str, Any]]] = {}
-    if not isinstance(items, list):
-        return grouped
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        qid = str(item.get("question_id") or "").strip()
-        if qid:
-            grouped.setdefault(qid, []).append(item)
-    return grouped
-
-
-def result_items(data: Any) -> dict[str, dict[str, Any]]:
-    questions = data.get("questions") if isinstance(data, dict) else []
-    grouped: dict[str, dict[str, Any]] = {}
-    if not isinstance(questions, list):
-        return grouped
-    for item in questions:
-        if not isinstance(item, dict):
-            continue
-        qid = str(item.get("question_id") or "").strip()
-        if qid:
-            grouped[qid] = item
-    return grouped
-
-
-def figure_items(data: Any) -> dict[str, list[dict[str, Any]]]:
-    return grouped_items(data, "figures")
-
-
-def table_items(data: Any) -> dict[str, list[dict[str, Any]]]:
-    return grouped_items(data, "tables")
+    if contract.error is not None:
+        return {"__error__": str(contract.error)}
+    return contract.data
 
 
 def status_of(item: dict[str, Any] | None) -> str:
@@ -112,7 +73,76 @@ def resolve_artifact(path_text: object) -> Path:
     return BASE_DIR / path
 
 
-def provenance_failures(item: dict[str, Any]) -> list[str]:
+def cache_key(path: Path) -> str:
+    """Project-relative POSIX path, so cache entries never point into another copy of the project."""
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def stat_key(path: Path) -> list[int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class HashCache:
+    """SHA-256 per file, recomputed only when the file's (size, mtime_ns) changed."""
+
+    def __init__(self, entries: dict[str, Any] | None = None) -> None:
+        self.entries = dict(entries or {})
+        self.rehashed = 0
+        self.seen: dict[str, list[int] | None] = {}
+
+    def sha256(self, path: Path) -> str | None:
+        key = cache_key(path)
+        state = stat_key(path)
+        self.seen[key] = state
+        if state is None:
+            return None
+        cached = self.entries.get(key)
+        if isinstance(cached, dict) and [cached.get("size"), cached.get("mtime_ns")] == state:
+            return str(cached.get("sha256"))
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        self.entries[key] = {"size": state[0], "mtime_ns": state[1], "sha256": digest.hexdigest()}
+        self.rehashed += 1
+        return digest.hexdigest()
+
+
+def hash_failures(provenance: dict[str, Any], hashes: HashCache) -> list[str]:
+    """Files recorded at run time that are now missing, resized or re-hash differently."""
+    failures: list[str] = []
+    # Missing source code and outputs are already reported by the existence checks.
+    reported = {str(provenance.get("source_code_path") or ""), *map(str, provenance.get("output_artifacts", []) or [])}
+    for path_text, recorded in (provenance.get("file_hashes") or {}).items():
+        if not isinstance(recorded, dict) or not recorded.get("sha256"):
+            continue
+        label = ROLE_LABELS.get(str(recorded.get("role")), "文件")
+        path = resolve_artifact(path_text)
+        state = stat_key(path)
+        hashes.seen[cache_key(path)] = state
+        if state is None:
+            if path_text not in reported:
+                failures.append(f"{label}已不存在：{path_text}")
+        elif state[0] != recorded.get("size") or hashes.sha256(path) != recorded["sha256"]:
+            failures.append(f"{label}在运行后被修改或替换（SHA-256 不一致），结果已过期，需重新运行：{path_text}")
+    return failures
+
+
+def provenance_warnings(item: dict[str, Any]) -> list[str]:
+    provenance = item.get("execution_provenance")
+    if isinstance(provenance, dict) and not provenance.get("file_hashes"):
+        return ["execution_provenance 缺少 file_hashes（旧版脚手架生成），无法校验产物是否过期；重新运行建模脚本即可补齐"]
+    return []
+
+
+def provenance_failures(item: dict[str, Any], hashes: HashCache | None = None) -> list[str]:
     provenance = item.get("execution_provenance")
     if not isinstance(provenance, dict):
         return ["缺少 execution_provenance，无法证明结果来自实际代码运行"]
@@ -134,6 +164,12 @@ def provenance_failures(item: dict[str, Any]) -> list[str]:
         artifact_path = resolve_artifact(artifact)
         if not artifact_path.exists():
             failures.append(f"输出产物不存在：{artifact}")
+    if hashes is not None:
+        for path_text in [provenance.get("source_code_path"), *(provenance.get("output_artifacts", []) or [])]:
+            if path_text:
+                path = resolve_artifact(path_text)
+                hashes.seen[path.as_posix()] = stat_key(path)
+        failures.extend(hash_failures(provenance, hashes))
     return failures
 
 
@@ -149,55 +185,31 @@ def conclusion_text_exists(items: list[dict[str, Any]]) -> bool:
     return any(str(item.get("conclusion_text") or "").strip() for item in items)
 
 
-def task_items(data: Any) -> dict[str, list[dict[str, Any]]]:
-    grouped: dict[str, list[dict[str, Any]]] = {}
-    if not isinstance(data, list):
-        return grouped
-    for item in data:
-        if not isinstance(item, dict):
-            continue
-        qid = str(item.get("question_id") or "").strip()
-        if qid:
-            grouped.setdefault(qid, []).append(item)
-    return grouped
-
-
-def evaluate() -> dict[str, Any]:
-    model_route = load_json(MODEL_ROUTE_FILE)
-    figure_index = load_json(FIGURE_INDEX_FILE)
-    model_results = load_json(MODEL_RESULTS_FILE)
-    metrics = load_json(METRICS_FILE)
-    conclusions = load_json(CONCLUSIONS_FILE)
-    table_index = load_json(TABLE_INDEX_FILE)
-    tasks = load_json(TASKS_FILE)
-
+def evaluate(hashes: HashCache | None = None) -> dict[str, Any]:
+    contracts = shared_context(BASE_DIR)
     failures: list[str] = []
     warnings: list[str] = []
 
-    for path, data in (
-        (MODEL_ROUTE_FILE, model_route),
-        (FIGURE_INDEX_FILE, figure_index),
-        (MODEL_RESULTS_FILE, model_results),
-        (METRICS_FILE, metrics),
-        (CONCLUSIONS_FILE, conclusions),
-        (TABLE_INDEX_FILE, table_index),
-        (TASKS_FILE, tasks),
-    ):
+    for path in CONTRACT_FILES:
+        data = load_json(path)
         if data is None:
             failures.append(f"缺少证据门禁输入文件：{path.relative_to(BASE_DIR) if path.is_relative_to(BASE_DIR) else path}")
         elif isinstance(data, dict) and data.get("__error__"):
             failures.append(f"无法读取证据门禁输入文件：{path} ({data['__error__']})")
+        else:
+            failures.extend(f"契约结构错误：{error}" for error in contracts.schema_errors(path))
+            warnings.extend(f"契约表头不完整：{warning}" for warning in contracts.schema_warnings(path))
 
-    qids = question_ids(model_route)
+    qids = contracts.question_ids()
     if not qids:
         failures.append("model_route.json 中没有可追溯的 question_id，无法执行正式证据门禁。")
 
-    result_map = result_items(model_results)
-    metric_map = grouped_items(metrics, "items")
-    conclusion_map = grouped_items(conclusions, "items")
-    figure_map = figure_items(figure_index)
-    table_map = table_items(table_index)
-    task_map = task_items(tasks)
+    result_map = contracts.results_by_question()
+    metric_map = contracts.by_question("metrics")
+    conclusion_map = contracts.by_question("conclusions")
+    figure_map = contracts.by_question("figure_index")
+    table_map = contracts.by_question("table_index")
+    task_map = contracts.by_question("tasks")
 
     question_reports = []
     for qid in qids:
@@ -215,8 +227,10 @@ def evaluate() -> dict[str, Any]:
         elif status_of(result) in BAD_STATUSES:
             q_failures.append(f"模型结果状态仍不可作为正式证据：{status_of(result)}")
         else:
-            for failure in provenance_failures(result):
+            for failure in provenance_failures(result, hashes):
                 q_failures.append(f"模型结果缺少真实运行来源：{failure}")
+            for warning in provenance_warnings(result):
+                q_warnings.append(warning)
 
         if not q_metrics:
             q_failures.append("缺少 metrics.json 中的评价指标")
@@ -266,6 +280,68 @@ def evaluate() -> dict[str, Any]:
     }
 
 
+def load_verify_cache() -> dict[str, Any]:
+    data = load_json(VERIFY_CACHE_FILE)
+    return data if isinstance(data, dict) and not data.get("__error__") else {}
+
+
+def checker_fingerprint() -> str:
+    digest = hashlib.sha256()
+    for path in CHECKER_FILES:
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b"missing")
+        digest.update(path.name.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def current_state(keys: Any) -> dict[str, list[int] | None]:
+    return {key: stat_key(BASE_DIR / key) for key in keys}
+
+
+def save_verify_cache(hashes: HashCache, report: dict[str, Any]) -> dict[str, list[int] | None]:
+    """Store the verdict with the stat state it was computed from; returns that state."""
+    state = {**current_state(cache_key(path) for path in CONTRACT_FILES), **hashes.seen}
+    try:
+        VERIFY_CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = VERIFY_CACHE_FILE.with_name(f".{VERIFY_CACHE_FILE.name}.{os.getpid()}.tmp")
+        payload = {"schema_version": "1.0", "root": BASE_DIR.resolve().as_posix(), "checker": checker_fingerprint(), "files": hashes.entries, "state": state, "report": report}
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, VERIFY_CACHE_FILE)
+    except OSError:
+        pass
+    return state
+
+
+def verify(rehash: bool = False) -> dict[str, Any]:
+    """evaluate() with incremental re-verification.
+
+    The previous verdict is reused as-is while the checking code is unchanged
+    (checker_fingerprint) and none of the contract files or provenance files
+    it looked at changed (size, mtime). Otherwise only files whose stat
+    changed are re-hashed.
+    """
+    started = time.perf_counter()
+    cache = {} if rehash else load_verify_cache()
+    if cache.get("root") != BASE_DIR.resolve().as_posix():
+        # Written for another copy of the project (or by an older gate): nothing in it applies here.
+        cache = {}
+    state = cache.get("state")
+    report = cache.get("report")
+    fresh = cache.get("checker") == checker_fingerprint()
+    if fresh and isinstance(state, dict) and isinstance(report, dict) and state and current_state(state) == state:
+        report = {**report, "generated_at": datetime.now().isoformat(timespec="seconds")}
+        report["verification"] = {"reused": True, "rehashed": 0, "tracked_files": len(state), "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+        return report
+
+    hashes = HashCache(cache.get("files"))
+    report = evaluate(hashes)
+    state = save_verify_cache(hashes, report)
+    report["verification"] = {"reused": False, "rehashed": hashes.rehashed, "tracked_files": len(state), "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}
+    return report
+
+
 def write_reports(report: dict[str, Any], mode: str) -> None:
     QA_DIR.mkdir(parents=True, exist_ok=True)
     REPORT_JSON.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -276,8 +352,14 @@ def write_reports(report: dict[str, Any], mode: str) -> None:
         f"- Mode: `{mode}`",
         f"- Status: `{report['status']}`",
         f"- Generated at: `{report['generated_at']}`",
-        "",
     ]
+    verification = report.get("verification") or {}
+    if verification:
+        lines.append(
+            f"- Verification: reused={verification.get('reused')}, rehashed={verification.get('rehashed')}, "
+            f"tracked_files={verification.get('tracked_files')}, elapsed_ms={verification.get('elapsed_ms')}"
+        )
+    lines.append("")
     if report["failures"]:
         lines.append("## Failures")
         lines.extend(f"- {item}" for item in report["failures"])
@@ -305,9 +387,10 @@ def main() -> int:
         default=os.environ.get("MATHMODEL_EVIDENCE_GATE_MODE", "official"),
         help="official returns non-zero on missing evidence; quickstart only warns.",
     )
+    parser.add_argument("--rehash", action="store_true", help="Ignore the verification cache and re-hash every provenance file.")
     args = parser.parse_args()
 
-    report = evaluate()
+    report = verify(args.rehash)
     write_reports(report, args.mode)
 
     print(f"证据门禁报告：{REPORT_MD}")
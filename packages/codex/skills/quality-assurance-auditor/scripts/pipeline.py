@@ -3,6 +3,8 @@ import os
 import sys
 from pathlib import Path
 
+from contract_context import shared_context
+
 
 BASE_DIR = Path.cwd()
 PROBLEM_DIR = BASE_DIR / "problem_files"
@@ -35,60 +37,25 @@ def has_problem_files() -> bool:
 
 
 def load_existing_tasks() -> list[dict] | None:
-    if not TASKS_FILE.exists():
-        return None
-    try:
-        tasks = json.loads(TASKS_FILE.read_text(encoding="utf-8"))
-        return tasks if isinstance(tasks, list) else None
-    except Exception:
-        return None
+    contract = shared_context(BASE_DIR).load_path(TASKS_FILE)
+    return contract.data if contract.ok and isinstance(contract.data, list) else None
 
 
 def load_problem_analysis() -> dict | None:
-    if not PROBLEM_ANALYSIS_FILE.exists():
-        return None
-    try:
-        data = json.loads(PROBLEM_ANALYSIS_FILE.read_text(encoding="utf-8"))
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
+    return load_json_contract(PROBLEM_ANALYSIS_FILE)
 
 
 def load_model_route() -> dict | None:
-    if not MODEL_ROUTE_FILE.exists():
-        return None
-    try:
-        data = json.loads(MODEL_ROUTE_FILE.read_text(encoding="utf-8"))
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
+    return load_json_contract(MODEL_ROUTE_FILE)
 
 
 def load_rubric_alignment() -> dict | None:
-    if not RUBRIC_ALIGNMENT_FILE.exists():
-        return None
-    try:
-        data = json.loads(RUBRIC_ALIGNMENT_FILE.read_text(encoding="utf-8"))
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
+    return load_json_contract(RUBRIC_ALIGNMENT_FILE)
 
 
 def load_json_contract(path: Path) -> dict | None:
-    if not path.exists():
-        return None
-    try:
-        data = json.loads(path.read_text(encoding="utf-8"))
-        return data if isinstance(data, dict) else None
-    except Exception:
-        return None
-
-
-def is_relative_path(value: object) -> bool:
-    text = str(value or "").strip()
-    if not text:
-        return True
-    return not Path(text).is_absolute()
+    contract = shared_context(BASE_DIR).load_path(path)
+    return contract.data if contract.ok and isinstance(contract.data, dict) else None
 
 
 def figures_by_question(visualization_plan: dict | None) -> dict[str, list[dict]]:
@@ -107,13 +74,6 @@ def figures_by_question(visualization_plan: dict | None) -> dict[str, list[dict]
     return grouped
 
 
-def question_ids_from_route(model_route: dict | None) -> set[str]:
-    questions = model_route.get("questions") if isinstance(model_route, dict) else []
-    if not isinstance(questions, list):
-        return set()
-    return {str(item.get("question_id") or item.get("id")).strip() for item in questions if isinstance(item, dict) and (item.get("question_id") or item.get("id"))}
-
-
 def group_items_by_question(items: object) -> dict[str, list[dict]]:
     grouped: dict[str, list[dict]] = {}
     if not isinstance(items, list):
@@ -277,8 +237,8 @@ def refresh_existing_task_evidence(tasks: list[dict], result_evidence: dict[str,
 
 def check_evidence_contracts() -> list[str]:
     warnings: list[str] = []
-    model_route = load_model_route()
-    route_qids = question_ids_from_route(model_route)
+    contracts = shared_context(BASE_DIR)
+    route_qids = set(contracts.question_ids())
     data_plan = load_json_contract(DATA_PLAN_FILE)
     visualization_plan = load_json_contract(VISUALIZATION_PLAN_FILE)
     figure_index = load_json_contract(FIGURE_INDEX_FILE)
@@ -287,95 +247,29 @@ def check_evidence_contracts() -> list[str]:
     conclusions = load_json_contract(CONCLUSIONS_FILE)
     table_index = load_json_contract(TABLE_INDEX_FILE)
 
-    if data_plan is None:
-        warnings.append(f"缺少数据处理计划：{DATA_PLAN_FILE}")
-    else:
-        data_files = data_plan.get("data_files")
-        if not isinstance(data_files, list):
-            warnings.append("data_plan.json 中没有 data_files[]")
-        else:
-            for item in data_files:
-                if not isinstance(item, dict):
-                    continue
-                for key in ("path", "cleaned_output"):
-                    if not is_relative_path(item.get(key)):
-                        warnings.append(f"data_plan.json 的 {key} 必须是相对路径：{item.get(key)}")
-
-    if visualization_plan is None:
-        warnings.append(f"缺少图表规划：{VISUALIZATION_PLAN_FILE}")
-    else:
-        figures = visualization_plan.get("figures")
-        if not isinstance(figures, list) or not figures:
-            warnings.append("visualization_plan.json 中没有 figures[]")
-        else:
-            for figure in figures:
-                if not isinstance(figure, dict):
-                    continue
-                if not str(figure.get("figure_id") or "").strip():
-                    warnings.append("visualization_plan.json 中存在缺少 figure_id 的图表")
-                if not str(figure.get("output_path") or "").strip():
-                    warnings.append(f"{figure.get('figure_id', '<unknown>')} 缺少 output_path")
-                if not is_relative_path(figure.get("output_path")):
-                    warnings.append(f"visualization_plan.json 的 output_path 必须是相对路径：{figure.get('output_path')}")
-                if not is_relative_path(figure.get("data_source")):
-                    warnings.append(f"visualization_plan.json 的 data_source 必须是相对路径：{figure.get('data_source')}")
-
-    if figure_index is None:
-        warnings.append(f"缺少图表索引：{FIGURE_INDEX_FILE}")
-    else:
-        figures = figure_index.get("figures")
-        if not isinstance(figures, list):
-            warnings.append("figure_index.json 中没有 figures[]")
-        else:
-            for figure in figures:
-                if isinstance(figure, dict) and not is_relative_path(figure.get("path")):
-                    warnings.append(f"figure_index.json 的 path 必须是相对路径：{figure.get('path')}")
-
-    result_map = model_results_by_question(model_results)
-    metric_map = metrics_by_question(metrics)
-    conclusion_map = conclusions_by_question(conclusions)
-    table_map = tables_by_question(table_index)
-
-    if model_results is None:
-        warnings.append(f"缺少模型结果契约：{MODEL_RESULTS_FILE}")
-    elif route_qids:
-        for qid in result_map:
-            if qid not in route_qids:
-                warnings.append(f"model_results.json 引用了不存在的 question_id：{qid}")
-
-    if metrics is None:
-        warnings.append(f"缺少评价指标契约：{METRICS_FILE}")
-    elif route_qids:
-        for qid in metric_map:
-            if qid not in route_qids:
-                warnings.append(f"metrics.json 引用了不存在的 question_id：{qid}")
-
-    if conclusions is None:
-        warnings.append(f"缺少结论契约：{CONCLUSIONS_FILE}")
-    elif route_qids:
-        for qid in conclusion_map:
-            if qid not in route_qids:
-                warnings.append(f"conclusions.json 引用了不存在的 question_id：{qid}")
-
-    if table_index is None:
-        warnings.append(f"缺少表格索引契约：{TABLE_INDEX_FILE}")
-    else:
-        tables = table_index.get("tables")
-        if not isinstance(tables, list):
-            warnings.append("table_index.json 中没有 tables[]")
+    for name, path, data, missing in (
+        ("data_plan", DATA_PLAN_FILE, data_plan, "缺少数据处理计划"),
+        ("visualization_plan", VISUALIZATION_PLAN_FILE, visualization_plan, "缺少图表规划"),
+        ("figure_index", FIGURE_INDEX_FILE, figure_index, "缺少图表索引"),
+        ("model_results", MODEL_RESULTS_FILE, model_results, "缺少模型结果契约"),
+        ("metrics", METRICS_FILE, metrics, "缺少评价指标契约"),
+        ("conclusions", CONCLUSIONS_FILE, conclusions, "缺少结论契约"),
+        ("table_index", TABLE_INDEX_FILE, table_index, "缺少表格索引契约"),
+    ):
+        if data is None:
+            warnings.append(f"{missing}：{path}")
         else:
-            for table in tables:
-                if not isinstance(table, dict):
-                    continue
-                path = table.get("path")
-                if not is_relative_path(path):
-                    warnings.append(f"table_index.json 的 path 必须是相对路径：{path}")
-                qid = str(table.get("question_id") or "").strip()
-                if route_qids and qid and qid != "ALL" and qid not in route_qids:
-                    warnings.append(f"table_index.json 引用了不存在的 question_id：{qid}")
+            warnings.extend(f"契约结构错误：{error}" for error in contracts.errors(name))
+            warnings.extend(f"契约表头不完整：{warning}" for warning in contracts.warnings(name))
+    if visualization_plan is not None and visualization_plan.get("figures") == []:
+        warnings.append("visualization_plan.json 中没有 figures[]")
 
     if route_qids:
-        figure_map = figures_by_question(visualization_plan)
+        for name, path in (("model_results", MODEL_RESULTS_FILE), ("metrics", METRICS_FILE), ("conclusions", CONCLUSIONS_FILE), ("table_index", TABLE_INDEX_FILE)):
+            for qid in contracts.by_question(name):
+                if qid not in route_qids and not (name == "table_index" and qid == "ALL"):
+                    warnings.append(f"{path.name} 引用了不存在的 question_id：{qid}")
+        figure_map = contracts.by_question("visualization_plan")
         result_evidence = build_result_evidence(model_results, metrics, conclusions, table_index)
         for qid in sorted(route_qids):
             evidence = result_evidence.get(qid, {})
@@ -0,0 +1,144 @@
+"""Run every QA gate in one process over one shared ContractContext.
+
+Order: evidence gate, contract warnings (pipeline.check_evidence_contracts),
+paper format gate (skipped when python-docx is missing), then workflow_guard
+up to --step, so S6/S8 read the reports written earlier in the same run.
+Each gate still writes its usual report; the combined verdict goes to
+paper_output/qa/qa_all_report.json.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import evidence_gate
+import pipeline
+from contract_context import shared_context
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.append(str(SKILLS_DIR / "paper-workflow-orchestrator" / "scripts"))
+sys.path.append(str(SKILLS_DIR / "paper-formal-writer" / "scripts"))
+
+import workflow_guard
+
+try:
+    import check_paper_format
+except ImportError:  # python-docx missing
+    check_paper_format = None
+
+BASE_DIR = Path.cwd()
+OUTPUT_DIR = BASE_DIR / "paper_output"
+REPORT_JSON = OUTPUT_DIR / "qa" / "qa_all_report.json"
+
+
+def configure_utf8_stdio() -> None:
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.reconfigure(encoding="utf-8")
+        except Exception:
+            pass
+
+
+def run_evidence(mode: str) -> dict[str, Any]:
+    report = evidence_gate.verify()
+    evidence_gate.write_reports(report, mode)
+    return report
+
+
+def run_contracts() -> dict[str, Any]:
+    return {"status": "PASS", "failures": [], "warnings": pipeline.check_evidence_contracts()}
+
+
+def run_format() -> dict[str, Any]:
+    report = check_paper_format.evaluate()
+    check_paper_format.write_reports(report)
+    return report
+
+
+def run_guard(step: str) -> dict[str, Any]:
+    report = workflow_guard.evaluate(step)
+    workflow_guard.write_reports(report)
+    return report
+
+
+def run_all(step: str = "S8", mode: str = "official") -> dict[str, Any]:
+    gates: list[tuple[str, Callable[[], dict[str, Any]], tuple[Path, ...]]] = [
+        ("evidence_gate", lambda: run_evidence(mode), (evidence_gate.REPORT_JSON,)),
+        ("contract_warnings", run_contracts, ()),
+    ]
+    if check_paper_format is not None:
+        gates.append(("paper_format", run_format, (check_paper_format.REPORT_JSON,)))
+    gates.append((f"workflow_guard:{step}", lambda: run_guard(step), ()))
+
+    contracts = shared_context(BASE_DIR)
+    results: list[dict[str, Any]] = []
+    for name, check, writes in gates:
+        started = time.perf_counter()
+        report = check()
+        for path in writes:
+            contracts.forget(path)
+        results.append(
+            {
+                "gate": name,
+                "status": report.get("status", "FAIL"),
+                "failures": [str(item) for item in report.get("failures", [])],
+                "warning_count": len(report.get("warnings", []) or []),
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+        )
+    if check_paper_format is None:
+        results.append({"gate": "paper_format", "status": "SKIPPED", "failures": [], "warning_count": 0, "elapsed_ms": 0.0})
+
+    blocking = [item for item in results if item["status"] == "FAIL" and not (mode == "quickstart" and item["gate"] == "evidence_gate")]
+    return {
+        "schema_version": "1.0",
+        "generated_by": "quality-assurance-auditor/scripts/qa_all.py",
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "mode": mode,
+        "step": step,
+        "status": "FAIL" if blocking else "PASS",
+        "gates": results,
+        "contracts": contracts.stats(),
+    }
+
+
+def write_report(report: dict[str, Any]) -> None:
+    REPORT_JSON.parent.mkdir(parents=True, exist_ok=True)
+    tmp = REPORT_JSON.with_name(f".{REPORT_JSON.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, REPORT_JSON)
+
+
+def main() -> int:
+    configure_utf8_stdio()
+    parser = argparse.ArgumentParser(description="Run the evidence, contract, format and workflow gates in one process.")
+    parser.add_argument("--step", choices=workflow_guard.STEP_ORDER, default="S8", help="Check workflow_guard requirements up to this step.")
+    parser.add_argument(
+        "--mode",
+        choices=("official", "quickstart"),
+        default=os.environ.get("MATHMODEL_EVIDENCE_GATE_MODE", "official"),
+        help="quickstart reports evidence gate failures without failing the run.",
+    )
+    args = parser.parse_args()
+
+    report = run_all(args.step, args.mode)
+    write_report(report)
+    for item in report["gates"]:
+        print(f"[{item['status']}] {item['gate']} ({item['elapsed_ms']} ms, failures={len(item['failures'])}, warnings={item['warning_count']})")
+        for failure in item["failures"][:5]:
+            print(f"   - {failure}")
+    stats = report["contracts"]
+    print(f"contracts: {stats['files']} files parsed {stats['parsed']} times for {stats['requests']} reads")
+    print(f"QA 汇总报告：{REPORT_JSON.relative_to(BASE_DIR).as_posix()}")
+    return 0 if report["status"] == "PASS" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
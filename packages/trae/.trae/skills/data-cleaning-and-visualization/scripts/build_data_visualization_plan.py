@@ -5,6 +5,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+from csv_sniff import read_attempts
+from data_profile import profile_path
+
 
 BASE_DIR = Path.cwd().resolve()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -73,17 +76,19 @@ def read_with_pandas(path: Path) -> tuple[Any | None, str]:
     suffix = path.suffix.lower()
     try:
         if suffix == ".csv":
-            for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
+            for encoding, sep in read_attempts(path, ("utf-8-sig", "utf-8", "gbk", "gb18030"), (",",)):
                 try:
-                    return pd.read_csv(path, nrows=500, encoding=encoding), ""
-                except UnicodeDecodeError:
+                    return pd.read_csv(path, nrows=500, encoding=encoding, sep=sep), ""
+                except (UnicodeDecodeError, pd.errors.ParserError):
                     continue
             return pd.read_csv(path, nrows=500), ""
         if suffix == ".txt":
-            try:
-                return pd.read_csv(path, nrows=500, sep=None, engine="python"), ""
-            except Exception:
-                return pd.read_csv(path, nrows=500, sep="\t"), ""
+            for encoding, sep in read_attempts(path, ("utf-8",)):
+                try:
+                    return pd.read_csv(path, nrows=500, encoding=encoding, sep=sep, engine="python" if sep is None else "c"), ""
+                except Exception:
+                    continue
+            return pd.read_csv(path, nrows=500, sep="\t"), ""
         if suffix in {".xlsx", ".xls"}:
             return pd.read_excel(path, nrows=500), ""
     except Exception as exc:
@@ -94,15 +99,15 @@ def read_with_pandas(path: Path) -> tuple[Any | None, str]:
 def fallback_columns(path: Path) -> list[str]:
     if path.suffix.lower() not in {".csv", ".txt"}:
         return []
-    for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
+    for encoding, sep in read_attempts(path, ("utf-8-sig", "utf-8", "gbk", "gb18030")):
         try:
             with path.open("r", encoding=encoding, errors="ignore", newline="") as handle:
                 sample = handle.read(4096)
                 if not sample.strip():
                     return []
-                dialect = csv.Sniffer().sniff(sample)
+                dialect = csv.Sniffer().sniff(sample) if sep is None else None
                 handle.seek(0)
-                reader = csv.reader(handle, dialect)
+                reader = csv.reader(handle, dialect) if dialect else csv.reader(handle, delimiter=sep)
                 return [str(col).strip() for col in next(reader, []) if str(col).strip()]
         except Exception:
             continue
@@ -148,6 +153,24 @@ def profile_data_file(path: Path) -> dict[str, Any]:
         "cleaning_tasks": ["缺失值检查", "字段类型转换", "异常值检查", "重复记录检查"],
     }
 
+    try:
+        stats = profile_path(path)
+    except Exception:
+        stats = None
+    if stats is not None and stats.get("columns"):
+        profile.update(
+            {
+                "readable": True,
+                "rows_sampled": int(stats.get("rows") or 0),
+                "columns": [str(item["name"]) for item in stats["columns"]],
+                "numeric_columns": list(stats.get("numeric_columns") or []),
+                "categorical_columns": list(stats.get("categorical_columns") or []),
+                "datetime_columns": list(stats.get("datetime_columns") or []),
+                "profile": "paper_output/cache/data_profile.json",
+            }
+        )
+        return profile
+
     df, error = read_with_pandas(path)
     if df is not None:
         columns = [str(col) for col in df.columns]
@@ -290,11 +313,14 @@ def choose_x_column(dataset: dict[str, Any] | None) -> str:
         return ""
     columns = [str(col) for col in dataset.get("columns", [])]
     categorical = [str(col) for col in dataset.get("categorical_columns", [])]
+    datetimes = [str(col) for col in dataset.get("datetime_columns", [])]
     patterns = ("year", "date", "time", "month", "day", "年份", "年度", "日期", "时间", "月份")
     for column in columns:
         lower = column.lower()
         if any(pattern in lower or pattern in column for pattern in patterns):
             return column
+    if datetimes:
+        return datetimes[0]
     if categorical:
         return categorical[0]
     return columns[0] if columns else ""
@@ -1,10 +1,17 @@
+import argparse
 import pandas as pd
 import numpy as np
+from functools import partial
 from pathlib import Path
 
+from parallel_files import map_files
+
 SEARCH_DIRS = ["problem_files", "crawled_data"]
 OUTPUT_DIR = Path("paper_output/data_cleaned")
 FILE_EXTENSIONS = ["*.csv", "*.xlsx", "*.xls", "*.txt"]
+STREAM_SUFFIXES = ['.csv', '.txt']
+STREAM_THRESHOLD_MB = 512
+DEFAULT_CHUNKSIZE = 200_000
 
 def find_data_files():
     found_files = []
@@ -26,35 +33,37 @@ def find_data_files():
     
     return sorted(list(set(found_files)), key=str)
 
-def clean_dataset(file_path: Path):
+def read_csv_compat(file_path: Path, **kwargs):
+    try:
+        return pd.read_csv(file_path, on_bad_lines='skip', **kwargs)
+    except TypeError:
+        return pd.read_csv(file_path, error_bad_lines=False, **kwargs)
+
+def clean_dataset(file_path: Path, stream: bool = False, chunksize: int = DEFAULT_CHUNKSIZE, stream_threshold_mb: float = STREAM_THRESHOLD_MB):
     print(f"🔄 正在处理: {file_path.name} ...")
-    
+
+    if file_path.suffix in STREAM_SUFFIXES and (stream or file_path.stat().st_size > stream_threshold_mb * 1024 * 1024):
+        try:
+            if clean_dataset_streaming(file_path, chunksize):
+                return
+        except Exception as e:
+            print(f"❌ 处理 {file_path.name} 时出错: {str(e)}")
+            return
+
     try:
         try:
             if file_path.suffix == '.csv':
                 try:
-                    try:
-                        df = pd.read_csv(file_path, encoding='utf-8', on_bad_lines='skip')
-                    except TypeError:
-                        df = pd.read_csv(file_path, encoding='utf-8', error_bad_lines=False)
+                    df = read_csv_compat(file_path, encoding='utf-8')
                 except UnicodeDecodeError:
-                    try:
-                        df = pd.read_csv(file_path, encoding='gbk', on_bad_lines='skip')
-                    except TypeError:
-                        df = pd.read_csv(file_path, encoding='gbk', error_bad_lines=False)
+                    df = read_csv_compat(file_path, encoding='gbk')
             elif file_path.suffix in ['.xlsx', '.xls']:
                 df = pd.read_excel(file_path)
             elif file_path.suffix == '.txt':
                 try:
-                    try:
-                        df = pd.read_csv(file_path, sep=',', on_bad_lines='skip')
-                    except TypeError:
-                        df = pd.read_csv(file_path, sep=',', error_bad_lines=False)
+                    df = read_csv_compat(file_path, sep=',')
                 except:
-                    try:
-                        df = pd.read_csv(file_path, sep='\t', on_bad_lines='skip')
-                    except TypeError:
-                        df = pd.read_csv(file_path, sep='\t', error_bad_lines=False)
+                    df = read_csv_compat(file_path, sep='\t')
             else:
                 print(f"⚠️ 不支持的文件格式: {file_path.suffix}")
                 return
@@ -103,7 +112,197 @@ def clean_dataset(file_path: Path):
     except Exception as e:
         print(f"❌ 处理 {file_path.name} 时出错: {str(e)}")
 
+class RowHashSet:
+    """Seen-row hashes stored as sorted uint64 runs, about 8 bytes per distinct row.
+
+    Runs are merged like a binary counter, so there are O(log n) runs to probe.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def keep_new(self, hashes: np.ndarray) -> np.ndarray:
+        """Mask of rows whose hash is seen for the first time, then remember them."""
+        unique, first = np.unique(hashes, return_index=True)
+        fresh = np.ones(len(unique), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, unique), len(run) - 1)
+            fresh &= run[pos] != unique
+        keep = np.zeros(len(hashes), dtype=bool)
+        keep[first[fresh]] = True
+        if fresh.any():
+            self.runs.append(unique[fresh])
+            while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+                last = self.runs.pop()
+                self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+        return keep
+
+def stream_read_attempts(file_path: Path):
+    """Same reader fallbacks as the in-memory path: utf-8 -> gbk for CSV, ',' -> tab for TXT."""
+    if file_path.suffix == '.csv':
+        return [{'encoding': 'utf-8'}, {'encoding': 'gbk'}]
+    return [{'sep': ','}, {'sep': '\t'}]
+
+def value_class(series: pd.Series) -> str:
+    if series.dtype.kind in 'iuf':
+        return 'numeric'
+    if series.dtype.kind == 'b' or pd.api.types.infer_dtype(series, skipna=True) == 'boolean':
+        return 'bool'
+    return 'text'
+
+def scan_column_stats(file_path: Path, options: dict, chunksize: int):
+    """Pass 1: per-column value-class votes, null counts and numeric sums."""
+    # Whole-file text columns are 'object' before pandas 3 and 'str' after; only
+    # 'object' columns go through the to_numeric vote in the in-memory path.
+    text_votes = pd.Series(["a"]).dtype == 'object'
+    stats = None
+    raw_rows = 0
+    rows = 0
+    for chunk in read_csv_compat(file_path, chunksize=chunksize, **options):
+        if stats is None:
+            stats = {
+                col: {'classes': set(), 'dtypes': [], 'raw_null': 0, 'nonnull': 0, 'valid': 0, 'total': 0.0, 'coerce_failed': False}
+                for col in chunk.columns
+            }
+        raw_rows += len(chunk)
+        for col, item in stats.items():
+            item['raw_null'] += int(chunk[col].isna().sum())
+        chunk = chunk.dropna(how='all', axis=0)
+        rows += len(chunk)
+        for col, item in stats.items():
+            series = chunk[col]
+            nonnull = int(series.notna().sum())
+            if nonnull == 0:
+                continue
+            item['nonnull'] += nonnull
+            kind = value_class(series)
+            item['classes'].add(kind)
+            if kind == 'numeric':
+                item['dtypes'].append(series.dtype)
+                numeric = series
+            elif kind == 'bool' or text_votes:
+                try:
+                    numeric = pd.to_numeric(series, errors='coerce')
+                except:
+                    item['coerce_failed'] = True
+                    continue
+            else:
+                continue
+            item['valid'] += int(numeric.notna().sum())
+            item['total'] += float(numeric.sum())
+    return stats, raw_rows, rows, text_votes
+
+def plan_columns(stats: dict, rows: int, text_votes: bool):
+    """Replay the in-memory decisions (drop empty columns, to_numeric vote, mean/mode fill) from pass-1 stats."""
+    plan = {}
+    for col, item in stats.items():
+        if item['nonnull'] == 0:
+            continue
+        missing = rows - item['nonnull']
+        classes = item['classes']
+        if classes == {'numeric'}:
+            dtype = np.result_type(*item['dtypes'])
+            if item['raw_null'] and dtype.kind in 'iu':
+                dtype = np.dtype('float64')
+            fill = item['total'] / item['nonnull'] if missing else None
+            plan[col] = {'kind': 'numeric', 'dtype': dtype, 'fill': fill}
+            continue
+        votes = classes == {'bool'} and item['raw_null'] > 0 or text_votes
+        if classes == {'bool'} and not missing:
+            # bool without gaps stays bool; with blanks only in dropped rows the vote turns it back into bool.
+            plan[col] = {'kind': 'bool', 'dtype': str, 'fill': None}
+        elif votes and not item['coerce_failed'] and (rows - item['valid']) / rows < 0.5:
+            kind = 'coerced_bool' if classes == {'bool'} else 'coerced'
+            plan[col] = {'kind': kind, 'dtype': str, 'fill': item['total'] / item['valid']}
+        else:
+            plan[col] = {'kind': 'text', 'dtype': str, 'fill': 'mode' if missing else None}
+    return plan
+
+def to_bool(series: pd.Series) -> pd.Series:
+    return series.str.lower().map({'true': True, 'false': False})
+
+def column_modes(file_path: Path, options: dict, chunksize: int, columns: list):
+    """Extra narrow pass over text columns with gaps only; memory is bounded by their distinct values."""
+    counts = {col: {} for col in columns}
+    reader = read_csv_compat(file_path, chunksize=chunksize, usecols=columns, dtype={col: str for col in columns}, **options)
+    for chunk in reader:
+        for col in columns:
+            col_counts = counts[col]
+            for value, count in chunk[col].value_counts().items():
+                col_counts[value] = col_counts.get(value, 0) + int(count)
+    modes = {}
+    for col, col_counts in counts.items():
+        if col_counts:
+            best = max(col_counts.values())
+            modes[col] = min(value for value, count in col_counts.items() if count == best)
+        else:
+            modes[col] = "Unknown"
+    return modes
+
+def clean_dataset_streaming(file_path: Path, chunksize: int = DEFAULT_CHUNKSIZE):
+    """Two-pass chunked cleaning for CSV/TXT files larger than memory.
+
+    Pass 1 gathers column statistics, pass 2 imputes, drops duplicate rows by
+    64-bit row hash and appends each chunk to the output. Returns False when
+    the file has no data rows, leaving it to the in-memory path.
+    """
+    attempts = stream_read_attempts(file_path)
+    for index, options in enumerate(attempts):
+        try:
+            stats, raw_rows, rows, text_votes = scan_column_stats(file_path, options, chunksize)
+            break
+        except Exception as read_err:
+            last_attempt = index == len(attempts) - 1
+            if last_attempt or (file_path.suffix == '.csv' and not isinstance(read_err, UnicodeDecodeError)):
+                raise
+    if stats is None or rows == 0:
+        return False
+
+    print(f"   分块流式清洗: 每块 {chunksize} 行")
+    plan = plan_columns(stats, rows, text_votes)
+    mode_columns = [col for col, spec in plan.items() if spec['fill'] == 'mode']
+    if mode_columns:
+        modes = column_modes(file_path, options, chunksize, mode_columns)
+        for col in mode_columns:
+            plan[col]['fill'] = modes[col]
+
+    output_file = OUTPUT_DIR / f"{file_path.stem}_cleaned.csv"
+    columns = list(plan)
+    seen = RowHashSet()
+    kept_rows = 0
+    with open(output_file, 'w', encoding='utf-8-sig', newline='') as handle:
+        header = True
+        dtypes = {col: spec['dtype'] for col, spec in plan.items()}
+        for chunk in read_csv_compat(file_path, chunksize=chunksize, dtype=dtypes, **options):
+            chunk = chunk.dropna(how='all', axis=0)[columns]
+            for col, spec in plan.items():
+                if spec['kind'] == 'coerced':
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float64')
+                elif spec['kind'] == 'bool':
+                    chunk[col] = to_bool(chunk[col]).astype(bool)
+                elif spec['kind'] == 'coerced_bool':
+                    chunk[col] = to_bool(chunk[col]).astype('float64')
+                if spec['fill'] is not None:
+                    chunk[col] = chunk[col].fillna(spec['fill'])
+            hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+            chunk = chunk[seen.keep_new(hashes)]
+            chunk.to_csv(handle, index=False, header=header)
+            header = False
+            kept_rows += len(chunk)
+
+    print(f"✅ 清洗完成: {file_path.name} | 原尺寸 {(raw_rows, len(stats))} -> 新尺寸 {(kept_rows, len(columns))}")
+    print(f"💾 已保存至: {output_file}")
+    return True
+
 def main():
+    parser = argparse.ArgumentParser(description="Clean data files from problem_files/ and crawled_data/ into paper_output/data_cleaned/.")
+    parser.add_argument("--stream", action="store_true", help="Force chunked streaming mode for CSV/TXT files.")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Rows per chunk in streaming mode.")
+    parser.add_argument("--stream-threshold-mb", type=float, default=STREAM_THRESHOLD_MB, help="CSV/TXT files larger than this stream automatically.")
+    parser.add_argument("--workers", type=int, default=1, help="Clean files in N worker processes; 0 uses all CPUs.")
+    parser.add_argument("--file-timeout", type=float, default=None, help="Per-file time budget in seconds; slower files are skipped.")
+    args = parser.parse_args()
+
     if not OUTPUT_DIR.exists():
         OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
         
@@ -116,8 +315,15 @@ def main():
     
     print(f"📄 找到 {len(files)} 个文件。")
     
-    for f in files:
-        clean_dataset(f)
+    clean = partial(clean_dataset, stream=args.stream, chunksize=args.chunksize, stream_threshold_mb=args.stream_threshold_mb)
+    results = map_files(clean, files, args.workers, args.file_timeout)
+    for f, (status, value) in zip(files, results):
+        if status == "timeout":
+            # A killed worker may have left a half-written CSV behind.
+            (OUTPUT_DIR / f"{f.stem}_cleaned.csv").unlink(missing_ok=True)
+            print(f"⏱️ {f.name} 超过 {args.file_timeout:g} 秒时限，已跳过。")
+        elif status == "error":
+            print(f"❌ 处理 {f.name} 时出错: {value}")
         
     print("\n✨ 所有数据清洗任务已完成。")
 
@@ -0,0 +1,235 @@
+"""Thumbnails and a paginated contact sheet for every figure in figure_index.json.
+
+Thumbnails are JPEGs in paper_output/figures/thumbs/, decoded with Pillow's
+draft mode (JPEG) and reducing_gap (everything else), so a 300-dpi PNG never
+has to be resampled at full size. A thumbnail is rebuilt only when its
+source's size or mtime changed, or the thumbnail width changed; files in
+thumbs/ that no current figure uses are removed. Decoding runs in a thread
+pool because Pillow releases the GIL while decoding and resampling, and a
+figure that cannot be decoded is skipped and counted as missing. The sheets are paged grids with the figure_id and title under
+each cell: figures/figure_contact_sheet.png, then _p2, _p3, ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from PIL import Image, ImageDraw, ImageFont
+
+BASE_DIR = Path.cwd().resolve()
+FIGURE_INDEX_FILE = BASE_DIR / "paper_output" / "figure_index.json"
+FIGURES_DIR = BASE_DIR / "paper_output" / "figures"
+THUMB_DIR = FIGURES_DIR / "thumbs"
+MANIFEST_FILE = THUMB_DIR / "thumbs.json"
+SHEET_STEM = "figure_contact_sheet"
+THUMB_WIDTH = 360
+COLUMNS = 3
+ROWS = 4
+CAPTION_HEIGHT = 44
+MARGIN = 16
+
+
+def rel(path: Path) -> str:
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def resolve_path(value: Any) -> Path | None:
+    text = str(value or "").strip().replace("\\", "/")
+    if not text:
+        return None
+    path = Path(text)
+    return path if path.is_absolute() else BASE_DIR / path
+
+
+def load_json(path: Path) -> dict[str, Any]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def thumb_name(figure_id: str, source: Path) -> str:
+    """Readable stem plus a short hash of the source path, so ids that sanitize alike never share a file."""
+    stem = re.sub(r"[^\w\-]+", "_", figure_id or source.stem).strip("_") or source.stem
+    digest = hashlib.sha1(rel(source).encode("utf-8")).hexdigest()[:8]
+    return f"{stem}_{digest}.jpg"
+
+
+def make_thumbnail(source: Path, target: Path, width: int) -> tuple[int, int] | None:
+    """Thumbnail size, or None when the source cannot be decoded."""
+    try:
+        with Image.open(source) as image:
+            if image.format == "JPEG":
+                image.draft("RGB", (width, width * 4))
+            image.thumbnail((width, width * 4), Image.Resampling.LANCZOS, reducing_gap=3.0)
+            rgba = image.convert("RGBA")
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        print(f"⚠️ 无法解码图表，已跳过：{rel(source)}（{exc}）")
+        return None
+    flat = Image.new("RGB", rgba.size, "white")
+    flat.paste(rgba, mask=rgba.getchannel("A"))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp")
+    flat.save(tmp, format="JPEG", quality=82, optimize=True)
+    tmp.replace(target)
+    return flat.size
+
+
+def build_thumbnails(figures: list[dict[str, Any]], width: int, jobs: int) -> tuple[list[dict[str, Any]], int]:
+    """(thumbnail records in index order, number rebuilt); unchanged sources reuse their thumbnail."""
+    previous = {item.get("source"): item for item in load_json(MANIFEST_FILE).get("thumbnails", []) if isinstance(item, dict)}
+    records: list[dict[str, Any]] = []
+    pending: list[tuple[dict[str, Any], Path, Path]] = []
+    for figure in figures:
+        source = resolve_path(figure.get("path"))
+        if source is None or not source.is_file():
+            continue
+        stat = source.stat()
+        target = THUMB_DIR / thumb_name(str(figure.get("figure_id") or ""), source)
+        record = {
+            "figure_id": figure.get("figure_id") or source.stem,
+            "title": figure.get("title") or "",
+            "source": rel(source),
+            "thumb": rel(target),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "width": width,
+        }
+        old = previous.get(record["source"])
+        fresh = old and target.exists() and all(old.get(key) == record[key] for key in ("thumb", "size", "mtime_ns", "width"))
+        if fresh:
+            record["thumb_size"] = old.get("thumb_size")
+        else:
+            pending.append((record, source, target))
+        records.append(record)
+    rebuilt = 0
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            sizes = list(executor.map(lambda job: make_thumbnail(job[1], job[2], width), pending))
+        for (record, _, _), size in zip(pending, sizes):
+            if size is not None:
+                record["thumb_size"] = list(size)
+                rebuilt += 1
+        records = [record for record in records if record.get("thumb_size")]
+    prune_thumbnails(records)
+    return records, rebuilt
+
+
+def prune_thumbnails(records: list[dict[str, Any]]) -> None:
+    """Delete thumbnails of removed or undecodable figures and names left by older layouts."""
+    keep = {BASE_DIR / record["thumb"] for record in records} | {MANIFEST_FILE}
+    if THUMB_DIR.is_dir():
+        for path in THUMB_DIR.iterdir():
+            if path.is_file() and path not in keep:
+                path.unlink(missing_ok=True)
+
+
+def caption_font(size: int = 14):
+    try:
+        from font_resolver import resolve_cjk_font
+
+        found = resolve_cjk_font(register=False)
+        if found:
+            return ImageFont.truetype(found["path"], size), True
+    except Exception:
+        pass
+    return ImageFont.load_default(), False
+
+
+def fit_text(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def build_sheets(records: list[dict[str, Any]], width: int, columns: int, rows: int) -> list[str]:
+    font, cjk = caption_font()
+    per_page = columns * rows
+    cell_height = max((record["thumb_size"][1] for record in records), default=width) + CAPTION_HEIGHT
+    pages = []
+    for start in range(0, len(records), per_page):
+        chunk = records[start : start + per_page]
+        used_rows = (len(chunk) + columns - 1) // columns
+        sheet = Image.new("RGB", (MARGIN + columns * (width + MARGIN), MARGIN + used_rows * (cell_height + MARGIN)), "white")
+        draw = ImageDraw.Draw(sheet)
+        for offset, record in enumerate(chunk):
+            x = MARGIN + (offset % columns) * (width + MARGIN)
+            y = MARGIN + (offset // columns) * (cell_height + MARGIN)
+            with Image.open(BASE_DIR / record["thumb"]) as thumb:
+                sheet.paste(thumb, (x, y))
+            thumb_width, thumb_height = record["thumb_size"]
+            draw.rectangle([x - 1, y - 1, x + thumb_width, y + thumb_height], outline="#cbd5e1")
+            label_y = y + cell_height - CAPTION_HEIGHT + 4
+            draw.text((x, label_y), fit_text(draw, str(record["figure_id"]), font, width), fill="#111827", font=font)
+            title = str(record["title"])
+            if title and (cjk or title.isascii()):
+                draw.text((x, label_y + 18), fit_text(draw, title, font, width), fill="#64748b", font=font)
+        page = len(pages) + 1
+        path = FIGURES_DIR / (f"{SHEET_STEM}.png" if page == 1 else f"{SHEET_STEM}_p{page}.png")
+        sheet.save(path, optimize=True)
+        pages.append(rel(path))
+    for stale in FIGURES_DIR.glob(f"{SHEET_STEM}_p*.png"):
+        if rel(stale) not in pages:
+            stale.unlink()
+    return pages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build figure thumbnails and a paginated contact sheet from figure_index.json.")
+    parser.add_argument("--thumb-width", type=int, default=THUMB_WIDTH, help="Thumbnail width in pixels.")
+    parser.add_argument("--columns", type=int, default=COLUMNS, help="Thumbnails per contact-sheet row.")
+    parser.add_argument("--rows", type=int, default=ROWS, help="Rows per contact-sheet page.")
+    parser.add_argument("--jobs", type=int, default=0, help="Decoder threads; 0 uses all CPUs.")
+    args = parser.parse_args()
+
+    index = load_json(FIGURE_INDEX_FILE)
+    figures = [item for item in index.get("figures", []) if isinstance(item, dict)]
+    if not figures:
+        print(f"⚠️ 未找到可用的图表索引：{rel(FIGURE_INDEX_FILE)}")
+        return 0
+
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+    previous = load_json(MANIFEST_FILE)
+    records, rebuilt = build_thumbnails(figures, args.thumb_width, jobs)
+    if not records:
+        print("⚠️ figure_index.json 中的图片均不存在，未生成缩略图。")
+        return 0
+    layout = {"thumb_width": args.thumb_width, "columns": max(1, args.columns), "rows": max(1, args.rows)}
+    pages = previous.get("pages") or []
+    unchanged = (
+        not rebuilt
+        and previous.get("layout") == layout
+        and previous.get("thumbnails") == records
+        and pages
+        and all((BASE_DIR / page).exists() for page in pages)
+    )
+    if not unchanged:
+        pages = build_sheets(records, layout["thumb_width"], layout["columns"], layout["rows"])
+    MANIFEST_FILE.write_text(
+        json.dumps(
+            {"schema_version": "1.0", "layout": layout, "pages": pages, "thumbnails": records},
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"🖼️ 缩略图：{len(records)} 张（本次重建 {rebuilt} 张），缺失 {len(figures) - len(records)} 张")
+    print(f"✅ 图表总览：{', '.join(pages)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,344 @@
+"""One-pass column statistics shared by the plan builder, figure-plan validation and result scaffolds.
+
+Each table is streamed once from top to bottom: csv.reader for CSV/TXT
+(encoding and separator come from csv_sniff), openpyxl read-only rows for
+.xlsx. Memory stays bounded whatever the row count. Every column keeps:
+- null and non-null counts, with the pandas default NA tokens counted as null
+- type votes (numeric / datetime / text) over the non-null cells
+- min, max, mean and population std of the numeric cells (Welford)
+- a reservoir sample of RESERVOIR_SIZE values (Algorithm L, seeded)
+- a distinct count: exact up to EXACT_DISTINCT values, then a HyperLogLog
+  estimate
+
+Because the pass covers the whole file, time-sorted data is judged on all its
+rows, not on the first 500. Results go to paper_output/cache/data_profile.json,
+keyed by path and checked against size and mtime. Later stages call
+profile_path() and reuse the entry instead of re-reading the file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from csv_sniff import read_attempts
+
+PROFILE_FILE = Path("paper_output") / "cache" / "data_profile.json"
+SEARCH_DIRS = ("problem_files", "crawled_data", "paper_output/data_cleaned")
+PROFILE_EXTENSIONS = {".csv", ".txt", ".xlsx", ".xls"}
+RESERVOIR_SIZE = 64
+EXACT_DISTINCT = 1024
+HLL_BITS = 11
+# Same threshold build_data_visualization_plan.classify_columns used for numeric columns.
+TYPE_RATIO = 0.8
+NULL_TOKENS = {"", "#N/A", "#NA", "N/A", "NA", "n/a", "NULL", "null", "NaN", "nan", "-NaN", "-nan", "None", "<NA>"}
+DATETIME_RE = re.compile(
+    r"^(\d{4}[-/.年]\d{1,2}(?:[-/.月]\d{1,2}日?)?(?:[ T]\d{1,2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?"
+    r"|\d{1,2}:\d{2}(?::\d{2})?)$"
+)
+
+
+class HyperLogLog:
+    """Fixed-size distinct-count sketch (2**bits one-byte registers, ~1.04/sqrt(m) error)."""
+
+    def __init__(self, bits: int = HLL_BITS) -> None:
+        self.bits = bits
+        self.registers = bytearray(1 << bits)
+
+    def add(self, value: str) -> None:
+        hashed = int.from_bytes(hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+        index = hashed >> (64 - self.bits)
+        rest = hashed & ((1 << (64 - self.bits)) - 1)
+        rank = (64 - self.bits) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class ColumnStats:
+    def __init__(self, name: str, seed: int) -> None:
+        self.name = name
+        self.nulls = 0
+        self.non_null = 0
+        self.votes = {"numeric": 0, "datetime": 0, "text": 0}
+        self.numeric_count = 0
+        self.minimum: float | None = None
+        self.maximum: float | None = None
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sample: list[str] = []
+        self.rng = random.Random(seed)
+        self.weight = 1.0
+        self.next_replace = 0
+        self.distinct: set[str] | None = set()
+        self.sketch = HyperLogLog()
+
+    def add(self, value: Any) -> None:
+        if type(value) is str or not isinstance(value, (bool, int, float, datetime, date)):
+            # CSV cells are always str; Excel cells may be any of the types below.
+            text = "" if value is None else str(value).strip()
+            if text in NULL_TOKENS:
+                self.nulls += 1
+                return
+            try:
+                number, kind = float(text), "numeric"
+            except ValueError:
+                number, kind = None, "datetime" if DATETIME_RE.match(text) else "text"
+        elif isinstance(value, bool):
+            text, number, kind = str(value), None, "text"
+        elif isinstance(value, (int, float)):
+            if value != value:
+                self.nulls += 1
+                return
+            text, number, kind = repr(value), float(value), "numeric"
+        else:
+            text, number, kind = value.isoformat(), None, "datetime"
+        self.votes[kind] += 1
+        if number is not None and math.isfinite(number):
+            self.numeric_count += 1
+            delta = number - self.mean
+            self.mean += delta / self.numeric_count
+            self.m2 += delta * (number - self.mean)
+            self.minimum = number if self.minimum is None or number < self.minimum else self.minimum
+            self.maximum = number if self.maximum is None or number > self.maximum else self.maximum
+        self.add_distinct(text)
+        self.add_sample(text)
+        self.non_null += 1
+
+    def add_distinct(self, text: str) -> None:
+        # Values already in the exact set are duplicates, so the sketch needs
+        # no hash for them; after overflow every value goes to the sketch.
+        if self.distinct is None:
+            self.sketch.add(text)
+        elif text not in self.distinct:
+            self.distinct.add(text)
+            self.sketch.add(text)
+            if len(self.distinct) > EXACT_DISTINCT:
+                self.distinct = None
+
+    def add_sample(self, text: str) -> None:
+        """Algorithm L: one random draw per replacement instead of one per value."""
+        seen = self.non_null
+        if seen < RESERVOIR_SIZE:
+            self.sample.append(text)
+            if seen == RESERVOIR_SIZE - 1:
+                self.advance_reservoir(seen)
+            return
+        if seen == self.next_replace:
+            self.sample[self.rng.randrange(RESERVOIR_SIZE)] = text
+            self.advance_reservoir(seen)
+
+    def advance_reservoir(self, seen: int) -> None:
+        self.weight *= math.exp(math.log(self.rng.random() or 1e-12) / RESERVOIR_SIZE)
+        gap = math.floor(math.log(self.rng.random() or 1e-12) / math.log1p(-self.weight)) if self.weight < 1 else 0
+        self.next_replace = seen + gap + 1
+
+    def inferred_type(self) -> str:
+        if not self.non_null:
+            return "empty"
+        for kind in ("numeric", "datetime"):
+            if self.votes[kind] / self.non_null >= TYPE_RATIO:
+                return kind
+        return "text"
+
+    def to_dict(self) -> dict[str, Any]:
+        numeric = self.numeric_count > 0
+        return {
+            "name": self.name,
+            "inferred_type": self.inferred_type(),
+            "non_null": self.non_null,
+            "nulls": self.nulls,
+            "distinct": len(self.distinct) if self.distinct is not None else self.sketch.count(),
+            "distinct_exact": self.distinct is not None,
+            "votes": dict(self.votes),
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": round(self.mean, 10) if numeric else None,
+            "std": round(math.sqrt(self.m2 / self.numeric_count), 10) if numeric else None,
+            "sample": list(self.sample),
+        }
+
+
+def header_names(raw: Iterable[Any]) -> list[str]:
+    """Blank headers become Unnamed: i and repeats get .1, .2 suffixes, as pandas names them."""
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for index, value in enumerate(raw):
+        name = str(value).strip() if value is not None and str(value).strip() else f"Unnamed: {index}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def profile_rows(rows: Iterator[Any]) -> tuple[list[ColumnStats], int]:
+    header = next(rows, None)
+    if header is None:
+        return [], 0
+    stats = [ColumnStats(name, seed=index) for index, name in enumerate(header_names(header))]
+    width = len(stats)
+    count = 0
+    for row in rows:
+        if not row or all(cell is None or cell == "" for cell in row):
+            continue
+        count += 1
+        cells = list(row[:width])
+        cells.extend([None] * (width - len(cells)))
+        for column, cell in zip(stats, cells):
+            column.add(cell)
+    return stats, count
+
+
+def profile_text(path: Path) -> tuple[list[ColumnStats], int, dict[str, Any]]:
+    encodings = ("utf-8-sig", "utf-8", "gbk", "gb18030")
+    seps: tuple[str | None, ...] = ("\t",) if path.suffix.lower() == ".txt" else (",",)
+    error: Exception | None = None
+    for encoding, sep in read_attempts(path, encodings, seps):
+        try:
+            with path.open("r", encoding=encoding, newline="") as handle:
+                stats, rows = profile_rows(csv.reader(handle, delimiter=sep or ","))
+            return stats, rows, {"encoding": encoding, "sep": sep or ","}
+        except (UnicodeDecodeError, csv.Error) as exc:
+            error = exc
+    raise ValueError(f"cannot decode {path.name}: {error}")
+
+
+def profile_workbook(path: Path) -> tuple[list[ColumnStats], int, dict[str, Any]]:
+    if path.suffix.lower() == ".xlsx":
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            stats, rows = profile_rows(iter(sheet.iter_rows(values_only=True)))
+            return stats, rows, {"sheet": sheet.title}
+        finally:
+            workbook.close()
+    import pandas as pd
+
+    frame = pd.read_excel(path, header=None, dtype=object)
+    stats, rows = profile_rows(iter(frame.itertuples(index=False, name=None)))
+    return stats, rows, {"sheet": 0}
+
+
+def profile_table(path: Path) -> dict[str, Any]:
+    """Profile of one table: rows, per-column stats and the numeric/datetime/categorical split."""
+    started = time.perf_counter()
+    stat = path.stat()
+    if path.suffix.lower() in {".xlsx", ".xls"}:
+        stats, rows, source = profile_workbook(path)
+    else:
+        stats, rows, source = profile_text(path)
+    columns = [column.to_dict() for column in stats]
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        **source,
+        "rows": rows,
+        "columns": columns,
+        "numeric_columns": [item["name"] for item in columns if item["inferred_type"] == "numeric"],
+        "datetime_columns": [item["name"] for item in columns if item["inferred_type"] == "datetime"],
+        "categorical_columns": [item["name"] for item in columns if item["inferred_type"] != "numeric"],
+        "elapsed_s": round(time.perf_counter() - started, 3),
+    }
+
+
+def profile_key(path: Path) -> str:
+    resolved = path.resolve()
+    try:
+        return resolved.relative_to(Path.cwd().resolve()).as_posix()
+    except ValueError:
+        return resolved.as_posix()
+
+
+def load_profiles(profile_file: Path = PROFILE_FILE) -> dict[str, Any]:
+    try:
+        data = json.loads(profile_file.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    files = data.get("files") if isinstance(data, dict) else None
+    return files if isinstance(files, dict) else {}
+
+
+def save_profiles(updates: dict[str, Any], profile_file: Path = PROFILE_FILE) -> None:
+    try:
+        files = load_profiles(profile_file)
+        files.update(updates)
+        profile_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = profile_file.with_name(f"{profile_file.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"schema_version": "1.0", "files": files}, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, profile_file)
+    except OSError:
+        pass
+
+
+def profile_path(path: Path, profile_file: Path | None = PROFILE_FILE) -> dict[str, Any]:
+    """Cached profile for path; re-profiled only when its size or mtime changed."""
+    key = profile_key(path)
+    stat = path.stat()
+    if profile_file is not None:
+        cached = load_profiles(profile_file).get(key)
+        if isinstance(cached, dict) and cached.get("size") == stat.st_size and cached.get("mtime_ns") == stat.st_mtime_ns:
+            return cached
+    profile = {"path": key, **profile_table(path)}
+    if profile_file is not None:
+        save_profiles({key: profile}, profile_file)
+    return profile
+
+
+def find_tables(roots: Iterable[Path]) -> list[Path]:
+    files = []
+    for root in roots:
+        candidates = [root] if root.is_file() else root.rglob("*") if root.is_dir() else []
+        files.extend(path for path in candidates if path.is_file() and not path.name.startswith("~") and path.suffix.lower() in PROFILE_EXTENSIONS)
+    return sorted(set(files), key=lambda item: item.as_posix().lower())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stream every table once and write paper_output/cache/data_profile.json.")
+    parser.add_argument("paths", nargs="*", help=f"Files or folders to profile; defaults to {', '.join(SEARCH_DIRS)}.")
+    args = parser.parse_args()
+    roots = [Path(item) for item in args.paths] or [Path(item) for item in SEARCH_DIRS]
+    tables = find_tables(roots)
+    if not tables:
+        print("⚠️ 未找到可画像的数据文件（CSV/TXT/Excel）。")
+        return 0
+    failed = 0
+    for path in tables:
+        try:
+            profile = profile_path(path)
+        except Exception as exc:
+            failed += 1
+            print(f"❌ {profile_key(path)}: {exc}")
+            continue
+        print(
+            f"📊 {profile['path']}: {profile['rows']} 行 × {len(profile['columns'])} 列"
+            f"（数值 {len(profile['numeric_columns'])}，时间 {len(profile['datetime_columns'])}）"
+        )
+    print(f"✅ 数据画像：{PROFILE_FILE.as_posix()}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+"""Cross-process lock for read-modify-write merges of shared cache files.
+
+Stages run in parallel (workflow_dag.py --jobs) and figure workers run in
+separate processes, so two writers can load the same JSON cache, add their
+own entries and replace the file; the last os.replace would drop the other's
+entries. Wrapping the load/update/replace in locked(path) serialises them.
+
+The lock is a sibling file created with O_EXCL that holds a per-holder
+token. A lock older than stale_after seconds is taken over, but only by the
+waiter whose rename still finds that same file, and a holder only removes
+the lock if it still contains its own token.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+
+def lock_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.lock")
+
+
+def remove_if(lock: Path, expected: Callable[[Path], bool]) -> bool:
+    """Move the lock aside atomically; delete it only if it is the expected one, otherwise put it back."""
+    aside = lock.with_name(f"{lock.name}.{os.getpid()}.{uuid.uuid4().hex}")
+    try:
+        os.rename(lock, aside)
+    except OSError:
+        return False
+    try:
+        if expected(aside):
+            return True
+        try:
+            os.link(aside, lock)
+        except OSError:
+            pass
+        return False
+    finally:
+        aside.unlink(missing_ok=True)
+
+
+@contextmanager
+def locked(path: Path, timeout: float = 30.0, stale_after: float = 120.0) -> Iterator[None]:
+    """Hold the lock for path; raises TimeoutError if another holder keeps it past timeout."""
+    lock = lock_path(Path(path))
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    token = f"{os.getpid()}:{uuid.uuid4().hex}"
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(str(lock), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                seen = lock.stat()
+            except FileNotFoundError:
+                continue
+            if time.time() - seen.st_mtime > stale_after:
+                remove_if(lock, lambda aside: (aside.stat().st_ino, aside.stat().st_mtime_ns) == (seen.st_ino, seen.st_mtime_ns))
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Timed out waiting for {lock}")
+            time.sleep(0.02)
+    try:
+        os.write(fd, token.encode("ascii"))
+    finally:
+        os.close(fd)
+    try:
+        yield
+    finally:
+        remove_if(lock, lambda aside: aside.read_text(encoding="ascii", errors="replace") == token)
@@ -0,0 +1,121 @@
+"""CJK font discovery shared by every plotting entry point.
+
+The installed fonts are listed once through matplotlib.font_manager. Each
+candidate's cmap is checked for real Chinese glyphs: fallback fonts such as
+Last Resort map every code point to the same placeholder, so the sample
+characters must also resolve to distinct glyphs. The chosen font is cached in
+paper_output/cache/font.json. Later runs reuse it without opening any font
+files unless the cached file disappears or, when nothing was found, the set of
+installed fonts changes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+CACHE_FILE = Path("paper_output") / "cache" / "font.json"
+PREFERRED_FONTS = (
+    "SimHei",
+    "Microsoft YaHei",
+    "PingFang SC",
+    "Heiti TC",
+    "Arial Unicode MS",
+    "WenQuanYi Micro Hei",
+    "WenQuanYi Zen Hei",
+    "Noto Sans CJK SC",
+    "Source Han Sans SC",
+    "Droid Sans Fallback",
+    "KaiTi",
+    "FangSong",
+)
+SAMPLE_TEXT = "中文测试图表"
+
+
+def covers_cjk(path: str) -> bool:
+    from matplotlib import ft2font
+
+    try:
+        font = ft2font.FT2Font(path)
+        glyphs = [font.get_char_index(ord(char)) for char in SAMPLE_TEXT]
+    except Exception:
+        return False
+    return all(glyphs) and len(set(glyphs)) == len(glyphs)
+
+
+def find_cjk_font() -> dict[str, str] | None:
+    """Preferred names first, then any other installed family that covers the sample text."""
+    from matplotlib import font_manager
+
+    entries = sorted(font_manager.fontManager.ttflist, key=lambda entry: (entry.name, entry.fname))
+    rank = {name: index for index, name in enumerate(PREFERRED_FONTS)}
+    entries.sort(key=lambda entry: rank.get(entry.name, len(rank)))
+    checked: set[str] = set()
+    for entry in entries:
+        if entry.fname in checked:
+            continue
+        checked.add(entry.fname)
+        if covers_cjk(entry.fname):
+            return {"name": entry.name, "path": entry.fname}
+    return None
+
+
+def load_cache(cache_file: Path) -> dict[str, Any]:
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_cache(cache_file: Path, data: dict[str, Any]) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, cache_file)
+    except OSError:
+        pass
+
+
+def resolve_cjk_font(cache_file: Path | None = CACHE_FILE, register: bool = True) -> dict[str, str] | None:
+    """{"name", "path"} of a font that really renders Chinese, or None.
+
+    register=False is for callers that only need the file (e.g. Pillow): a
+    cache hit then returns without importing Matplotlib at all.
+    """
+    cached = load_cache(cache_file) if cache_file is not None else {}
+    cached_path = cached.get("path")
+    if cached_path and Path(cached_path).is_file() and not register:
+        return {"name": cached["name"], "path": cached_path}
+    if cached and not cached_path and not register:
+        return None
+
+    from matplotlib import font_manager
+
+    font_count = len(font_manager.fontManager.ttflist)
+    if cached_path and Path(cached_path).is_file():
+        if all(entry.fname != cached_path for entry in font_manager.fontManager.ttflist):
+            font_manager.fontManager.addfont(cached_path)
+        return {"name": cached["name"], "path": cached_path}
+    if cached and not cached_path and cached.get("font_count") == font_count:
+        return None
+    found = find_cjk_font()
+    if cache_file is not None:
+        save_cache(cache_file, {**(found or {"name": None, "path": None}), "font_count": font_count})
+    return found
+
+
+def apply_cjk_font(cache_file: Path | None = CACHE_FILE) -> str | None:
+    """Put the resolved font first in font.sans-serif; returns its name, or None when none is installed."""
+    import matplotlib.pyplot as plt
+
+    plt.rcParams["axes.unicode_minus"] = False
+    found = resolve_cjk_font(cache_file)
+    if found is None:
+        return None
+    current = [name for name in plt.rcParams["font.sans-serif"] if name != found["name"]]
+    plt.rcParams["font.sans-serif"] = [found["name"], *current]
+    return found["name"]
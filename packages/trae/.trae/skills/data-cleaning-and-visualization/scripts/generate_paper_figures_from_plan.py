@@ -1,11 +1,26 @@
+"""Render visualization_plan.json into paper figures and figure_index.json.
+
+pandas, Matplotlib and the template module are imported only when a figure is
+actually rendered, so --list-templates and --validate start instantly.
+"""
+
+from __future__ import annotations
+
+import argparse
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import pandas as pd
+from csv_sniff import read_attempts
+from figure_exports import figure_variants
+from figure_registry import REGISTRY, infer_template, template_source, validate_plan
+from render_cache import is_fresh, load_manifest, render_key, save_manifest
 
-from paper_figure_templates import plot_figure_spec
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 BASE_DIR = Path.cwd().resolve()
@@ -33,12 +48,14 @@ def load_json(path: Path) -> dict[str, Any] | None:
 def read_table(path: Path) -> pd.DataFrame | None:
     if not path.exists():
         return None
+    import pandas as pd
+
     try:
         if path.suffix.lower() == ".csv":
-            for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
+            for encoding, sep in read_attempts(path, ("utf-8-sig", "utf-8", "gbk", "gb18030"), (",",)):
                 try:
-                    return pd.read_csv(path, encoding=encoding)
-                except UnicodeDecodeError:
+                    return pd.read_csv(path, encoding=encoding, sep=sep)
+                except (UnicodeDecodeError, pd.errors.ParserError):
                     continue
             return pd.read_csv(path)
         if path.suffix.lower() in {".xlsx", ".xls"}:
@@ -73,33 +90,120 @@ def index_item(spec: dict[str, Any], exists: bool, message: str = "", template:
     }
 
 
-def generate_one(spec: dict[str, Any]) -> dict[str, Any]:
+def generate_one(spec: dict[str, Any], previous: dict[str, Any] | None = None) -> tuple[dict[str, Any], dict[str, Any] | None]:
+    """Index item plus the render-cache entry to store (None when nothing was rendered)."""
     output_path = resolve_path(spec.get("output_path"))
     if output_path is None:
-        return index_item(spec, False, "missing output_path")
+        return index_item(spec, False, "missing output_path"), None
 
     data_path = resolve_path(spec.get("data_source"))
     if data_path is None:
-        return index_item(spec, False, "missing data_source")
+        return index_item(spec, False, "missing data_source"), None
+
+    template_file = template_source(infer_template(spec))
+    key = render_key(spec, data_path, template_file) if data_path.is_file() and template_file else ""
+    if key and is_fresh(previous, key):
+        item = index_item(spec, True, str(previous.get("message") or ""), str(previous.get("template") or ""))
+        item["downsampling"] = str(previous.get("downsampling") or "")
+        item["variants"] = figure_variants(output_path, BASE_DIR)
+        item["cached"] = True
+        return item, previous
 
     df = read_table(data_path)
     if df is None or df.empty:
-        return index_item(spec, False, f"data source is not readable: {spec.get('data_source')}")
-
-    result = plot_figure_spec(df, spec, output_path)
-    return index_item(
-        spec,
-        bool(Path(result.get("path", "")).exists()),
-        str(result.get("message") or ""),
-        str(result.get("template") or ""),
-    )
+        return index_item(spec, False, f"data source is not readable: {spec.get('data_source')}"), None
+
+    from paper_figure_templates import plot_figure_spec
+
+    result = plot_figure_spec(df, spec, output_path, apply_style=False)
+    exists = bool(Path(result.get("path", "")).exists())
+    item = index_item(spec, exists, str(result.get("message") or ""), str(result.get("template") or ""))
+    item["downsampling"] = str(result.get("downsampling") or "")
+    item["variants"] = figure_variants(output_path, BASE_DIR)
+    item["cached"] = False
+    if not exists:
+        return item, None
+    entry = {
+        "key": key,
+        "files": [item["path"], *(variant["path"] for name, variant in item["variants"].items() if name != "png")],
+        "template": item["template"],
+        "message": item["message"],
+        "downsampling": item["downsampling"],
+    }
+    return item, entry
+
+
+def init_render_worker() -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from paper_figure_templates import set_paper_style
+
+    set_paper_style()
+
+
+def render_specs(specs: list[dict[str, Any]], jobs: int) -> list[dict[str, Any]]:
+    """Index items in plan order; with jobs > 1 each worker process sets the paper style once.
+
+    Specs whose render key matches the manifest entry are skipped; only the main
+    process writes the manifest.
+    """
+    entries = load_manifest()
+    previous = [entries.get(str(spec.get("output_path") or "").replace("\\", "/")) for spec in specs]
+    if jobs <= 1 or len(specs) <= 1:
+        from paper_figure_templates import set_paper_style
+
+        set_paper_style()
+        results = [generate_one(spec, entry) for spec, entry in zip(specs, previous)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(specs)), initializer=init_render_worker) as executor:
+            results = list(executor.map(generate_one, specs, previous))
+    save_manifest({entry["files"][0]: entry for _, entry in results if entry})
+    return [item for item, _ in results]
+
+
+def list_templates() -> int:
+    for info in REGISTRY.values():
+        keywords = "、".join(info.keywords) or "-"
+        print(f"{info.name:<24}{info.description}（关键词：{keywords}；{info.module}.{info.function}）")
+    return 0
+
+
+def check_plan(plan: dict[str, Any]) -> int:
+    issues = validate_plan(plan, BASE_DIR)
+    for issue in issues:
+        mark = "❌" if issue["level"] == "error" else "⚠️"
+        print(f"{mark} {issue['figure_id']}: {issue['message']}")
+    errors = sum(1 for issue in issues if issue["level"] == "error")
+    if errors:
+        print(f"❌ 图表规划校验未通过：{errors} 个错误")
+        return 1
+    print(f"✅ 图表规划校验通过：{len(plan.get('figures') or [])} 张图，警告 {len(issues)} 条")
+    return 0
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Render planned paper figures and update figure_index.json.")
+    parser.add_argument("--jobs", type=int, default=1, help="Render figures in N worker processes; 0 uses all CPUs.")
+    parser.add_argument(
+        "--max-points",
+        type=int,
+        default=0,
+        help="Downsample line/scatter figures above N rows unless the spec sets max_points; 0 keeps the template defaults.",
+    )
+    parser.add_argument("--list-templates", action="store_true", help="List registered chart templates and exit.")
+    parser.add_argument("--validate", action="store_true", help="Check visualization_plan.json without rendering; exit 1 on errors.")
+    args = parser.parse_args()
+    if args.list_templates:
+        return list_templates()
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
     plan = load_json(VISUALIZATION_PLAN_FILE)
     if plan is None:
         print(f"⚠️ 未找到图表规划：{VISUALIZATION_PLAN_FILE}")
-        return 0
+        return 1 if args.validate else 0
+    if args.validate:
+        return check_plan(plan)
 
     figures = plan.get("figures")
     if not isinstance(figures, list) or not figures:
@@ -107,15 +211,12 @@ def main() -> int:
         return 0
 
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    indexed = []
-    generated = 0
-    for spec in figures:
-        if not isinstance(spec, dict):
-            continue
-        item = generate_one(spec)
-        indexed.append(item)
-        if item.get("exists"):
-            generated += 1
+    specs = [spec for spec in figures if isinstance(spec, dict)]
+    if args.max_points > 0:
+        specs = [{"max_points": args.max_points, **spec} for spec in specs]
+    indexed = render_specs(specs, jobs)
+    generated = sum(1 for item in indexed if item.get("exists"))
+    cached = sum(1 for item in indexed if item.get("cached"))
 
     figure_index = {
         "schema_version": "1.0",
@@ -127,7 +228,7 @@ def main() -> int:
     }
     FIGURE_INDEX_FILE.write_text(json.dumps(figure_index, ensure_ascii=False, indent=2), encoding="utf-8")
 
-    print(f"✅ 论文级图表模板已生成：{generated}/{len(indexed)}")
+    print(f"✅ 论文级图表模板已生成：{generated}/{len(indexed)}（缓存命中 {cached}）")
     print(f"✅ 图表索引已更新：{FIGURE_INDEX_FILE}")
     return 0
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import math
 import re
+import weakref
 from pathlib import Path
 from typing import Any
 
@@ -10,6 +11,10 @@ import numpy as np
 import pandas as pd
 import seaborn as sns
 
+from figure_exports import make_docx_raster, save_vector_masters
+from figure_registry import infer_template, load_renderer
+from font_resolver import apply_cjk_font
+
 
 PALETTE = {
     "blue": "#2563eb",
@@ -41,22 +46,7 @@ def set_paper_style() -> None:
             "axes.unicode_minus": False,
         }
     )
-    for font in [
-        "SimHei",
-        "Microsoft YaHei",
-        "PingFang SC",
-        "Arial Unicode MS",
-        "WenQuanYi Micro Hei",
-        "Noto Sans CJK SC",
-    ]:
-        try:
-            plt.rcParams["font.sans-serif"] = [font]
-            fig = plt.figure(figsize=(1, 1))
-            plt.text(0.5, 0.5, "测试")
-            plt.close(fig)
-            return
-        except Exception:
-            continue
+    apply_cjk_font()
 
 
 def sanitize_text(value: Any, fallback: str = "") -> str:
@@ -68,48 +58,94 @@ def safe_numeric(series: pd.Series) -> pd.Series:
     return pd.to_numeric(series, errors="coerce")
 
 
-def numeric_columns(df: pd.DataFrame, exclude: set[str] | None = None) -> list[str]:
-    exclude = exclude or set()
-    result = []
-    for column in df.columns:
-        name = str(column)
-        if name in exclude:
-            continue
-        converted = safe_numeric(df[column])
-        if converted.notna().sum() >= max(2, int(len(df) * 0.5)):
-            result.append(name)
-    return result
-
-
-def categorical_columns(df: pd.DataFrame, exclude: set[str] | None = None) -> list[str]:
-    exclude = exclude or set()
-    result = []
-    for column in df.columns:
-        name = str(column)
-        if name in exclude:
-            continue
-        if name not in numeric_columns(df, exclude):
-            result.append(name)
-    return result
+# Above these many rows a line/scatter template thins the data before plotting;
+# spec["max_points"] overrides both.
+LINE_POINT_LIMIT = 5000
+SCATTER_POINT_LIMIT = 20000
+TIME_PATTERNS = ("year", "date", "time", "month", "day", "年份", "年度", "日期", "时间", "月份")
+
+
+class ColumnProfile:
+    """Column classification computed once per DataFrame.
+
+    Every column is converted with ``pd.to_numeric`` exactly once. A column is
+    numeric when at least half the rows (and at least two) convert; the coerced
+    series is kept in ``numeric``. Columns already stored as datetimes are
+    ``datetime``. Everything else is ``categorical``.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        threshold = max(2, int(len(df) * 0.5))
+        self.columns: list[str] = [str(column) for column in df.columns]
+        self.numeric: dict[str, pd.Series] = {}
+        self.datetime: list[str] = []
+        self.categorical: list[str] = []
+        for column, name in zip(df.columns, self.columns):
+            series = df[column]
+            if pd.api.types.is_datetime64_any_dtype(series):
+                self.datetime.append(name)
+                continue
+            converted = safe_numeric(series)
+            if converted.notna().sum() >= threshold:
+                self.numeric[name] = converted
+            else:
+                self.categorical.append(name)
+
+    def numeric_columns(self, exclude: set[str] | None = None) -> list[str]:
+        exclude = exclude or set()
+        return [name for name in self.numeric if name not in exclude]
+
+    def non_numeric_columns(self, exclude: set[str] | None = None) -> list[str]:
+        """Datetime and categorical columns in their original order."""
+        exclude = exclude or set()
+        return [name for name in self.columns if name not in self.numeric and name not in exclude]
+
+    def numeric_series(self, df: pd.DataFrame, name: str) -> pd.Series:
+        cached = self.numeric.get(name)
+        return cached if cached is not None else safe_numeric(df[name])
 
 
-def pick_x(df: pd.DataFrame, spec: dict[str, Any]) -> str:
+_PROFILES: dict[int, tuple[weakref.ref, tuple[Any, ...], ColumnProfile]] = {}
+
+
+def column_profile(df: pd.DataFrame) -> ColumnProfile:
+    """Cached ColumnProfile for this DataFrame object; rebuilt if its shape or columns change."""
+    key = id(df)
+    signature = (df.shape, tuple(map(str, df.columns)))
+    cached = _PROFILES.get(key)
+    if cached is not None and cached[0]() is df and cached[1] == signature:
+        return cached[2]
+    profile = ColumnProfile(df)
+    _PROFILES[key] = (weakref.ref(df, lambda _, key=key: _PROFILES.pop(key, None)), signature, profile)
+    return profile
+
+
+def numeric_columns(df: pd.DataFrame, exclude: set[str] | None = None, profile: ColumnProfile | None = None) -> list[str]:
+    return (profile or column_profile(df)).numeric_columns(exclude)
+
+
+def categorical_columns(df: pd.DataFrame, exclude: set[str] | None = None, profile: ColumnProfile | None = None) -> list[str]:
+    return (profile or column_profile(df)).non_numeric_columns(exclude)
+
+
+def pick_x(df: pd.DataFrame, spec: dict[str, Any], profile: ColumnProfile | None = None) -> str:
     candidate = sanitize_text(spec.get("candidate_x"))
     if candidate in df.columns:
         return candidate
-    patterns = ("year", "date", "time", "month", "day", "年份", "年度", "日期", "时间", "月份")
-    for column in df.columns:
-        name = str(column)
+    profile = profile or column_profile(df)
+    for name in profile.columns:
         lower = name.lower()
-        if any(pattern in lower or pattern in name for pattern in patterns):
+        if any(pattern in lower or pattern in name for pattern in TIME_PATTERNS):
             return name
-    cats = categorical_columns(df)
+    if profile.datetime:
+        return profile.datetime[0]
+    cats = profile.non_numeric_columns()
     if cats:
         return cats[0]
-    return str(df.columns[0]) if len(df.columns) else ""
+    return profile.columns[0] if profile.columns else ""
 
 
-def pick_y(df: pd.DataFrame, spec: dict[str, Any], x_col: str, limit: int = 3) -> list[str]:
+def pick_y(df: pd.DataFrame, spec: dict[str, Any], x_col: str, limit: int = 3, profile: ColumnProfile | None = None) -> list[str]:
     raw = spec.get("candidate_y")
     result = []
     if isinstance(raw, list):
@@ -119,7 +155,7 @@ def pick_y(df: pd.DataFrame, spec: dict[str, Any], x_col: str, limit: int = 3) -
                 result.append(name)
     if result:
         return result[:limit]
-    return numeric_columns(df, exclude={x_col})[:limit]
+    return (profile or column_profile(df)).numeric_columns({x_col})[:limit]
 
 
 def sorted_for_x(df: pd.DataFrame, x_col: str) -> pd.DataFrame:
@@ -157,6 +193,9 @@ def save_figure(fig: plt.Figure, output_path: Path) -> str:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     fig.tight_layout()
     fig.savefig(output_path, dpi=300, bbox_inches="tight")
+    if output_path.suffix.lower() == ".png":
+        save_vector_masters(fig, output_path)
+        make_docx_raster(output_path)
     plt.close(fig)
     return output_path.as_posix()
 
@@ -177,18 +216,105 @@ def label_endpoints(ax: plt.Axes, x_values: pd.Series, y_values: pd.Series, labe
     )
 
 
-def plot_prediction_comparison(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def point_limit(spec: dict[str, Any], default: int) -> int:
+    try:
+        value = int(spec.get("max_points") or default)
+    except (TypeError, ValueError):
+        value = default
+    return max(value, 3)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets row selection.
+
+    Keeps the first and last point. For each of the threshold - 2 inner buckets
+    it keeps the point that forms the largest triangle with the previously kept
+    point and the mean of the next bucket, which preserves the visual shape.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = (edges[bucket + 1], edges[bucket + 2]) if bucket + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous]) - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(columns: list[np.ndarray], buckets: int) -> np.ndarray:
+    """Rows holding each column's min and max per bucket, plus both ends, in row order."""
+    n = len(columns[0])
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    keep = {0, n - 1}
+    for start, end in zip(edges[:-1], edges[1:]):
+        for values in columns:
+            chunk = values[start:end]
+            if len(chunk) == 0 or np.isnan(chunk).all():
+                continue
+            keep.add(start + int(np.nanargmin(chunk)))
+            keep.add(start + int(np.nanargmax(chunk)))
+    return np.array(sorted(keep))
+
+
+def downsample_lines(
+    work: pd.DataFrame, x_col: str, y_cols: list[str], spec: dict[str, Any], notes: list[str] | None = None
+) -> pd.DataFrame:
+    """Thin an x-sorted frame for line plots when it exceeds the point limit.
+
+    spec["downsample"] chooses "lttb" (shape of the first y column) or
+    "minmax" (every series keeps its per-bucket extremes). The default is
+    lttb for a single series and minmax for several. The method and point
+    counts are appended to notes for the figure index.
+    """
+    limit = point_limit(spec, LINE_POINT_LIMIT)
+    total = len(work)
+    if total <= limit or not y_cols:
+        return work
+    method = sanitize_text(spec.get("downsample")).lower() or ("lttb" if len(y_cols) == 1 else "minmax")
+    ys = [safe_numeric(work[column]).to_numpy(dtype=float) for column in y_cols]
+    if method == "lttb":
+        x = safe_numeric(work[x_col]) if x_col in work.columns else None
+        x_values = x.to_numpy(dtype=float) if x is not None and x.notna().all() else np.arange(total, dtype=float)
+        y_values = pd.Series(ys[0]).interpolate(limit_direction="both").fillna(0.0).to_numpy()
+        keep = lttb_indices(x_values, y_values, limit)
+    else:
+        method = "minmax"
+        keep = minmax_indices(ys, max(1, limit // (2 * len(ys))))
+    if notes is not None:
+        notes.append(f"{method}: {total} -> {len(keep)} points")
+    return work.iloc[keep].reset_index(drop=True)
+
+
+def plot_prediction_comparison(
+    df: pd.DataFrame,
+    spec: dict[str, Any],
+    output_path: Path,
+    profile: ColumnProfile | None = None,
+    notes: list[str] | None = None,
+) -> str:
     title = sanitize_text(spec.get("title"), "真实值-预测值对比图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=2)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=2, profile=profile)
     if not x_col or not y_cols:
         return plot_empty(title, "缺少可绘制的横轴或数值列", output_path)
 
     work = sorted_for_x(df[[x_col, *y_cols]].dropna(how="all"), x_col)
+    thinned = downsample_lines(work, x_col, y_cols, spec, notes)
+    markers = ("o", "s") if len(thinned) == len(work) else (None, None)
+    work = thinned
     x = work[x_col]
     y_actual = safe_numeric(work[y_cols[0]])
     fig, ax = plt.subplots(figsize=(8.8, 5.2))
-    ax.plot(x, y_actual, color=PALETTE["blue"], linewidth=2.2, marker="o", markersize=4, label=y_cols[0])
+    ax.plot(x, y_actual, color=PALETTE["blue"], linewidth=2.2, marker=markers[0], markersize=4, label=y_cols[0])
     label_endpoints(ax, x, y_actual, y_cols[0], PALETTE["blue"])
 
     if len(y_cols) >= 2:
@@ -198,7 +324,7 @@ def plot_prediction_comparison(df: pd.DataFrame, spec: dict[str, Any], output_pa
             y_pred,
             color=PALETTE["orange"],
             linewidth=2.0,
-            marker="s",
+            marker=markers[1],
             markersize=4,
             linestyle="--",
             label=y_cols[1],
@@ -217,16 +343,19 @@ def plot_prediction_comparison(df: pd.DataFrame, spec: dict[str, Any], output_pa
     return save_figure(fig, output_path)
 
 
-def plot_residual_distribution(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_residual_distribution(
+    df: pd.DataFrame, spec: dict[str, Any], output_path: Path, profile: ColumnProfile | None = None, notes: list[str] | None = None
+) -> str:
     title = sanitize_text(spec.get("title"), "残差分布图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=2)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=2, profile=profile)
     if not y_cols:
         return plot_empty(title, "缺少数值列，无法绘制残差分布", output_path)
 
-    actual = safe_numeric(df[y_cols[0]])
+    actual = profile.numeric_series(df, y_cols[0])
     if len(y_cols) >= 2:
-        residual = actual - safe_numeric(df[y_cols[1]])
+        residual = actual - profile.numeric_series(df, y_cols[1])
         subtitle = f"残差 = {y_cols[0]} - {y_cols[1]}。正式论文需说明模型误差来源。"
     else:
         baseline = actual.rolling(window=min(3, max(1, len(actual))), min_periods=1).mean()
@@ -251,10 +380,13 @@ def plot_residual_distribution(df: pd.DataFrame, spec: dict[str, Any], output_pa
     return save_figure(fig, output_path)
 
 
-def plot_model_comparison(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_model_comparison(
+    df: pd.DataFrame, spec: dict[str, Any], output_path: Path, profile: ColumnProfile | None = None, notes: list[str] | None = None
+) -> str:
     title = sanitize_text(spec.get("title"), "模型或方案对比图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=3)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=3, profile=profile)
     if not x_col or not y_cols:
         return plot_empty(title, "缺少分类列或指标列，无法绘制对比图", output_path)
 
@@ -283,14 +415,24 @@ def plot_model_comparison(df: pd.DataFrame, spec: dict[str, Any], output_path: P
     return save_figure(fig, output_path)
 
 
-def plot_sensitivity_curve(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_sensitivity_curve(
+    df: pd.DataFrame,
+    spec: dict[str, Any],
+    output_path: Path,
+    profile: ColumnProfile | None = None,
+    notes: list[str] | None = None,
+) -> str:
     title = sanitize_text(spec.get("title"), "敏感性分析图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=3)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=3, profile=profile)
     if not y_cols:
         return plot_empty(title, "缺少敏感性指标列", output_path)
 
     work = sorted_for_x(df[[x_col, *y_cols]].dropna(how="all"), x_col) if x_col else df[y_cols].copy()
+    thinned = downsample_lines(work, x_col, y_cols, spec, notes)
+    marker = "o" if len(thinned) == len(work) else None
+    work = thinned
     fig, ax = plt.subplots(figsize=(8.8, 5.2))
     x = work[x_col] if x_col and x_col in work.columns else pd.Series(range(len(work)), name="扰动序号")
     for idx, column in enumerate(y_cols):
@@ -298,7 +440,7 @@ def plot_sensitivity_curve(df: pd.DataFrame, spec: dict[str, Any], output_path:
         ax.plot(
             x,
             y,
-            marker="o",
+            marker=marker,
             linewidth=2.0,
             markersize=4,
             color=list(PALETTE.values())[idx % len(PALETTE)],
@@ -311,10 +453,13 @@ def plot_sensitivity_curve(df: pd.DataFrame, spec: dict[str, Any], output_path:
     return save_figure(fig, output_path)
 
 
-def plot_weight_bar(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_weight_bar(
+    df: pd.DataFrame, spec: dict[str, Any], output_path: Path, profile: ColumnProfile | None = None, notes: list[str] | None = None
+) -> str:
     title = sanitize_text(spec.get("title"), "指标权重图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=1)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=1, profile=profile)
     if not y_cols:
         return plot_empty(title, "缺少权重或得分列", output_path)
 
@@ -332,10 +477,13 @@ def plot_weight_bar(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -
     return save_figure(fig, output_path)
 
 
-def plot_score_ranking(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_score_ranking(
+    df: pd.DataFrame, spec: dict[str, Any], output_path: Path, profile: ColumnProfile | None = None, notes: list[str] | None = None
+) -> str:
     title = sanitize_text(spec.get("title"), "综合得分排序图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=1)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=1, profile=profile)
     if not x_col or not y_cols:
         return plot_empty(title, "缺少对象列或得分列", output_path)
 
@@ -349,12 +497,15 @@ def plot_score_ranking(df: pd.DataFrame, spec: dict[str, Any], output_path: Path
     return save_figure(fig, output_path)
 
 
-def plot_heatmap(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_heatmap(
+    df: pd.DataFrame, spec: dict[str, Any], output_path: Path, profile: ColumnProfile | None = None, notes: list[str] | None = None
+) -> str:
     title = sanitize_text(spec.get("title"), "变量关系热力图")
-    nums = numeric_columns(df)
+    profile = profile or column_profile(df)
+    nums = profile.numeric_columns()
     if len(nums) < 2:
         return plot_empty(title, "至少需要两个数值列才能绘制热力图", output_path)
-    corr = df[nums[:10]].apply(pd.to_numeric, errors="coerce").corr()
+    corr = pd.DataFrame({name: profile.numeric[name] for name in nums[:10]}).corr()
     fig, ax = plt.subplots(figsize=(8.2, 6.4))
     mask = np.triu(np.ones_like(corr, dtype=bool))
     sns.heatmap(
@@ -372,22 +523,49 @@ def plot_heatmap(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> s
     return save_figure(fig, output_path)
 
 
-def plot_scatter(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_scatter(
+    df: pd.DataFrame,
+    spec: dict[str, Any],
+    output_path: Path,
+    profile: ColumnProfile | None = None,
+    notes: list[str] | None = None,
+) -> str:
     title = sanitize_text(spec.get("title"), "二维关系散点图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=2)
-    nums = numeric_columns(df)
-    if (not x_col or x_col not in numeric_columns(df)) and nums:
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=2, profile=profile)
+    nums = profile.numeric_columns()
+    if (not x_col or x_col not in profile.numeric) and nums:
         x_col = nums[0]
         y_cols = [col for col in nums if col != x_col][:2]
     if not x_col or not y_cols:
         return plot_empty(title, "缺少可绘制的二维数值列", output_path)
 
     fig, ax = plt.subplots(figsize=(8.4, 5.4))
-    hue_candidates = categorical_columns(df, exclude={x_col, *y_cols})
+    hue_candidates = profile.non_numeric_columns({x_col, *y_cols})
     hue = hue_candidates[0] if hue_candidates and df[hue_candidates[0]].nunique() <= 12 else None
+    data = df
+    limit = point_limit(spec, SCATTER_POINT_LIMIT)
+    if len(df) > limit:
+        # Hexbin keeps every sample but cannot show hue/size; otherwise plot a fixed random subset.
+        method = sanitize_text(spec.get("downsample")).lower() or ("hexbin" if hue is None and len(y_cols) == 1 else "sample")
+        if method == "hexbin":
+            x = profile.numeric_series(df, x_col)
+            y = profile.numeric_series(df, y_cols[0])
+            valid = x.notna() & y.notna()
+            hexes = ax.hexbin(x[valid], y[valid], gridsize=60, cmap="Blues", mincnt=1, linewidths=0)
+            fig.colorbar(hexes, ax=ax, shrink=0.8, label="样本数")
+            ax.set_xlabel(x_col)
+            ax.set_ylabel(y_cols[0])
+            if notes is not None:
+                notes.append(f"hexbin: {len(df)} points in {len(hexes.get_offsets())} cells")
+            apply_title(ax, title, "样本量较大，按六边形网格统计点密度。")
+            return save_figure(fig, output_path)
+        data = df.sample(n=limit, random_state=0)
+        if notes is not None:
+            notes.append(f"sample: {len(df)} -> {limit} points")
     sns.scatterplot(
-        data=df,
+        data=data,
         x=x_col,
         y=y_cols[0],
         hue=hue,
@@ -401,19 +579,29 @@ def plot_scatter(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> s
     return save_figure(fig, output_path)
 
 
-def plot_generic_line(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> str:
+def plot_generic_line(
+    df: pd.DataFrame,
+    spec: dict[str, Any],
+    output_path: Path,
+    profile: ColumnProfile | None = None,
+    notes: list[str] | None = None,
+) -> str:
     title = sanitize_text(spec.get("title"), "趋势变化图")
-    x_col = pick_x(df, spec)
-    y_cols = pick_y(df, spec, x_col, limit=3)
+    profile = profile or column_profile(df)
+    x_col = pick_x(df, spec, profile)
+    y_cols = pick_y(df, spec, x_col, limit=3, profile=profile)
     if not x_col or not y_cols:
         return plot_empty(title, "缺少横轴或数值列", output_path)
     work = sorted_for_x(df[[x_col, *y_cols]].dropna(how="all"), x_col)
+    thinned = downsample_lines(work, x_col, y_cols, spec, notes)
+    marker = "o" if len(thinned) == len(work) else None
+    work = thinned
     fig, ax = plt.subplots(figsize=(8.8, 5.2))
     for idx, column in enumerate(y_cols):
         ax.plot(
             work[x_col],
             safe_numeric(work[column]),
-            marker="o",
+            marker=marker,
             linewidth=2.0,
             markersize=4,
             label=column,
@@ -443,55 +631,16 @@ def plot_empty(title: str, message: str, output_path: Path) -> str:
     return save_figure(fig, output_path)
 
 
-def infer_template(spec: dict[str, Any]) -> str:
-    hint = sanitize_text(spec.get("template_hint")).lower()
-    if hint:
-        return hint[5:] if hint.startswith("plot_") else hint
-    text = f"{spec.get('chart_type', '')} {spec.get('title', '')} {spec.get('purpose', '')}".lower()
-    rules = [
-        ("prediction_comparison", ("预测", "预报", "真实值", "forecast", "prediction")),
-        ("residual_distribution", ("残差", "误差分布", "residual")),
-        ("sensitivity_curve", ("敏感性", "灵敏度", "扰动", "sensitivity")),
-        ("model_comparison", ("模型对比", "方案对比", "基线", "对照", "comparison")),
-        ("weight_bar", ("权重", "指标权重", "weight")),
-        ("score_ranking", ("得分", "排序", "排名", "score", "ranking")),
-        ("heatmap", ("热力", "相关", "矩阵", "heatmap", "correlation")),
-        ("scatter", ("聚类", "分群", "散点", "cluster", "scatter")),
-    ]
-    for template, keywords in rules:
-        if any(keyword in text for keyword in keywords):
-            return template
-    chart_type = sanitize_text(spec.get("chart_type")).lower()
-    if chart_type in {"line", "bar", "scatter", "heatmap"}:
-        return chart_type
-    return "line"
-
-
-def plot_figure_spec(df: pd.DataFrame, spec: dict[str, Any], output_path: Path) -> dict[str, Any]:
-    set_paper_style()
+def plot_figure_spec(df: pd.DataFrame, spec: dict[str, Any], output_path: Path, apply_style: bool = True) -> dict[str, Any]:
+    """Render one plan spec; pass apply_style=False when set_paper_style() already ran in this process."""
+    if apply_style:
+        set_paper_style()
     template = infer_template(spec)
     try:
-        if template == "prediction_comparison":
-            path = plot_prediction_comparison(df, spec, output_path)
-        elif template == "residual_distribution":
-            path = plot_residual_distribution(df, spec, output_path)
-        elif template == "sensitivity_curve":
-            path = plot_sensitivity_curve(df, spec, output_path)
-        elif template == "model_comparison":
-            path = plot_model_comparison(df, spec, output_path)
-        elif template == "weight_bar":
-            path = plot_weight_bar(df, spec, output_path)
-        elif template == "score_ranking":
-            path = plot_score_ranking(df, spec, output_path)
-        elif template == "heatmap":
-            path = plot_heatmap(df, spec, output_path)
-        elif template == "scatter":
-            path = plot_scatter(df, spec, output_path)
-        elif template == "bar":
-            path = plot_model_comparison(df, spec, output_path)
-        else:
-            path = plot_generic_line(df, spec, output_path)
-        return {"ok": True, "path": path, "template": template, "message": ""}
+        profile = column_profile(df)
+        notes: list[str] = []
+        path = load_renderer(template)(df, spec, output_path, profile, notes)
+        return {"ok": True, "path": path, "template": template, "message": "", "downsampling": "; ".join(notes)}
     except Exception as exc:
         fallback = plot_empty(sanitize_text(spec.get("title"), "图表模板"), str(exc), output_path)
-        return {"ok": False, "path": fallback, "template": template, "message": str(exc)}
+        return {"ok": False, "path": fallback, "template": template, "message": str(exc), "downsampling": ""}
@@ -1,83 +1,115 @@
+import argparse
+import json
+import time
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
-import platform
+
+from font_resolver import apply_cjk_font
+from render_cache import is_fresh, load_manifest, render_key, save_manifest
 
 INPUT_DIR = Path("paper_output/data_cleaned")
 OUTPUT_DIR = Path("paper_output/figures")
+EDA_REPORT_FILE = OUTPUT_DIR / "eda_report.json"
+MAX_COLS = 20
+SAMPLE_ROWS = 20000
+ANNOT_MAX_COLS = 15
 
 def set_chinese_font():
-    """设置 Matplotlib 中文字体，兼容 Windows/Mac/Linux"""
-    system = platform.system()
-    fonts = []
-    
-    if system == 'Windows':
-        fonts = ['SimHei', 'Microsoft YaHei', 'KaiTi', 'FangSong']
-    elif system == 'Darwin':
-        fonts = ['Arial Unicode MS', 'PingFang SC', 'Heiti TC']
+    """设置 Matplotlib 中文字体：按字形覆盖检查选字体，结果缓存在 paper_output/cache/font.json"""
+    font = apply_cjk_font()
+    if font:
+        print(f"🔤 已启用中文字体: {font}")
     else:
-        fonts = ['WenQuanYi Micro Hei', 'Droid Sans Fallback']
-        
-    for font in fonts:
-        try:
-            plt.rcParams['font.sans-serif'] = [font]
-            fig = plt.figure()
-            plt.text(0.5, 0.5, '测试')
-            plt.close(fig)
-            print(f"🔤 已启用中文字体: {font}")
-            plt.rcParams['axes.unicode_minus'] = False
-            return
-        except:
-            continue
-    print("⚠️ 未找到合适的中文字体，图表中文可能显示为乱码。")
+        print("⚠️ 未找到合适的中文字体，图表中文可能显示为乱码。")
+
+def fast_corr(frame):
+    """一次向量化计算相关矩阵；有缺失值时退回 pandas 的成对计算。"""
+    values = frame.to_numpy(dtype=float)
+    if np.isnan(values).any():
+        return frame.corr()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.corrcoef(values, rowvar=False)
+    return pd.DataFrame(np.atleast_2d(corr), index=frame.columns, columns=frame.columns)
+
+def save_chart(saved, charts, path, chart, rows, started):
+    plt.savefig(path, dpi=300)
+    plt.close("all")
+    saved.append(path)
+    charts.append({"chart": chart, "file": path.as_posix(), "rows": int(rows), "seconds": round(time.perf_counter() - started, 3)})
+
+def visualize_dataset(file_path: Path, previous=None, sample_rows=SAMPLE_ROWS, annot_max_cols=ANNOT_MAX_COLS):
+    """返回 (渲染缓存条目, EDA 报告条目)；数据、脚本与样式均未变化且图片都在时直接跳过。
+
+    行数超过 sample_rows 时进入快速模式：直方图仍用全量数据（按密度归一），
+    KDE 曲线和 pairplot 只用固定随机种子的抽样行；数值列超过 annot_max_cols
+    时热力图不再逐格标注数值。
+    """
+    dataset_output_dir = OUTPUT_DIR / file_path.stem
+    spec = {"dataset": file_path.as_posix(), "max_cols": MAX_COLS, "sample_rows": sample_rows, "annot_max_cols": annot_max_cols}
+    key = render_key(spec, file_path, Path(__file__))
+    if is_fresh(previous, key):
+        print(f"♻️ 跳过未变化的数据集: {file_path.name}")
+        # Listing the reused files lets workflow_dag.py notice when one was deleted.
+        return previous, {"dataset": file_path.name, "cached": True, "charts": [{"file": path} for path in previous.get("files", [])]}
 
-def visualize_dataset(file_path: Path):
     print(f"📊 正在可视化: {file_path.name} ...")
+    saved = []
+    charts = []
+    dataset_started = time.perf_counter()
     
     try:
         df = pd.read_csv(file_path)
+        rows = len(df)
+        fast = bool(sample_rows) and rows > sample_rows
+        sample = df.sample(n=sample_rows, random_state=0) if fast else df
+        if fast:
+            print(f"⚡ 快速模式: {rows} 行，KDE/pairplot 抽样 {sample_rows} 行")
         
-        dataset_output_dir = OUTPUT_DIR / file_path.stem
         dataset_output_dir.mkdir(parents=True, exist_ok=True)
         
         num_cols = df.select_dtypes(include=[np.number]).columns
         cat_cols = df.select_dtypes(exclude=[np.number]).columns
         
-        MAX_COLS = 20
         for i, col in enumerate(num_cols):
             if i >= MAX_COLS:
                 break
+            started = time.perf_counter()
             plt.figure(figsize=(10, 6))
-            sns.histplot(df[col], kde=True, bins=30)
+            if fast:
+                sns.histplot(df[col], bins=30, stat="density")
+                sns.kdeplot(sample[col], color="#dc2626")
+                plt.ylabel("密度")
+            else:
+                sns.histplot(df[col], kde=True, bins=30)
+                plt.ylabel("频数")
             plt.title(f"{col} 分布图")
             plt.xlabel(col)
-            plt.ylabel("频数")
             plt.tight_layout()
-            plt.savefig(dataset_output_dir / f"dist_{i}_{col}.png", dpi=300)
-            plt.close()
+            save_chart(saved, charts, dataset_output_dir / f"dist_{i}_{col}.png", "histogram", rows, started)
             
         if len(num_cols) > 1:
+            started = time.perf_counter()
             plt.figure(figsize=(12, 10))
-            corr = df[num_cols].corr()
+            corr = fast_corr(df[num_cols])
             mask = np.triu(np.ones_like(corr, dtype=bool))
-            sns.heatmap(corr, mask=mask, annot=True, fmt=".2f", cmap='coolwarm', 
+            sns.heatmap(corr, mask=mask, annot=len(num_cols) <= annot_max_cols, fmt=".2f", cmap='coolwarm', 
                         linewidths=0.5, square=True, cbar_kws={"shrink": .5})
             plt.title("变量相关性热力图")
             plt.tight_layout()
-            plt.savefig(dataset_output_dir / "correlation_heatmap.png", dpi=300)
-            plt.close()
+            save_chart(saved, charts, dataset_output_dir / "correlation_heatmap.png", "correlation_heatmap", rows, started)
             
         if len(num_cols) > 1:
             variances = df[num_cols].var()
             top_cols = variances.nlargest(5).index.tolist()
             
             if len(top_cols) > 1:
-                plt.figure()
-                sns.pairplot(df[top_cols], kind='scatter', diag_kind='kde', plot_kws={'alpha': 0.6})
-                plt.savefig(dataset_output_dir / "pairplot_top5.png", dpi=300)
-                plt.close()
+                started = time.perf_counter()
+                sns.pairplot(sample[top_cols], kind='scatter', diag_kind='kde', plot_kws={'alpha': 0.6})
+                save_chart(saved, charts, dataset_output_dir / "pairplot_top5.png", "pairplot", len(sample), started)
         
         for i, col in enumerate(cat_cols):
             if i >= MAX_COLS:
@@ -85,6 +117,7 @@ def visualize_dataset(file_path: Path):
             if df[col].nunique() > 50:
                 continue
                 
+            started = time.perf_counter()
             plt.figure(figsize=(10, 6))
             val_counts = df[col].value_counts().nlargest(20)
             sns.barplot(x=val_counts.index, y=val_counts.values)
@@ -93,15 +126,30 @@ def visualize_dataset(file_path: Path):
             plt.ylabel("频数")
             plt.xticks(rotation=45)
             plt.tight_layout()
-            plt.savefig(dataset_output_dir / f"cat_{i}_{col}.png", dpi=300)
-            plt.close()
+            save_chart(saved, charts, dataset_output_dir / f"cat_{i}_{col}.png", "category_counts", rows, started)
 
         print(f"✅ 可视化完成: 已保存至 {dataset_output_dir}")
+        report = {
+            "dataset": file_path.name,
+            "cached": False,
+            "rows": rows,
+            "fast_mode": fast,
+            "sampled_rows": len(sample),
+            "seconds": round(time.perf_counter() - dataset_started, 3),
+            "charts": charts,
+        }
+        return {"key": key, "files": [path.as_posix() for path in saved]}, report
 
     except Exception as e:
         print(f"❌ 可视化 {file_path.name} 时出错: {str(e)}")
+        return None, {"dataset": file_path.name, "cached": False, "error": str(e), "charts": charts}
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate EDA figures for paper_output/data_cleaned/*.csv.")
+    parser.add_argument("--sample-rows", type=int, default=SAMPLE_ROWS, help="Above N rows, sample N rows for KDE curves and the pairplot; 0 always uses every row.")
+    parser.add_argument("--annot-max-cols", type=int, default=ANNOT_MAX_COLS, help="Annotate correlation heatmap cells only up to N numeric columns.")
+    args = parser.parse_args()
+
     if not INPUT_DIR.exists():
         print(f"⚠️ 找不到清洗后的数据目录: {INPUT_DIR}")
         print("请先运行数据清洗脚本 (clean_data.py)。")
@@ -113,14 +161,31 @@ def main():
         print(f"⚠️ {INPUT_DIR} 下没有 CSV 文件。")
         return
         
-    set_chinese_font()
     sns.set_theme(style="whitegrid")
     set_chinese_font()
     
     print(f"📄 找到 {len(files)} 个已清洗的数据文件。")
     
+    entries = load_manifest()
+    updates = {}
+    reports = []
     for f in files:
-        visualize_dataset(f)
+        cache_id = (OUTPUT_DIR / f.stem).as_posix()
+        entry, report = visualize_dataset(f, entries.get(cache_id), args.sample_rows, args.annot_max_cols)
+        reports.append(report)
+        if entry:
+            updates[cache_id] = entry
+    save_manifest(updates)
+    EDA_REPORT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    EDA_REPORT_FILE.write_text(
+        json.dumps(
+            {"schema_version": "1.0", "sample_rows": args.sample_rows, "annot_max_cols": args.annot_max_cols, "datasets": reports},
+            ensure_ascii=False,
+            indent=2,
+        ),
+        encoding="utf-8",
+    )
+    print(f"⏱️ EDA 计时报告: {EDA_REPORT_FILE}")
         
     print("\n✨ 所有可视化任务已完成。")
 
@@ -0,0 +1,189 @@
+"""Streaming .xlsx inspection shared by robust_loader.py and preflight_check.py.
+
+Reads the sheet XML straight from the zip with iterparse and drops each row
+once it has been seen. Memory stays bounded on large sheets, and there is no
+second full openpyxl load just to count merged cells. Values in the sampled
+header row follow openpyxl's read-only conversion. The exception is numbers
+styled as dates, which are reported as plain numbers.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import iterparse
+
+REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+
+def local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def split_ref(ref: str) -> tuple[int, int]:
+    """'AB12' -> (12, 28)."""
+    col = 0
+    digits = ""
+    for char in ref:
+        if char.isalpha():
+            col = col * 26 + ord(char.upper()) - 64
+        else:
+            digits += char
+    return int(digits or 0), col
+
+
+def resolve_target(base_dir: str, target: str) -> str:
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def read_rels(archive: zipfile.ZipFile, rels_path: str, base_dir: str) -> dict[str, tuple[str, str]]:
+    if rels_path not in archive.namelist():
+        return {}
+    rels: dict[str, tuple[str, str]] = {}
+    with archive.open(rels_path) as handle:
+        for _, elem in iterparse(handle):
+            if local_name(elem.tag) == "Relationship":
+                rels[elem.get("Id", "")] = (resolve_target(base_dir, elem.get("Target", "")), elem.get("Type", ""))
+    return rels
+
+
+def workbook_parts(archive: zipfile.ZipFile) -> tuple[list[tuple[str, str]], str | None]:
+    """Worksheet (name, part path) pairs in workbook order, plus the shared strings part."""
+    workbook = "xl/workbook.xml"
+    for target, rel_type in read_rels(archive, "_rels/.rels", "").values():
+        if rel_type.endswith("/officeDocument"):
+            workbook = target
+    base_dir = posixpath.dirname(workbook)
+    rels = read_rels(archive, posixpath.join(base_dir, "_rels", posixpath.basename(workbook) + ".rels"), base_dir)
+    shared = next((target for target, rel_type in rels.values() if rel_type.endswith("/sharedStrings")), None)
+    sheets: list[tuple[str, str]] = []
+    with archive.open(workbook) as handle:
+        for _, elem in iterparse(handle):
+            if local_name(elem.tag) == "sheet":
+                target, rel_type = rels.get(elem.get(REL_ID, ""), ("", ""))
+                if rel_type.endswith("/worksheet"):
+                    sheets.append((elem.get("name", ""), target))
+    return sheets, shared
+
+
+def rich_text(elem) -> str:
+    """Text of an <si>/<is> element, skipping phonetic runs like openpyxl."""
+    parts = []
+    for child in elem:
+        name = local_name(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            parts.extend(t.text or "" for t in child if local_name(t.tag) == "t")
+    return "".join(parts)
+
+
+def shared_strings(archive: zipfile.ZipFile, part: str | None, wanted: set[int]) -> dict[int, str]:
+    """Only the requested indexes; parsing stops after the largest one."""
+    if not wanted or not part or part not in archive.namelist():
+        return {}
+    last = max(wanted)
+    found: dict[int, str] = {}
+    index = 0
+    with archive.open(part) as handle:
+        for _, elem in iterparse(handle):
+            if local_name(elem.tag) != "si":
+                continue
+            if index in wanted:
+                found[index] = rich_text(elem)
+            elem.clear()
+            index += 1
+            if index > last:
+                break
+    return found
+
+
+def cell_text(cell) -> tuple[str, Any]:
+    cell_type = cell.get("t", "n")
+    value = None
+    for child in cell:
+        name = local_name(child.tag)
+        if name == "v":
+            value = child.text
+        elif name == "is":
+            return "text", rich_text(child)
+    if value is None:
+        return "text", ""
+    if cell_type == "s":
+        return "shared", int(value)
+    if cell_type == "b":
+        return "text", str(value == "1")
+    if cell_type == "n":
+        number = float(value) if any(char in value for char in ".Ee") else int(value)
+        return "text", str(number)
+    return "text", value
+
+
+def scan_sheet(archive: zipfile.ZipFile, part: str, sample_limit: int) -> dict[str, Any]:
+    dimension: tuple[int, int] | None = None
+    max_row = max_col = 0
+    merged = 0
+    header: dict[int, tuple[str, Any]] = {}
+    sheet_data = None
+    with archive.open(part) as handle:
+        for event, elem in iterparse(handle, events=("start", "end")):
+            name = local_name(elem.tag)
+            if event == "start":
+                if name == "sheetData":
+                    sheet_data = elem
+                continue
+            if name == "dimension":
+                dimension = split_ref(elem.get("ref", "A1").split(":")[-1])
+            elif name == "row":
+                row_index = int(elem.get("r") or max_row + 1)
+                col = 0
+                for cell in elem:
+                    if local_name(cell.tag) != "c":
+                        continue
+                    ref = cell.get("r")
+                    col = split_ref(ref)[1] if ref else col + 1
+                    max_col = max(max_col, col)
+                    if row_index == 1 and col <= sample_limit:
+                        header[col] = cell_text(cell)
+                max_row = max(max_row, row_index)
+                elem.clear()
+                if sheet_data is not None:
+                    sheet_data.clear()
+            elif name == "mergeCell":
+                merged += 1
+    rows, cols = dimension if dimension else (max_row, max_col)
+    return {"rows": rows, "cols": cols, "header": header, "has_rows": max_row > 0, "merged_cells": merged}
+
+
+def inspect_workbook(path: Path, sample_limit: int = 12) -> dict[str, Any]:
+    """Per-sheet rows/cols/sample_cols/merged_cells in one bounded-memory pass.
+
+    Raises zipfile.BadZipFile/KeyError/ParseError for broken files; callers turn
+    those into report errors.
+    """
+    with zipfile.ZipFile(path) as archive:
+        parts, shared_part = workbook_parts(archive)
+        scanned = [(name, scan_sheet(archive, part, sample_limit)) for name, part in parts]
+        wanted = {value for _, sheet in scanned for kind, value in sheet["header"].values() if kind == "shared"}
+        strings = shared_strings(archive, shared_part, wanted)
+    sheets = []
+    for name, sheet in scanned:
+        sample_cols: list[str] = []
+        if sheet["rows"] and sheet["cols"] and sheet["has_rows"]:
+            for col in range(1, min(sheet["cols"], sample_limit) + 1):
+                kind, value = sheet["header"].get(col, ("text", ""))
+                sample_cols.append(strings.get(value, "") if kind == "shared" else value)
+        sheets.append(
+            {
+                "name": name,
+                "rows": sheet["rows"],
+                "cols": sheet["cols"],
+                "sample_cols": sample_cols,
+                "merged_cells": sheet["merged_cells"],
+            }
+        )
+    return {"sheets": sheets, "merged_cells": sum(sheet["merged_cells"] for sheet in sheets)}
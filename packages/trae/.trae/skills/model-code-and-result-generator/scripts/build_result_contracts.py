@@ -10,6 +10,15 @@ from typing import Any
 
 from result_contract_templates import metric_templates, result_type, suggested_table_titles
 
+# Shared one-pass column profiler from data-cleaning-and-visualization.
+DATA_SKILL_SCRIPTS = Path(__file__).resolve().parents[2] / "data-cleaning-and-visualization" / "scripts"
+if str(DATA_SKILL_SCRIPTS) not in sys.path:
+    sys.path.append(str(DATA_SKILL_SCRIPTS))
+try:
+    from data_profile import profile_path
+except ImportError:
+    profile_path = None
+
 
 BASE_DIR = Path.cwd().resolve()
 OUTPUT_DIR = BASE_DIR / "paper_output"
@@ -23,6 +32,8 @@ DATA_PLAN_FILE = PLAN_DIR / "data_plan.json"
 VISUALIZATION_PLAN_FILE = PLAN_DIR / "visualization_plan.json"
 GENERATED_BY = "model-code-and-result-generator/scripts/build_result_contracts.py"
 MANAGED_MARKER = "# Generated by MathModel Skill scaffold generator."
+# Copied next to result_contract_io.py, which imports both; csv_sniff.py also imports file_lock.py.
+SHARED_DATA_MODULES = ("csv_sniff.py", "file_lock.py")
 DRAFT_STATUSES = {"", "draft_contract", "needs_real_modeling", "to_be_filled"}
 
 
@@ -155,7 +166,40 @@ def to_float(value: object) -> float | None:
         return None
 
 
+def round_stat(value: Any) -> Any:
+    return "" if value is None else round(float(value), 6)
+
+
+def profile_csv_from_cache(path: Path) -> tuple[list[dict[str, Any]], int] | None:
+    """Whole-file field rows from paper_output/cache/data_profile.json; None when the profiler is unavailable."""
+    if profile_path is None:
+        return None
+    try:
+        stats = profile_path(path)
+    except Exception:
+        return None
+    rows = int(stats.get("rows") or 0)
+    profiles = [
+        {
+            "field": column["name"],
+            "sample_rows": rows,
+            "non_null_count": column["non_null"],
+            "missing_count": column["nulls"],
+            "inferred_type": "numeric" if column["votes"]["numeric"] >= max(1, column["non_null"] // 2) else "text",
+            "mean": round_stat(column.get("mean")),
+            "std": round_stat(column.get("std")),
+            "min": round_stat(column.get("min")),
+            "max": round_stat(column.get("max")),
+        }
+        for column in stats.get("columns") or []
+    ]
+    return (profiles, rows) if rows else ([], 0)
+
+
 def profile_csv(path: Path) -> tuple[list[dict[str, Any]], int]:
+    cached = profile_csv_from_cache(path)
+    if cached is not None:
+        return cached
     rows = read_csv_rows(path)
     if not rows:
         return [], 0
@@ -293,8 +337,11 @@ RESULT_CONTRACT_IO_CODE = r'''# Generated by MathModel Skill scaffold generator.
 from __future__ import annotations
 
 import csv
+import hashlib
 import json
 import math
+import os
+import shutil
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -302,6 +349,12 @@ from typing import Any
 
 import numpy as np
 import pandas as pd
+from file_lock import locked
+
+try:
+    from csv_sniff import sniff_csv
+except ImportError:
+    sniff_csv = None
 
 
 THIS_FILE = Path(__file__).resolve()
@@ -319,6 +372,24 @@ OUTPUT_DIR = PROJECT_ROOT / "paper_output"
 RESULTS_DIR = OUTPUT_DIR / "results"
 TABLES_DIR = OUTPUT_DIR / "tables"
 DATA_CLEANED_DIR = OUTPUT_DIR / "data_cleaned"
+# Shard writes and compaction hold locked(CONTRACTS_LOCK_TARGET), i.e. results/.contracts.lock.
+CONTRACTS_LOCK_TARGET = RESULTS_DIR / "contracts"
+SHARD_DIR = RESULTS_DIR / "shards"
+CONTRACT_FILES = {
+    "model_results": (RESULTS_DIR / "model_results.json", "questions"),
+    "metrics": (RESULTS_DIR / "metrics.json", "items"),
+    "conclusions": (RESULTS_DIR / "conclusions.json", "items"),
+    "table_index": (TABLES_DIR / "table_index.json", "tables"),
+}
+# run_modeling.py sets this so question scripts only write shards and the runner compacts once;
+# a q*_model.py run on its own compacts right after writing its shard.
+DEFER_COMPACTION_ENV = "MATHMODEL_DEFER_CONTRACT_COMPACTION"
+DATASET_CACHE_DIR = OUTPUT_DIR / "cache" / "datasets"
+# DataFrame.attrs flag marking numeric_frame() output, so handlers do not coerce it twice.
+NUMERIC_FRAME_ATTR = "numeric_frame"
+# Same cache file as the data-cleaning stage; csv_sniff.py is copied next to this helper.
+CSV_SNIFF_CACHE = OUTPUT_DIR / "cache" / "csv_sniff.json"
+SCAFFOLD_TABLE_NOTE = "status=scaffold_result_needs_review 的表格来自自动脚手架，正式提交前应由 Agent 结合真实赛题复核或改写。"
 
 
 def now() -> str:
@@ -339,12 +410,33 @@ def current_runner_path() -> Path:
     return THIS_FILE
 
 
+def file_fingerprint(path_text: str) -> dict[str, Any] | None:
+    path = Path(path_text)
+    path = path if path.is_absolute() else PROJECT_ROOT / path
+    if not path.is_file():
+        return None
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return {"sha256": digest.hexdigest(), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
 def execution_provenance(outputs: list[dict[str, Any]], input_files: list[str] | None = None) -> dict[str, Any]:
+    """Run record for model_results.json; file_hashes lets evidence_gate.py detect stale or edited files."""
     runner = current_runner_path()
     artifacts = []
     for item in outputs:
         if isinstance(item, dict) and item.get("path"):
             artifacts.append(str(item["path"]))
+    roles = {"source_code": [rel(runner)], "helper": [rel(THIS_FILE)], "input": input_files or [], "output": artifacts}
+    file_hashes = {}
+    for role, paths in roles.items():
+        for path_text in paths:
+            fingerprint = file_fingerprint(path_text)
+            if fingerprint is not None:
+                file_hashes.setdefault(path_text, {"role": role, **fingerprint})
     return {
         "source_code_path": rel(runner),
         "helper_path": rel(THIS_FILE),
@@ -352,6 +444,8 @@ def execution_provenance(outputs: list[dict[str, Any]], input_files: list[str] |
         "run_exit_code": 0,
         "input_files": input_files or [],
         "output_artifacts": artifacts,
+        "hash_algorithm": "sha256",
+        "file_hashes": file_hashes,
         "generated_at": now(),
     }
 
@@ -384,7 +478,9 @@ def load_json(path: Path, default: Any) -> Any:
 
 def write_json(path: Path, data: Any) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    temp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temp_path, path)
 
 
 def safe_slug(text: object) -> str:
@@ -400,15 +496,27 @@ def find_cleaned_csv_files() -> list[Path]:
     return sorted(DATA_CLEANED_DIR.rglob("*.csv"), key=lambda item: item.as_posix().lower())
 
 
-def read_dataframe(path: Path) -> pd.DataFrame:
-    for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
+def read_dataframe_with_encoding(path: Path) -> tuple[pd.DataFrame, str]:
+    attempts: list[tuple[str, str]] = []
+    if sniff_csv is not None:
+        try:
+            sniffed = sniff_csv(path, CSV_SNIFF_CACHE)
+            attempts.append((sniffed["encoding"], sniffed["sep"]))
+        except Exception:
+            pass
+    attempts += [(encoding, ",") for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030") if (encoding, ",") not in attempts]
+    for encoding, sep in attempts:
         try:
-            return pd.read_csv(path, encoding=encoding)
+            return pd.read_csv(path, encoding=encoding, sep=sep), encoding
         except Exception:
             continue
     raise RuntimeError(f"Unable to read CSV: {path}")
 
 
+def read_dataframe(path: Path) -> pd.DataFrame:
+    return read_dataframe_with_encoding(path)[0]
+
+
 def load_first_dataset() -> tuple[pd.DataFrame | None, Path | None]:
     for path in find_cleaned_csv_files():
         try:
@@ -421,12 +529,90 @@ def load_first_dataset() -> tuple[pd.DataFrame | None, Path | None]:
 
 
 def numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Keep the mostly-numeric columns as floats; frames this already produced are returned as-is."""
+    if df.attrs.get(NUMERIC_FRAME_ATTR):
+        return df
     converted = pd.DataFrame()
     for col in df.columns:
         values = pd.to_numeric(df[col], errors="coerce")
         if values.notna().sum() >= max(2, int(len(df) * 0.5)):
             converted[str(col)] = values
-    return converted.replace([np.inf, -np.inf], np.nan)
+    converted = converted.replace([np.inf, -np.inf], np.nan)
+    converted.attrs[NUMERIC_FRAME_ATTR] = True
+    return converted
+
+
+def dataset_cache_dir(path: Path) -> Path:
+    key = hashlib.sha1(rel(path).encode("utf-8")).hexdigest()[:16]
+    return DATASET_CACHE_DIR / f"{safe_slug(path.stem)[:40]}_{key}"
+
+
+def source_signature(path: Path) -> dict[str, Any]:
+    stat = path.stat()
+    return {"source": rel(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def load_cached_numeric_frame(path: Path) -> pd.DataFrame | None:
+    cache_dir = dataset_cache_dir(path)
+    meta = load_json(cache_dir / "meta.json", None)
+    if not isinstance(meta, dict) or meta.get("signature") != source_signature(path):
+        return None
+    try:
+        columns = {
+            item["name"]: np.load(cache_dir / item["file"], mmap_mode="c", allow_pickle=False)
+            for item in meta.get("columns", [])
+        }
+    except Exception:
+        return None
+    # copy=False keeps each column backed by its memory-mapped .npy file.
+    frame = pd.DataFrame(columns, index=pd.RangeIndex(int(meta.get("rows", 0))), copy=False)
+    frame.attrs[NUMERIC_FRAME_ATTR] = True
+    return frame
+
+
+def store_numeric_frame_cache(path: Path, encoding: str, num: pd.DataFrame) -> None:
+    cache_dir = dataset_cache_dir(path)
+    temp_dir = cache_dir.with_name(f".{cache_dir.name}.{os.getpid()}.tmp")
+    try:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        temp_dir.mkdir(parents=True)
+        columns = []
+        for index, col in enumerate(num.columns):
+            filename = f"col_{index:04d}.npy"
+            np.save(temp_dir / filename, num[col].to_numpy(), allow_pickle=False)
+            columns.append({"name": str(col), "file": filename, "dtype": str(num[col].dtype)})
+        meta = {
+            "schema_version": "1.0",
+            "generated_by": "paper_output/code/modeling/result_contract_io.py",
+            "generated_at": now(),
+            "signature": source_signature(path),
+            "encoding": encoding,
+            "rows": len(num),
+            "columns": columns,
+        }
+        write_json(temp_dir / "meta.json", meta)
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        os.replace(temp_dir, cache_dir)
+    except OSError:
+        # Another question script published the same cache first; its copy is equivalent.
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def load_first_numeric_dataset() -> tuple[pd.DataFrame | None, Path | None]:
+    """Like load_first_dataset() but returns numeric_frame() output, served from paper_output/cache/datasets/ when the source is unchanged."""
+    for path in find_cleaned_csv_files():
+        cached = load_cached_numeric_frame(path)
+        if cached is not None:
+            return cached, path
+        try:
+            df, encoding = read_dataframe_with_encoding(path)
+        except Exception:
+            continue
+        if not df.empty:
+            num = numeric_frame(df)
+            store_numeric_frame_cache(path, encoding, num)
+            return num, path
+    return None, None
 
 
 def minmax(series: pd.Series) -> pd.Series:
@@ -476,6 +662,64 @@ def table_entry(question_id: str, table_id: str, title: str, purpose: str, path:
     }
 
 
+def merge_question_shard(contracts: dict[str, dict[str, Any]], shard: dict[str, Any]) -> None:
+    qid = str(shard.get("question_id"))
+    model_results = contracts["model_results"]
+    questions = [item for item in model_results.get("questions", []) if str(item.get("question_id")) != qid]
+    questions.append(shard["model_result"])
+    model_results["questions"] = questions
+
+    for key in ("metrics", "conclusions"):
+        contract = contracts[key]
+        items = [item for item in contract.get("items", []) if str(item.get("question_id")) != qid]
+        items.extend(shard.get(key, []))
+        contract["items"] = items
+
+    table_contract = contracts["table_index"]
+    tables = shard.get("tables", [])
+    new_table_ids = {str(item.get("table_id")) for item in tables}
+    table_items = [item for item in table_contract.get("tables", []) if str(item.get("table_id")) not in new_table_ids]
+    table_items.extend(tables)
+    table_contract["tables"] = table_items
+    notes = table_contract.setdefault("notes", [])
+    if SCAFFOLD_TABLE_NOTE not in notes:
+        notes.append(SCAFFOLD_TABLE_NOTE)
+
+
+def compact_contracts() -> list[str]:
+    """Fold pending per-question shards into the four canonical contract files."""
+    with locked(CONTRACTS_LOCK_TARGET):
+        shard_paths = sorted(SHARD_DIR.glob("*.json")) if SHARD_DIR.exists() else []
+        if not shard_paths:
+            return []
+        common = {
+            "schema_version": "1.0",
+            "generated_by": "paper_output/code/modeling/result_contract_io.py",
+            "generated_at": now(),
+        }
+        contracts = {key: load_json(path, {**common, field: []}) for key, (path, field) in CONTRACT_FILES.items()}
+        for contract in contracts.values():
+            contract.setdefault("schema_version", "1.0")
+            contract["generated_at"] = now()
+
+        merged: list[str] = []
+        consumed: list[Path] = []
+        for shard_path in shard_paths:
+            shard = load_json(shard_path, None)
+            if not isinstance(shard, dict) or not isinstance(shard.get("model_result"), dict):
+                print(f"[warning] skipped unreadable contract shard: {rel(shard_path)}")
+                continue
+            merge_question_shard(contracts, shard)
+            merged.append(str(shard.get("question_id")))
+            consumed.append(shard_path)
+
+        for key, (path, _) in CONTRACT_FILES.items():
+            write_json(path, contracts[key])
+        for shard_path in consumed:
+            shard_path.unlink(missing_ok=True)
+    return merged
+
+
 def upsert_question_contracts(
     question: dict[str, Any],
     result_summary: str,
@@ -485,6 +729,7 @@ def upsert_question_contracts(
     outputs: list[dict[str, Any]],
     parameters: list[dict[str, Any]] | None = None,
     status: str = "scaffold_result_needs_review",
+    input_files: list[str] | None = None,
 ) -> None:
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
     TABLES_DIR.mkdir(parents=True, exist_ok=True)
@@ -493,65 +738,32 @@ def upsert_question_contracts(
     task_type = str(question.get("task_type") or "")
     main_model = str(question.get("main_model") or question.get("baseline_model") or "")
 
-    model_results_path = RESULTS_DIR / "model_results.json"
-    metrics_path = RESULTS_DIR / "metrics.json"
-    conclusions_path = RESULTS_DIR / "conclusions.json"
-    table_index_path = TABLES_DIR / "table_index.json"
-
-    common = {
+    shard = {
         "schema_version": "1.0",
-        "generated_by": "paper_output/code/modeling/result_contract_io.py",
-        "generated_at": now(),
-    }
-    model_results = load_json(model_results_path, {**common, "questions": []})
-    metric_contract = load_json(metrics_path, {**common, "items": []})
-    conclusion_contract = load_json(conclusions_path, {**common, "items": []})
-    table_contract = load_json(table_index_path, {**common, "tables": []})
-
-    for contract in (model_results, metric_contract, conclusion_contract, table_contract):
-        contract.setdefault("schema_version", "1.0")
-        contract["generated_at"] = now()
-
-    result_item = {
         "question_id": qid,
-        "title": title,
-        "task_type": task_type,
-        "result_type": normalize_task_type(task_type),
-        "main_model": main_model,
-        "baseline_model": question.get("baseline_model", ""),
-        "result_summary": result_summary,
-        "outputs": outputs,
-        "parameters": parameters or [],
-        "evidence_status": status,
-        "status": status,
-        "execution_provenance": execution_provenance(outputs),
+        "generated_at": now(),
+        "model_result": {
+            "question_id": qid,
+            "title": title,
+            "task_type": task_type,
+            "result_type": normalize_task_type(task_type),
+            "main_model": main_model,
+            "baseline_model": question.get("baseline_model", ""),
+            "result_summary": result_summary,
+            "outputs": outputs,
+            "parameters": parameters or [],
+            "evidence_status": status,
+            "status": status,
+            "execution_provenance": execution_provenance(outputs, input_files),
+        },
+        "metrics": [{"question_id": qid, "status": status, **metric} for metric in metrics],
+        "conclusions": conclusions,
+        "tables": tables,
     }
-    questions = [item for item in model_results.get("questions", []) if str(item.get("question_id")) != qid]
-    questions.append(result_item)
-    model_results["questions"] = questions
-
-    metric_items = [item for item in metric_contract.get("items", []) if str(item.get("question_id")) != qid]
-    for metric in metrics:
-        metric_items.append({"question_id": qid, "status": status, **metric})
-    metric_contract["items"] = metric_items
-
-    conclusion_items = [item for item in conclusion_contract.get("items", []) if str(item.get("question_id")) != qid]
-    conclusion_items.extend(conclusions)
-    conclusion_contract["items"] = conclusion_items
-
-    new_table_ids = {str(item.get("table_id")) for item in tables}
-    table_items = [item for item in table_contract.get("tables", []) if str(item.get("table_id")) not in new_table_ids]
-    table_items.extend(tables)
-    table_contract["tables"] = table_items
-    notes = table_contract.setdefault("notes", [])
-    note = "status=scaffold_result_needs_review 的表格来自自动脚手架，正式提交前应由 Agent 结合真实赛题复核或改写。"
-    if note not in notes:
-        notes.append(note)
-
-    write_json(model_results_path, model_results)
-    write_json(metrics_path, metric_contract)
-    write_json(conclusions_path, conclusion_contract)
-    write_json(table_index_path, table_contract)
+    with locked(CONTRACTS_LOCK_TARGET):
+        write_json(SHARD_DIR / f"{safe_slug(qid)}.json", shard)
+    if os.environ.get(DEFER_COMPACTION_ENV) != "1":
+        compact_contracts()
 
 
 def no_data_result(question: dict[str, Any]) -> int:
@@ -618,6 +830,7 @@ def run_forecasting(question: dict[str, Any], df: pd.DataFrame, source_path: Pat
         tables=[table_entry(qid, table_id, f"{qid} 预测结果脚手架表", "保存实际值、预测值和残差，供 Agent 二次替换为正式建模结果。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成可运行预测脚手架，但目标列和特征列仍需按题意复核。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "forecast_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "target_column", "value": str(target)}, {"name": "feature_columns", "value": list(map(str, feature_cols))}],
     )
     return 0
@@ -650,6 +863,7 @@ def run_optimization(question: dict[str, Any], df: pd.DataFrame, source_path: Pa
         tables=[table_entry(qid, table_id, f"{qid} 优化方案脚手架表", "保存代理得分排序，供 Agent 替换为正式优化结果和约束校验。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成优化脚手架，正式结论需补充目标函数、约束和最优方案解释。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "optimization_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "benefit_proxy", "value": str(benefit_col)}, {"name": "cost_proxy", "value": str(cost_col or "")}],
     )
     return 0
@@ -679,6 +893,7 @@ def run_evaluation(question: dict[str, Any], df: pd.DataFrame, source_path: Path
         tables=[table_entry(qid, table_id, f"{qid} 综合评价排序脚手架表", "保存代理综合得分和排序，供 Agent 替换为正式评价模型结果。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成综合评价脚手架，正式结论需补充指标体系、权重和稳定性分析。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "evaluation_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "indicator_columns", "value": list(map(str, normalized.columns))}, {"name": "weight_method", "value": "equal_weight_scaffold"}],
     )
     return 0
@@ -707,6 +922,7 @@ def run_classification(question: dict[str, Any], df: pd.DataFrame, source_path:
         tables=[table_entry(qid, table_id, f"{qid} 分类结果脚手架表", "保存代理分类标签，供 Agent 替换为正式分类模型结果。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成分类脚手架，正式结论需补充真实标签、混淆矩阵和分类指标。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "classification_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "proxy_feature", "value": str(num.columns[0])}, {"name": "threshold", "value": round_float(threshold)}],
     )
     return 0
@@ -747,6 +963,7 @@ def run_clustering(question: dict[str, Any], df: pd.DataFrame, source_path: Path
         tables=[table_entry(qid, table_id, f"{qid} 聚类标签脚手架表", "保存自动聚类标签，供 Agent 结合业务含义解释和复核。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成聚类脚手架，正式结论需补充聚类数选择依据和群体特征解释。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "cluster_label_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "cluster_count", "value": k}, {"name": "feature_columns", "value": list(map(str, num.columns))}],
     )
     return 0
@@ -783,6 +1000,7 @@ def run_simulation(question: dict[str, Any], df: pd.DataFrame, source_path: Path
         tables=[table_entry(qid, table_id, f"{qid} 情景仿真脚手架表", "保存趋势代理与上下情景结果，供 Agent 替换为正式仿真输出。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成仿真脚手架，正式结论需补充机理参数和情景设定依据。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "simulation_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "target_column", "value": str(target)}, {"name": "linear_slope", "value": round_float(coef[0])}],
     )
     return 0
@@ -811,13 +1029,14 @@ def run_general(question: dict[str, Any], df: pd.DataFrame, source_path: Path) -
         tables=[table_entry(qid, table_id, f"{qid} 通用统计脚手架表", "保存数值字段统计摘要，供 Agent 作为正式模型输入参考。", table_path, "scaffold_result_needs_review")],
         conclusions=[{"question_id": qid, "conclusion_text": f"{qid} 已形成通用统计脚手架，正式结论需结合模型路线进一步补齐。", "evidence_status": "scaffold_result_needs_review"}],
         outputs=[{"name": "general_profile_table", "path": rel(table_path)}],
+        input_files=[rel(source_path)],
         parameters=[{"name": "numeric_columns", "value": list(map(str, num.columns))}],
     )
     return 0
 
 
 def run_question_scaffold(question: dict[str, Any]) -> int:
-    df, source_path = load_first_dataset()
+    df, source_path = load_first_numeric_dataset()
     if df is None or source_path is None:
         return no_data_result(question)
     kind = normalize_task_type(str(question.get("task_type") or ""))
@@ -833,32 +1052,126 @@ def run_question_scaffold(question: dict[str, Any]) -> int:
     handler = handlers.get(kind, run_general)
     print(f"[modeling scaffold] {question.get('question_id', 'Q?')} task_type={question.get('task_type', '')} kind={kind} data={rel(source_path)}")
     return handler(question, df, source_path)
+
+
+if __name__ == "__main__":
+    merged_ids = compact_contracts()
+    print(f"Compacted contract shards: {', '.join(merged_ids) if merged_ids else 'none pending'}")
 '''
 
 
 RUN_MODELING_CODE = r'''# Generated by MathModel Skill scaffold generator.
 from __future__ import annotations
 
+import argparse
+import json
+import os
 import subprocess
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 
 THIS_DIR = Path(__file__).resolve().parent
+LOG_DIR = THIS_DIR / "logs"
+MANIFEST_FILE = THIS_DIR / "run_manifest.json"
+
+
+def peak_rss_mb(usage: Any) -> float | None:
+    if usage is None:
+        return None
+    # ru_maxrss is reported in bytes on macOS and in KiB on Linux.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return round(usage.ru_maxrss * scale / (1024 * 1024), 2)
+
+
+def run_script(script: Path, capture: bool) -> dict[str, Any]:
+    log_path = LOG_DIR / f"{script.stem}.log"
+    started = time.perf_counter()
+    usage = None
+    log = log_path.open("w", encoding="utf-8") if capture else None
+    try:
+        process = subprocess.Popen(
+            [sys.executable, str(script)],
+            cwd=str(THIS_DIR),
+            stdout=log,
+            stderr=subprocess.STDOUT if capture else None,
+        )
+        if hasattr(os, "wait4"):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+        else:
+            process.wait()
+    finally:
+        if log is not None:
+            log.close()
+    return {
+        "script": script.name,
+        "log_path": log_path.relative_to(THIS_DIR).as_posix() if capture else "",
+        "exit_code": process.returncode,
+        "wall_time_seconds": round(time.perf_counter() - started, 3),
+        "peak_rss_mb": peak_rss_mb(usage),
+    }
+
+
+def write_manifest(records: list[dict[str, Any]], jobs: int, wall_time: float) -> None:
+    manifest = {
+        "schema_version": "1.0",
+        "generated_by": "paper_output/code/modeling/run_modeling.py",
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "jobs": jobs,
+        "wall_time_seconds": round(wall_time, 3),
+        "questions": records,
+    }
+    MANIFEST_FILE.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Run every q*_model.py scaffold and record a run manifest.")
+    parser.add_argument("--jobs", type=int, default=1, help="Number of question scripts to run concurrently; 0 uses all CPU cores.")
+    args = parser.parse_args()
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
     scripts = sorted(path for path in THIS_DIR.glob("q*_model.py") if path.name[:1].lower() == "q")
     if not scripts:
         print("No q*_model.py scripts found.")
         return 0
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    # Question scripts only write their shards; the contracts are rewritten once after all of them ran.
+    try:
+        from result_contract_io import DEFER_COMPACTION_ENV, compact_contracts
+    except ImportError:
+        compact_contracts = None
+    else:
+        os.environ[DEFER_COMPACTION_ENV] = "1"
+    started = time.perf_counter()
+    try:
+        if jobs == 1:
+            records = []
+            for script in scripts:
+                print(f"=== Running {script.name} ===", flush=True)
+                records.append(run_script(script, capture=False))
+        else:
+            print(f"=== Running {len(scripts)} modeling scripts with {jobs} workers; logs in {LOG_DIR.name}/ ===", flush=True)
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                records = list(pool.map(lambda script: run_script(script, capture=True), scripts))
+    finally:
+        if compact_contracts is not None:
+            os.environ.pop(DEFER_COMPACTION_ENV, None)
+            merged = compact_contracts()
+            print(f"Compacted contract shards: {', '.join(merged) if merged else 'none pending'}")
+    write_manifest(records, jobs, time.perf_counter() - started)
+
     failures = 0
-    for script in scripts:
-        print(f"=== Running {script.name} ===")
-        result = subprocess.run([sys.executable, str(script)], cwd=str(THIS_DIR), check=False)
-        if result.returncode != 0:
+    for record in records:
+        print(f"{record['script']}: exit={record['exit_code']} time={record['wall_time_seconds']}s peak_rss={record['peak_rss_mb']}MB")
+        if record["exit_code"] != 0:
             failures += 1
-            print(f"[warning] {script.name} exited with code {result.returncode}")
+            hint = f", see {record['log_path']}" if record["log_path"] else ""
+            print(f"[warning] {record['script']} exited with code {record['exit_code']}{hint}")
     if failures:
         print(f"Completed with {failures} failed modeling script(s).")
         return 1
@@ -910,6 +1223,12 @@ def write_modeling_scaffolds(questions: list[dict[str, Any]]) -> list[dict[str,
         (MODELING_CODE_DIR / "result_contract_io.py", RESULT_CONTRACT_IO_CODE),
         (MODELING_CODE_DIR / "run_modeling.py", RUN_MODELING_CODE),
     ]
+    # The helper imports these copies so both stages share one sniffer and one cache format.
+    for name in SHARED_DATA_MODULES:
+        try:
+            files.append((MODELING_CODE_DIR / name, f"{MANAGED_MARKER}\n{(DATA_SKILL_SCRIPTS / name).read_text(encoding='utf-8')}"))
+        except OSError:
+            pass
     for path, content in files:
         generated.append({"path": rel(path), "status": write_managed_file(path, content)})
 
@@ -942,6 +1261,8 @@ def write_modeling_code_readme(questions: list[dict[str, Any]], cleaned_files: l
         "paper_output/code/modeling/",
         "|-- run_modeling.py          # optional unified entry for Q1/Q2/Q3 modeling scripts",
         "|-- result_contract_io.py    # helper for writing results, metrics, conclusions and table_index contracts",
+        "|-- csv_sniff.py             # copy of the data-cleaning CSV encoding/delimiter sniffer",
+        "|-- file_lock.py             # lock for csv_sniff.py cache merges and contract shard writes",
     ]
     for filename in planned_files:
         lines.append(f"|-- {filename:<23} # current-contest modeling scaffold")
@@ -954,7 +1275,7 @@ def write_modeling_code_readme(questions: list[dict[str, Any]], cleaned_files: l
             "",
             "1. Review each `q*_model.py` against the current contest statement.",
             "2. Replace automatically selected target columns, features, objectives, constraints, indicators, or validation rules where needed.",
-            "3. Run `python paper_output/code/modeling/run_modeling.py` from the project root, or run an individual `q*_model.py`.",
+            "3. Run `python paper_output/code/modeling/run_modeling.py` from the project root, or run an individual `q*_model.py`. Add `--jobs N` to run question scripts concurrently; per-question logs go to `logs/` and timings to `run_manifest.json`.",
             "4. Keep `execution_provenance` in `model_results.json`; official evidence gate requires result items to come from an executed code path.",
             "5. Only change `evidence_status` to `computed` or another formal status after the model code has been reviewed against the real contest statement.",
             "6. Re-run QA so `paper_output/tasks.json` picks up refreshed results and tables.",
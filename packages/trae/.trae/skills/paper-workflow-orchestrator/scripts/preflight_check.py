@@ -27,6 +27,20 @@ from importlib import import_module
 from pathlib import Path
 from typing import Any
 
+# The streaming xlsx inspector and the CSV sniffer are shared with
+# data-cleaning-and-visualization/robust_loader.py.
+DATA_SKILL_SCRIPTS = Path(__file__).resolve().parents[2] / "data-cleaning-and-visualization" / "scripts"
+if str(DATA_SKILL_SCRIPTS) not in sys.path:
+    sys.path.append(str(DATA_SKILL_SCRIPTS))
+try:
+    from csv_sniff import read_attempts
+except ImportError:
+    read_attempts = None
+try:
+    from xlsx_inspect import inspect_workbook
+except ImportError:
+    inspect_workbook = None
+
 DOC_EXTS = {".pdf", ".docx", ".md", ".txt"}
 LEGACY_DOC_EXTS = {".doc"}
 DATA_EXTS = {".xlsx", ".xls", ".csv", ".tsv", ".json"}
@@ -198,48 +212,29 @@ def inspect_xlsx(path: Path) -> dict[str, Any]:
         "warnings": [],
         "errors": [],
     }
-    openpyxl = safe_import("openpyxl")
-    if openpyxl is None:
+    if safe_import("openpyxl") is None:
         info["errors"].append(
             "依赖缺失：openpyxl。请运行 `pip install openpyxl`。"
         )
         return info
+    if inspect_workbook is None:
+        info["errors"].append(
+            f"缺少共享检查模块 xlsx_inspect.py（应位于 {DATA_SKILL_SCRIPTS.as_posix()}）。"
+        )
+        return info
     try:
-        wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        workbook = inspect_workbook(path, sample_limit=8)
     except Exception as exc:
         info["errors"].append(f"无法打开 XLSX：{type(exc).__name__}: {exc}")
         return info
-    try:
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            rows = ws.max_row or 0
-            cols = ws.max_column or 0
-            sample_cols: list[str] = []
-            if rows > 0 and cols > 0:
-                first_row = next(
-                    ws.iter_rows(min_row=1, max_row=1, max_col=min(cols, 8), values_only=True),
-                    None,
-                )
-                if first_row is not None:
-                    sample_cols = [str(c) if c is not None else "" for c in first_row]
-            info["sheets"].append(
-                {"name": sheet_name, "rows": rows, "cols": cols, "sample_cols": sample_cols}
-            )
-            if rows == 0 or cols == 0:
-                info["warnings"].append(f"工作表 {sheet_name} 为空。")
-    finally:
-        wb.close()
-    # Merged cell detection requires non-read-only mode; do a cheap second open
-    try:
-        wb2 = openpyxl.load_workbook(path, read_only=False, data_only=True)
-        merged_total = sum(len(wb2[s].merged_cells.ranges) for s in wb2.sheetnames)
-        if merged_total > 0:
-            info["warnings"].append(
-                f"检测到 {merged_total} 处合并单元格，pandas/openpyxl 读取后可能错位，请人工核对。"
-            )
-        wb2.close()
-    except Exception:
-        pass
+    info["sheets"] = workbook["sheets"]
+    for sheet in workbook["sheets"]:
+        if sheet["rows"] == 0 or sheet["cols"] == 0:
+            info["warnings"].append(f"工作表 {sheet['name']} 为空。")
+    if workbook["merged_cells"] > 0:
+        info["warnings"].append(
+            f"检测到 {workbook['merged_cells']} 处合并单元格，pandas/openpyxl 读取后可能错位，请人工核对。"
+        )
     info["readable"] = not info["errors"]
     return info
 
@@ -290,21 +285,26 @@ def inspect_csv(path: Path) -> dict[str, Any]:
         )
         return info
     last_exc: Exception | None = None
-    for encoding in ("utf-8-sig", "utf-8", "gbk", "gb18030"):
-        for sep in (None, ",", "\t", ";"):
-            try:
-                df = pandas.read_csv(
-                    path, nrows=5, encoding=encoding,
-                    sep=sep, engine="python",
-                )
-                info["encoding"] = encoding
-                info["sep"] = sep if sep is not None else "auto"
-                info["sample_cols"] = [str(c) for c in df.columns.tolist()]
-                info["readable"] = True
-                return info
-            except Exception as exc:
-                last_exc = exc
-                continue
+    encodings = ("utf-8-sig", "utf-8", "gbk", "gb18030")
+    seps = (None, ",", "\t", ";")
+    if read_attempts is not None:
+        attempts = read_attempts(path, encodings, seps)
+    else:
+        attempts = [(encoding, sep) for encoding in encodings for sep in seps]
+    for encoding, sep in attempts:
+        try:
+            df = pandas.read_csv(
+                path, nrows=5, encoding=encoding,
+                sep=sep, engine="python" if sep is None else "c",
+            )
+            info["encoding"] = encoding
+            info["sep"] = sep if sep is not None else "auto"
+            info["sample_cols"] = [str(c) for c in df.columns.tolist()]
+            info["readable"] = True
+            return info
+        except Exception as exc:
+            last_exc = exc
+            continue
     info["errors"].append(
         f"无法以常见编码/分隔符读取 CSV。最后错误：{type(last_exc).__name__}: {last_exc}"
     )
@@ -0,0 +1,379 @@
+"""Watch paper_output/ and re-run only the gates whose inputs changed.
+
+The evidence gate, the paper format gate and each workflow_guard step are
+imported once and kept in-process. Every gate declares the files it reads;
+after a change only the gates watching that file are re-evaluated, their
+usual reports are rewritten and PASS/FAIL deltas are printed and written to
+paper_output/qa/status.json. Reports written by one gate feed the guard steps
+that read them (S6, S8) in the same cycle.
+
+JSON contracts come from the shared ContractContext
+(quality-assurance-auditor/scripts/contract_context.py), so every gate reuses
+one parse per file; the Markdown source and the DOCX structure are memoized
+the same way. Both are re-read only when the file's (size, mtime) changes. On Linux the watcher
+sleeps on inotify; elsewhere, or with --poll, it polls. Either way the set of
+changed files is decided by comparing stat snapshots, so the evidence gate's
+provenance files outside paper_output/ are caught by the periodic check.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import workflow_guard
+
+SKILLS_DIR = Path(__file__).resolve().parents[2]
+sys.path.append(str(SKILLS_DIR / "quality-assurance-auditor" / "scripts"))
+sys.path.append(str(SKILLS_DIR / "paper-formal-writer" / "scripts"))
+
+try:
+    import evidence_gate
+except ImportError:
+    evidence_gate = None
+
+try:
+    import check_paper_format
+except ImportError:  # python-docx missing
+    check_paper_format = None
+
+# Unresolved like evidence_gate/check_paper_format, so report paths compare equal.
+BASE_DIR = Path.cwd()
+OUTPUT_DIR = BASE_DIR / "paper_output"
+STATUS_FILE = OUTPUT_DIR / "qa" / "status.json"
+GENERATED_BY = "paper-workflow-orchestrator/scripts/watch_gates.py"
+MAX_DELTAS = 50
+
+# Files (relative to paper_output/, globs allowed) read by each workflow_guard step.
+GUARD_INPUTS = {
+    "S0": ("preflight_report.json",),
+    "S1": ("step1/problem_analysis.json",),
+    "S2": ("plan/model_route.json", "plan/rubric_alignment.json", "plan/scoring_strategy.md"),
+    "S3": ("plan/data_plan.json", "plan/visualization_plan.json", "figure_index.json", "data_cleaned/load_report.json"),
+    "S4": ("code/modeling", "code/modeling/q*_model.py", "code/modeling/run_modeling.py"),
+    "S5": ("results/model_results.json", "results/metrics.json", "results/conclusions.json", "tables/table_index.json"),
+    "S6": ("qa/evidence_gate_report.json",),
+    "S7": ("plan/paper_outline.json", "final_paper_source.md", "final_paper.docx"),
+    "S8": ("format_check_report.json",),
+}
+FORMAT_INPUTS = (
+    "final_paper_source.md",
+    "final_paper.md",
+    "final_paper.docx",
+    "plan/paper_outline.json",
+    "plan/model_route.json",
+    "figure_index.json",
+    "tables/table_index.json",
+)
+
+
+def configure_utf8_stdio() -> None:
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.reconfigure(encoding="utf-8")
+        except Exception:
+            pass
+
+
+def rel(path: Path) -> str:
+    try:
+        return path.relative_to(BASE_DIR).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def stat_key(path: Path) -> list[int] | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def memoize_by_stat(function: Callable[[Path], Any]) -> Callable[[Path], Any]:
+    """Cache function(path) until the file's (size, mtime) changes. Missing files are not cached."""
+    cache: dict[str, tuple[list[int], Any]] = {}
+
+    def cached(path: Path) -> Any:
+        path = Path(path)
+        state = stat_key(path)
+        hit = cache.get(path.as_posix())
+        if state is not None and hit is not None and hit[0] == state:
+            return hit[1]
+        value = function(path)
+        if state is not None:
+            cache[path.as_posix()] = (state, value)
+        return value
+
+    return cached
+
+
+def expand(patterns: tuple[str, ...]) -> list[Path]:
+    paths: list[Path] = []
+    for pattern in patterns:
+        if any(char in pattern for char in "*?["):
+            paths.extend(sorted(OUTPUT_DIR.glob(pattern)))
+        else:
+            paths.append(OUTPUT_DIR / pattern)
+    return paths
+
+
+@dataclass
+class Gate:
+    name: str
+    title: str
+    inputs: Callable[[], list[Path]]
+    check: Callable[[], dict[str, Any]]
+    writes: tuple[Path, ...] = ()
+    result: dict[str, Any] = field(default_factory=dict)
+
+
+class GateWatcher:
+    """Keeps gate results between cycles and re-runs the gates a change affects."""
+
+    def __init__(self, target_step: str = "S8") -> None:
+        self.target_step = target_step
+        self.gates: list[Gate] = []
+        self.snapshot: dict[str, list[int] | None] = {}
+        self.deltas: list[dict[str, Any]] = []
+        self.cycle = 0
+        self.watching = "poll"
+        for module in (workflow_guard, evidence_gate, check_paper_format):
+            if module is not None and getattr(module, "shared_context", None) is None:
+                module.load_json = memoize_by_stat(module.load_json)
+        if evidence_gate is not None:
+            self.hashes = evidence_gate.HashCache(evidence_gate.load_verify_cache().get("files"))
+            self.gates.append(
+                Gate(
+                    "evidence_gate",
+                    "证据门禁",
+                    lambda: [*evidence_gate.CONTRACT_FILES, *map(Path, self.hashes.seen)],
+                    self.check_evidence,
+                    (evidence_gate.REPORT_JSON,),
+                )
+            )
+        if check_paper_format is not None:
+            check_paper_format.read_source = memoize_by_stat(check_paper_format.read_source)
+            check_paper_format.check_docx_structure = memoize_by_stat(check_paper_format.check_docx_structure)
+            self.gates.append(
+                Gate("paper_format", "格式门禁", lambda: expand(FORMAT_INPUTS), self.check_format, (check_paper_format.REPORT_JSON,))
+            )
+        for step in workflow_guard.STEP_ORDER[: workflow_guard.STEP_ORDER.index(target_step) + 1]:
+            self.gates.append(Gate(step, "", lambda step=step: expand(GUARD_INPUTS[step]), workflow_guard.CHECKERS[step]))
+
+    def check_evidence(self) -> dict[str, Any]:
+        self.hashes.seen.clear()
+        report = evidence_gate.evaluate(self.hashes)
+        evidence_gate.save_verify_cache(self.hashes, report)
+        evidence_gate.write_reports(report, "official")
+        return report
+
+    def check_format(self) -> dict[str, Any]:
+        report = check_paper_format.evaluate()
+        check_paper_format.write_reports(report)
+        return report
+
+    def watched(self) -> set[str]:
+        return {path.as_posix() for gate in self.gates for path in gate.inputs()}
+
+    def run_once(self, changed: set[str] | None = None) -> list[dict[str, Any]]:
+        """Run gates that read a changed path or have not run yet; return their PASS/FAIL deltas."""
+        self.cycle += 1
+        now = datetime.now().isoformat(timespec="seconds")
+        changed = set(changed or ())
+        deltas: list[dict[str, Any]] = []
+        guard_ran = False
+        for gate in self.gates:
+            trigger = sorted(path.as_posix() for path in gate.inputs() if path.as_posix() in changed)
+            if gate.result and not trigger:
+                continue
+            started = time.perf_counter()
+            report = gate.check()
+            failures = [str(item) for item in report.get("failures", [])]
+            previous = gate.result
+            gate.result = {
+                "title": gate.title or report.get("name", ""),
+                "status": report.get("status", "FAIL"),
+                "failures": failures,
+                "warning_count": len(report.get("warnings", []) or []),
+                "checked_at": now,
+                "cycle": self.cycle,
+                "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+                "trigger": [rel(Path(path)) for path in trigger],
+            }
+            changed.update(path.as_posix() for path in gate.writes)
+            if workflow_guard.shared_context is not None:
+                for path in gate.writes:
+                    workflow_guard.shared_context(BASE_DIR).forget(path)
+            guard_ran = guard_ran or gate.name in workflow_guard.CHECKERS
+            added = [item for item in failures if item not in previous.get("failures", [])]
+            resolved = [item for item in previous.get("failures", []) if item not in failures]
+            if previous.get("status") != gate.result["status"] or added or resolved:
+                deltas.append(
+                    {
+                        "at": now,
+                        "gate": gate.name,
+                        "from": previous.get("status"),
+                        "to": gate.result["status"],
+                        "added": added,
+                        "resolved": resolved,
+                        "trigger": gate.result["trigger"],
+                    }
+                )
+        if guard_ran:
+            self.write_guard_report()
+        self.snapshot = {path: stat_key(Path(path)) for path in self.watched()}
+        self.deltas = (self.deltas + deltas)[-MAX_DELTAS:]
+        self.write_status()
+        return deltas
+
+    def poll(self) -> list[dict[str, Any]]:
+        """Compare stat snapshots and re-run the affected gates."""
+        current = {path: stat_key(Path(path)) for path in self.watched()}
+        changed = {path for path, state in current.items() if self.snapshot.get(path, False) != state}
+        return self.run_once(changed) if changed else []
+
+    def status(self) -> str:
+        return "PASS" if all(gate.result.get("status") == "PASS" for gate in self.gates) else "FAIL"
+
+    def write_guard_report(self) -> None:
+        steps = [{"step": gate.name, "name": gate.result["title"], "status": gate.result["status"], "failures": gate.result["failures"]} for gate in self.gates if gate.name in workflow_guard.CHECKERS]
+        failures = [f"{item['step']}: {failure}" for item in steps for failure in item["failures"]]
+        workflow_guard.write_reports(
+            {
+                "schema_version": "1.0",
+                "generated_by": "paper-workflow-orchestrator/scripts/workflow_guard.py",
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "target_step": self.target_step,
+                "status": "PASS" if not failures else "FAIL",
+                "steps": steps,
+                "failures": failures,
+            }
+        )
+
+    def write_status(self) -> None:
+        payload = {
+            "schema_version": "1.0",
+            "generated_by": GENERATED_BY,
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "status": self.status(),
+            "target_step": self.target_step,
+            "watching": self.watching,
+            "cycle": self.cycle,
+            "gates": {gate.name: gate.result for gate in self.gates},
+            "deltas": self.deltas,
+        }
+        STATUS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = STATUS_FILE.with_name(f".{STATUS_FILE.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, STATUS_FILE)
+
+
+class Inotify:
+    """Wakes up on any write/create/delete/move under a directory tree (Linux only)."""
+
+    MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # MODIFY ATTRIB CLOSE_WRITE MOVED_FROM MOVED_TO CREATE DELETE
+    IN_ISDIR = 0x40000000
+    IN_CREATE = 0x100
+
+    def __init__(self, root: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.add_watch = libc.inotify_add_watch
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watched: set[str] = set()
+        self.add_tree(root)
+
+    def add_tree(self, root: Path) -> None:
+        for directory, _, _ in os.walk(root):
+            if directory not in self.watched and self.add_watch(self.fd, os.fsencode(directory), self.MASK) >= 0:
+                self.watched.add(directory)
+
+    def wait(self, timeout: float, root: Path) -> bool:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+        new_directory = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset + 16 <= len(data):
+                _, mask, _, length = struct.unpack_from("iIII", data, offset)
+                new_directory = new_directory or (mask & self.IN_CREATE and mask & self.IN_ISDIR)
+                offset += 16 + length
+        if new_directory:
+            self.add_tree(root)
+        return True
+
+
+def print_delta(delta: dict[str, Any]) -> None:
+    trigger = f"  ← {', '.join(delta['trigger'])}" if delta["trigger"] else ""
+    print(f"[{delta['at'][11:]}] {delta['gate']}: {delta['from'] or '-'} → {delta['to']}{trigger}", flush=True)
+    for item in delta["added"][:8]:
+        print(f"   + {item}", flush=True)
+    for item in delta["resolved"][:8]:
+        print(f"   - {item}", flush=True)
+
+
+def main() -> int:
+    configure_utf8_stdio()
+    parser = argparse.ArgumentParser(description="Watch paper_output/ and re-run only the affected QA gates.")
+    parser.add_argument("--step", choices=workflow_guard.STEP_ORDER, default="S8", help="Highest workflow_guard step to check.")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between stat checks.")
+    parser.add_argument("--poll", action="store_true", help="Do not use inotify.")
+    parser.add_argument("--once", action="store_true", help="Run every gate once, write qa/status.json and exit.")
+    args = parser.parse_args()
+
+    watcher = GateWatcher(args.step)
+    if evidence_gate is None:
+        print("⚠️ 未找到 quality-assurance-auditor/scripts/evidence_gate.py，跳过证据门禁。")
+    if check_paper_format is None:
+        print("⚠️ 无法导入 check_paper_format.py（需要 python-docx），跳过格式门禁。")
+    inotify = None
+    if not args.once and not args.poll and sys.platform.startswith("linux") and OUTPUT_DIR.is_dir():
+        try:
+            inotify = Inotify(OUTPUT_DIR)
+            watcher.watching = "inotify"
+        except (OSError, AttributeError):
+            inotify = None
+    for delta in watcher.run_once():
+        print_delta(delta)
+    print(f"门禁状态：{watcher.status()}（{rel(STATUS_FILE)}）", flush=True)
+    if args.once:
+        return 0 if watcher.status() == "PASS" else 1
+
+    print(f"正在监听 {rel(OUTPUT_DIR)}/（{watcher.watching}），Ctrl+C 退出。", flush=True)
+    try:
+        while True:
+            if inotify is not None:
+                if inotify.wait(args.interval, OUTPUT_DIR):
+                    time.sleep(0.2)  # let editors finish writing before reading
+            else:
+                time.sleep(args.interval)
+            deltas = watcher.poll()
+            for delta in deltas:
+                print_delta(delta)
+            if deltas:
+                print(f"门禁状态：{watcher.status()}", flush=True)
+    except KeyboardInterrupt:
+        print("\n已停止监听。")
+    return 0 if watcher.status() == "PASS" else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
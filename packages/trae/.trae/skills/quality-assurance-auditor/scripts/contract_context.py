@@ -0,0 +1,194 @@
+"""Load each paper_output contract once and share it between QA checkers.
+
+workflow_guard.py, evidence_gate.py, pipeline.py, check_paper_format.py and
+qa_all.py read contracts through shared_context(), so a contract is parsed
+once per process no matter how many checkers look at it. Entries are keyed
+by the file's identity (device, inode), so different spellings of the same
+path share one parse, and are re-read only when (size, mtime) changes.
+
+errors() validates a contract against its schema in contract_schema.py;
+like the question-id indexes, the result is computed on first use and kept
+until the contract is re-read. warnings() lists missing header fields, which
+gates report without failing. Contract.problem() is the lenient top-level
+shape check used before grouping entries.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from contract_schema import SCHEMAS, SchemaError, missing_header, validate
+
+# name -> (path under paper_output/, list key; None means the file is a top-level list)
+CONTRACTS: dict[str, tuple[str, str | None]] = {
+    "problem_analysis": ("step1/problem_analysis.json", "questions"),
+    "model_route": ("plan/model_route.json", "questions"),
+    "rubric_alignment": ("plan/rubric_alignment.json", "items"),
+    "data_plan": ("plan/data_plan.json", "data_files"),
+    "visualization_plan": ("plan/visualization_plan.json", "figures"),
+    "paper_outline": ("plan/paper_outline.json", "questions"),
+    "figure_index": ("figure_index.json", "figures"),
+    "model_results": ("results/model_results.json", "questions"),
+    "metrics": ("results/metrics.json", "items"),
+    "conclusions": ("results/conclusions.json", "items"),
+    "table_index": ("tables/table_index.json", "tables"),
+    "tasks": ("tasks.json", None),
+}
+
+
+@dataclass
+class Contract:
+    path: Path
+    exists: bool
+    data: Any = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.exists and self.error is None
+
+    def problem(self, list_key: str | None) -> str:
+        """Why the contract does not have the expected top-level shape, or ""."""
+        if list_key is None:
+            return "" if isinstance(self.data, list) else f"{self.path.name} 不是数组"
+        if not isinstance(self.data, dict):
+            return f"{self.path.name} 不是 JSON 对象"
+        if not isinstance(self.data.get(list_key), list):
+            return f"{self.path.name} 中没有 {list_key}[]"
+        return ""
+
+    def items(self, list_key: str | None) -> list[dict[str, Any]]:
+        """Dict entries of data[list_key], or of the top-level array when list_key is None."""
+        if not self.ok or self.problem(list_key):
+            return []
+        values = self.data if list_key is None else self.data[list_key]
+        return [item for item in values if isinstance(item, dict)]
+
+
+def question_id(item: dict[str, Any]) -> str:
+    return str(item.get("question_id") or "").strip()
+
+
+class ContractContext:
+    def __init__(self, base_dir: Path) -> None:
+        self.base_dir = Path(base_dir)
+        self.output_dir = self.base_dir / "paper_output"
+        self.parsed = 0
+        self.requests = 0
+        self._entries: dict[tuple[int, int], tuple[tuple[int, int], Contract]] = {}
+        self._indexes: dict[str, tuple[Contract, dict[str, list[dict[str, Any]]]]] = {}
+        self._errors: dict[str, tuple[Contract, list[SchemaError]]] = {}
+        self._names: dict[str, str] | None = None
+
+    def path(self, name: str) -> Path:
+        return self.output_dir / CONTRACTS[name][0]
+
+    def load_path(self, path: Path) -> Contract:
+        """Parsed contract at path; re-read only if the file changed since the last call."""
+        self.requests += 1
+        path = Path(path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return Contract(path, False)
+        identity, state = (stat.st_dev, stat.st_ino), (stat.st_size, stat.st_mtime_ns)
+        cached = self._entries.get(identity)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+        self.parsed += 1
+        try:
+            contract = Contract(path, True, json.loads(path.read_text(encoding="utf-8")))
+        except Exception as exc:
+            contract = Contract(path, True, error=exc)
+        self._entries[identity] = (state, contract)
+        return contract
+
+    def get(self, name: str) -> Contract:
+        return self.load_path(self.path(name))
+
+    def data(self, name: str) -> Any:
+        """The parsed contract, or None when it is missing or unreadable."""
+        contract = self.get(name)
+        return contract.data if contract.ok else None
+
+    def items(self, name: str) -> list[dict[str, Any]]:
+        return self.get(name).items(CONTRACTS[name][1])
+
+    def by_question(self, name: str) -> dict[str, list[dict[str, Any]]]:
+        """Entries of the contract grouped by question_id, in file order."""
+        contract = self.get(name)
+        cached = self._indexes.get(name)
+        if cached is not None and cached[0] is contract:
+            return cached[1]
+        grouped: dict[str, list[dict[str, Any]]] = {}
+        for item in contract.items(CONTRACTS[name][1]):
+            qid = question_id(item)
+            if qid:
+                grouped.setdefault(qid, []).append(item)
+        self._indexes[name] = (contract, grouped)
+        return grouped
+
+    def results_by_question(self) -> dict[str, dict[str, Any]]:
+        """model_results.json questions[] by question_id; the last entry wins."""
+        return {qid: items[-1] for qid, items in self.by_question("model_results").items()}
+
+    def question_ids(self) -> list[str]:
+        """Sorted question ids declared in model_route.json (question_id or id)."""
+        ids = {str(item.get("question_id") or item.get("id") or "").strip() for item in self.items("model_route")}
+        return sorted(qid for qid in ids if qid)
+
+    def errors(self, name: str) -> list[SchemaError]:
+        """Schema violations of a readable contract (missing or invalid JSON is reported by callers)."""
+        contract = self.get(name)
+        cached = self._errors.get(name)
+        if cached is not None and cached[0] is contract:
+            return cached[1]
+        errors = validate(name, contract.data, contract.path.name) if contract.ok and name in SCHEMAS else []
+        self._errors[name] = (contract, errors)
+        return errors
+
+    def warnings(self, name: str) -> list[SchemaError]:
+        """Missing header fields of a readable contract."""
+        contract = self.get(name)
+        return missing_header(name, contract.data, contract.path.name) if contract.ok and name in SCHEMAS else []
+
+    def name_of(self, path: Path) -> str | None:
+        """Contract name for a path under paper_output/, or None if it is not a known contract."""
+        if self._names is None:
+            root = self.output_dir.resolve()
+            self._names = {(root / relative).as_posix(): name for name, (relative, _) in CONTRACTS.items()}
+        return self._names.get(Path(path).resolve().as_posix())
+
+    def schema_errors(self, path: Path) -> list[SchemaError]:
+        name = self.name_of(path)
+        return self.errors(name) if name else []
+
+    def schema_warnings(self, path: Path) -> list[SchemaError]:
+        name = self.name_of(path)
+        return self.warnings(name) if name else []
+
+    def forget(self, path: Path) -> None:
+        """Drop a cached entry after writing the file in-process (guards against coarse mtimes)."""
+        try:
+            stat = Path(path).stat()
+        except OSError:
+            return
+        self._entries.pop((stat.st_dev, stat.st_ino), None)
+
+    def stats(self) -> dict[str, int]:
+        return {"requests": self.requests, "parsed": self.parsed, "files": len(self._entries)}
+
+
+_SHARED: dict[str, ContractContext] = {}
+
+
+def shared_context(base_dir: Path | None = None) -> ContractContext:
+    """One context per project directory for the whole process."""
+    base = Path(base_dir or Path.cwd())
+    key = str(base.resolve())
+    if key not in _SHARED:
+        _SHARED[key] = ContractContext(base)
+    return _SHARED[key]
@@ -0,0 +1,294 @@
+"""JSON Schemas for the workflow contracts and a small compiled validator.
+
+The schemas use a JSON Schema subset (type, properties, required, items,
+minItems, pattern, enum, format) so they can be read by any JSON Schema
+tool, but validation does not depend on the jsonschema package: each schema
+is compiled once into nested closures and every error carries the RFC 6901
+JSON pointer of the offending value, e.g.
+``conclusions.json /items/2/conclusion_text: 不能为空``.
+
+The only non-standard format is "relative-path": blank strings pass, POSIX or
+Windows absolute paths fail, matching the rule that contracts never store
+machine-specific paths.
+
+The schema_version/generated_by/generated_at header is typed but not
+required: contracts written before the schemas existed often lack it, so
+missing_header() lists absent fields separately and gates report them as
+warnings.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from pathlib import PurePosixPath, PureWindowsPath
+from typing import Any, Callable
+
+HEADER_FIELDS = ["schema_version", "generated_by", "generated_at"]
+HEADER_PROPERTIES = {
+    "schema_version": {"type": "string"},
+    "generated_by": {"type": "string"},
+    "generated_at": {"type": "string"},
+}
+NON_BLANK = {"type": "string", "pattern": r"\S"}
+RELATIVE_PATH = {"type": "string", "format": "relative-path"}
+STATUS = {"type": "string"}
+# Figures and tasks that serve the whole paper carry question_id null (generators copy it via .get()).
+OPTIONAL_ID = {"type": ["string", "null"]}
+
+
+def contract(list_key: str, item: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "type": "object",
+        "required": [list_key],
+        "properties": {**HEADER_PROPERTIES, list_key: {"type": "array", "items": item}},
+    }
+
+
+SCHEMAS: dict[str, dict[str, Any]] = {
+    "model_route": contract(
+        "questions",
+        {
+            "type": "object",
+            "properties": {
+                "question_id": NON_BLANK,
+                "id": NON_BLANK,
+                "figures": {"type": "array", "items": {"type": "object", "properties": {"expected_path": RELATIVE_PATH}}},
+            },
+        },
+    ),
+    "model_results": contract(
+        "questions",
+        {
+            "type": "object",
+            "required": ["question_id"],
+            "properties": {
+                "question_id": NON_BLANK,
+                "status": STATUS,
+                "evidence_status": STATUS,
+                "result_summary": {"type": "string"},
+                "execution_provenance": {
+                    "type": "object",
+                    "properties": {
+                        "source_code_path": {"type": "string"},
+                        "run_command": {"type": "string"},
+                        "output_artifacts": {"type": "array", "items": {"type": "string"}},
+                        "file_hashes": {"type": "object"},
+                    },
+                },
+            },
+        },
+    ),
+    "metrics": contract(
+        "items",
+        {
+            "type": "object",
+            "required": ["question_id", "metric_name"],
+            "properties": {
+                "question_id": NON_BLANK,
+                "metric_name": NON_BLANK,
+                "value": {"type": ["number", "string", "null"]},
+                "unit": {"type": "string"},
+                "status": STATUS,
+            },
+        },
+    ),
+    "conclusions": contract(
+        "items",
+        {
+            "type": "object",
+            "required": ["question_id", "conclusion_text"],
+            "properties": {"question_id": NON_BLANK, "conclusion_text": NON_BLANK, "status": STATUS, "evidence_status": STATUS},
+        },
+    ),
+    "table_index": contract(
+        "tables",
+        {
+            "type": "object",
+            "required": ["table_id", "question_id", "path"],
+            "properties": {"table_id": NON_BLANK, "question_id": NON_BLANK, "path": RELATIVE_PATH, "status": STATUS},
+        },
+    ),
+    "figure_index": contract(
+        "figures",
+        {
+            "type": "object",
+            "required": ["figure_id", "path"],
+            "properties": {"figure_id": NON_BLANK, "question_id": OPTIONAL_ID, "path": RELATIVE_PATH, "exists": {"type": "boolean"}},
+        },
+    ),
+    "visualization_plan": contract(
+        "figures",
+        {
+            "type": "object",
+            "required": ["figure_id", "output_path"],
+            "properties": {
+                "figure_id": NON_BLANK,
+                "question_id": OPTIONAL_ID,
+                "output_path": {**NON_BLANK, "format": "relative-path"},
+                "data_source": RELATIVE_PATH,
+            },
+        },
+    ),
+    "data_plan": contract(
+        "data_files",
+        {"type": "object", "properties": {"path": RELATIVE_PATH, "cleaned_output": RELATIVE_PATH}},
+    ),
+    "tasks": {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "required": ["id", "section", "status"],
+            "properties": {"id": NON_BLANK, "section": {"type": "string"}, "status": STATUS, "question_id": OPTIONAL_ID},
+        },
+    },
+}
+
+JSON_TYPES: dict[str, Callable[[Any], bool]] = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    "integer": lambda value: isinstance(value, int) and not isinstance(value, bool),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+}
+TYPE_LABELS = {"object": "对象", "array": "数组", "string": "字符串", "number": "数值", "integer": "整数", "boolean": "布尔值", "null": "null"}
+PATTERN_HINTS = {r"\S": "不能为空"}
+
+
+@dataclass(frozen=True)
+class SchemaError:
+    file: str
+    pointer: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.file} {self.pointer or '/'}: {self.message}"
+
+
+Check = Callable[[Any, str, list[tuple[str, str]]], None]
+
+
+def escape(token: str) -> str:
+    return token.replace("~", "~0").replace("/", "~1")
+
+
+def json_type(value: Any) -> str:
+    return next((name for name in ("null", "boolean", "integer", "number", "string", "array", "object") if JSON_TYPES[name](value)), type(value).__name__)
+
+
+def is_relative(value: str) -> bool:
+    text = value.strip()
+    return not text or not (PurePosixPath(text).is_absolute() or PureWindowsPath(text).is_absolute())
+
+
+def compile_schema(schema: dict[str, Any]) -> Check:
+    """Turn a schema into check(value, pointer, errors); errors collects (pointer, message)."""
+    checks: list[Check] = []
+
+    if "type" in schema:
+        names = [schema["type"]] if isinstance(schema["type"], str) else list(schema["type"])
+        tests = [JSON_TYPES[name] for name in names]
+        expected = " 或 ".join(TYPE_LABELS[name] for name in names)
+
+        def check_type(value: Any, pointer: str, errors: list[tuple[str, str]]) -> bool:
+            if any(test(value) for test in tests):
+                return True
+            errors.append((pointer, f"应为{expected}，实际为 {TYPE_LABELS.get(json_type(value), json_type(value))}"))
+            return False
+    else:
+        check_type = None
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+            if value not in allowed:
+                errors.append((pointer, f"取值必须是 {allowed} 之一，实际为 {value!r}"))
+
+        checks.append(check_enum)
+
+    if "pattern" in schema:
+        regex = re.compile(schema["pattern"])
+        hint = PATTERN_HINTS.get(schema["pattern"], f"必须匹配 {schema['pattern']!r}")
+
+        def check_pattern(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+            if isinstance(value, str) and not regex.search(value):
+                errors.append((pointer, hint))
+
+        checks.append(check_pattern)
+
+    if schema.get("format") == "relative-path":
+
+        def check_relative(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+            if isinstance(value, str) and not is_relative(value):
+                errors.append((pointer, f"必须是相对路径：{value}"))
+
+        checks.append(check_relative)
+
+    required = tuple(schema.get("required", ()))
+    properties = {key: (escape(key), compile_schema(sub)) for key, sub in schema.get("properties", {}).items()}
+    if required or properties:
+
+        def check_object(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+            if not isinstance(value, dict):
+                return
+            for key in required:
+                if key not in value:
+                    errors.append((f"{pointer}/{escape(key)}", "缺少必填字段"))
+            for key, (token, check) in properties.items():
+                if key in value:
+                    check(value[key], f"{pointer}/{token}", errors)
+
+        checks.append(check_object)
+
+    if "minItems" in schema:
+        minimum = int(schema["minItems"])
+
+        def check_min_items(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+            if isinstance(value, list) and len(value) < minimum:
+                errors.append((pointer, f"至少需要 {minimum} 项"))
+
+        checks.append(check_min_items)
+
+    if "items" in schema:
+        item_check = compile_schema(schema["items"])
+
+        def check_items(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    item_check(item, f"{pointer}/{index}", errors)
+
+        checks.append(check_items)
+
+    def check(value: Any, pointer: str, errors: list[tuple[str, str]]) -> None:
+        if check_type is not None and not check_type(value, pointer, errors):
+            return
+        for step in checks:
+            step(value, pointer, errors)
+
+    return check
+
+
+_COMPILED: dict[str, Check] = {}
+
+
+def validator(name: str) -> Check:
+    """Compiled validator for a contract name; compiled on first use, then reused."""
+    if name not in _COMPILED:
+        _COMPILED[name] = compile_schema(SCHEMAS[name])
+    return _COMPILED[name]
+
+
+def validate(name: str, data: Any, file: str = "") -> list[SchemaError]:
+    errors: list[tuple[str, str]] = []
+    validator(name)(data, "", errors)
+    return [SchemaError(file or f"{name}.json", pointer, message) for pointer, message in errors]
+
+
+def missing_header(name: str, data: Any, file: str = "") -> list[SchemaError]:
+    """Header fields absent from an object contract (tasks.json is a bare array and has none)."""
+    if not isinstance(data, dict):
+        return []
+    return [SchemaError(file or f"{name}.json", f"/{key}", "缺少表头字段") for key in HEADER_FIELDS if key not in data]
@@ -1,8 +1,14 @@
 from __future__ import annotations
 
+import importlib.util
 import json
+import math
+import os
+import shutil
 import subprocess
 import sys
+import tempfile
+import time
 from pathlib import Path
 
 import setup_sandbox
@@ -14,6 +20,23 @@ PREFLIGHT = REPO_ROOT / "packages" / "claude" / ".claude" / "skills" / "paper-wo
 WORKFLOW_GUARD = REPO_ROOT / "packages" / "claude" / ".claude" / "skills" / "paper-workflow-orchestrator" / "scripts" / "workflow_guard.py"
 ROBUST_LOADER = REPO_ROOT / "packages" / "claude" / ".claude" / "skills" / "data-cleaning-and-visualization" / "scripts" / "robust_loader.py"
 FORMAT_DOCX = REPO_ROOT / "packages" / "claude" / ".claude" / "skills" / "paper-formal-writer" / "scripts" / "format_formal_docx.py"
+CODEX_ROBUST_LOADER = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "robust_loader.py"
+XLSX_INSPECT = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "xlsx_inspect.py"
+CSV_SNIFF = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "csv_sniff.py"
+PAPER_FIGURES = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "generate_paper_figures_from_plan.py"
+FIGURE_TEMPLATES = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "paper_figure_templates.py"
+VISUALIZE_DATA = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "visualize_data.py"
+FONT_RESOLVER = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "font_resolver.py"
+CONTACT_SHEET = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "contact_sheet.py"
+DATA_PROFILE = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "data_profile.py"
+BUILD_PLAN = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "build_data_visualization_plan.py"
+RESULT_CONTRACTS = REPO_ROOT / "packages" / "codex" / "skills" / "model-code-and-result-generator" / "scripts" / "build_result_contracts.py"
+EVIDENCE_GATE = REPO_ROOT / "packages" / "codex" / "skills" / "quality-assurance-auditor" / "scripts" / "evidence_gate.py"
+WORKFLOW_DAG = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "workflow_dag.py"
+WATCH_GATES = REPO_ROOT / "packages" / "codex" / "skills" / "paper-workflow-orchestrator" / "scripts" / "watch_gates.py"
+QA_ALL = REPO_ROOT / "packages" / "codex" / "skills" / "quality-assurance-auditor" / "scripts" / "qa_all.py"
+CLEAN_DATA = REPO_ROOT / "packages" / "codex" / "skills" / "data-cleaning-and-visualization" / "scripts" / "clean_data.py"
+DEMO_MODELING = REPO_ROOT / "examples" / "cumcm2024-b-demo" / "paper_output" / "code" / "modeling"
 
 
 def run(cmd: list[str], cwd: Path) -> subprocess.CompletedProcess[str]:
@@ -38,6 +61,16 @@ def load_json(path: Path) -> dict:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
+def load_module(path: Path):
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[path.stem] = module
+    spec.loader.exec_module(module)
+    return module
+
+
 def test_preflight() -> None:
     cases = [
         ("scenario_1_empty", 1, "FAIL"),
@@ -104,6 +137,889 @@ def test_format_gate() -> None:
     assert_true(not (cwd / "paper_output" / "final_paper.docx").exists(), "draft mode must not create formal docx")
 
 
+def test_q3_batch_matches_scalar() -> None:
+    module = load_module(DEMO_MODELING / "b_problem_modeling.py")
+    policies = module.q3_policy_matrix()
+    assert_true(policies.shape == (65536, 16), f"q3 policy matrix has shape {policies.shape}")
+    scores = module.q3_profit_batch(policies)
+    for index in range(0, len(policies), 97):
+        policy = tuple(bool(bit) for bit in policies[index])
+        expected = module.q3_profit(policy)
+        for key, value in expected.items():
+            actual = float(scores[key][index])
+            assert_true(math.isclose(actual, value, rel_tol=1e-12, abs_tol=1e-12), f"q3 {key} mismatch for {policy}: {actual} != {value}")
+
+
+def test_q2_batch_matches_scalar() -> None:
+    module = load_module(DEMO_MODELING / "b_problem_modeling.py")
+    policies = module.np.array(list(module.itertools.product([False, True], repeat=4)))
+    for scenario in module.Q2_SCENARIOS:
+        scores = module.q2_profit_batch(scenario, policies)
+        for index, policy in enumerate(policies):
+            expected = module.q2_profit(scenario, tuple(bool(bit) for bit in policy))
+            for key, value in expected.items():
+                actual = float(scores[key][index])
+                assert_true(math.isclose(actual, value, rel_tol=1e-12, abs_tol=1e-12), f"q2 scenario {scenario.scenario} {key} mismatch: {actual} != {value}")
+    for text in ("0", "-3"):
+        try:
+            module.positive_int(text)
+        except module.argparse.ArgumentTypeError:
+            continue
+        raise AssertionError(f"sample counts must be positive: {text}")
+
+
+def test_sampling_kernels() -> None:
+    stats = load_module(DEMO_MODELING / "sampling_stats.py")
+    for n in (1, 7, 40, 150):
+        for x in range(0, n + 1, max(1, n // 6)):
+            for p in (0.0, 0.05, 0.1, 0.37, 1.0):
+                cdf = sum(math.comb(n, k) * p**k * (1 - p) ** (n - k) for k in range(0, x + 1))
+                sf = sum(math.comb(n, k) * p**k * (1 - p) ** (n - k) for k in range(x, n + 1))
+                assert_true(math.isclose(float(stats.binom_cdf(n, x, p)), cdf, rel_tol=1e-9, abs_tol=1e-15), f"binom_cdf({n}, {x}, {p}) mismatch")
+                assert_true(math.isclose(float(stats.binom_sf(n, x, p)), sf, rel_tol=1e-9, abs_tol=1e-15), f"binom_sf({n}, {x}, {p}) mismatch")
+    assert_true(stats.find_reject_rule(0.10, 0.95) == (2, 2), "95% reject rule should be n=2, x>=2")
+    assert_true(stats.find_accept_rule(0.10, 0.90) == (22, 0), "90% accept rule should be n=22, x<=0")
+    assert_true(math.isclose(stats.cp_lower(2, 2, 0.95), math.sqrt(0.05), rel_tol=1e-12), "CP lower bound for 2/2 should be sqrt(0.05)")
+    assert_true(stats.cp_upper(0, 22, 0.90) <= 0.10 < stats.cp_upper(0, 21, 0.90), "CP upper bound should cross 10% between n=21 and n=22")
+
+
+def test_streaming_clean_matches_in_memory() -> None:
+    rows = ["id,value,label,flag,empty"]
+    for i in range(240):
+        value = "" if i % 7 == 0 else str((i % 13) * 0.5)
+        label = "" if i % 11 == 0 else "abc"[i % 3]
+        rows.append(f"{i % 90},{value},{label},{i % 2 == 0},")
+    rows.insert(20, ",,,,")
+    rows.extend(rows[1:40])
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "problem_files").mkdir()
+        (cwd / "problem_files" / "sensor.csv").write_text("\n".join(rows) + "\n", encoding="utf-8")
+        output = cwd / "paper_output" / "data_cleaned" / "sensor_cleaned.csv"
+        result = run([sys.executable, str(CLEAN_DATA)], cwd)
+        assert_true(output.exists(), f"in-memory clean should write output\n{result.stdout}")
+        expected = output.read_bytes()
+        for chunksize in ["100000", "17"]:
+            result = run([sys.executable, str(CLEAN_DATA), "--stream", "--chunksize", chunksize], cwd)
+            assert_true("分块流式清洗" in result.stdout, f"--stream should use the chunked path\n{result.stdout}")
+            assert_true(output.read_bytes() == expected, f"streaming clean (chunksize={chunksize}) should match in-memory output")
+
+
+def test_parallel_loader_keeps_report_order() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "problem_files").mkdir()
+        for index in range(6):
+            (cwd / "problem_files" / f"part_{5 - index}.csv").write_text("a,b\n1,2\n", encoding="utf-8")
+        report_file = cwd / "paper_output" / "data_cleaned" / "load_report.json"
+        reports = []
+        for workers in ["1", "3"]:
+            result = run([sys.executable, str(CODEX_ROBUST_LOADER), "--workers", workers], cwd)
+            assert_true(result.returncode == 0, f"robust_loader --workers {workers} should pass\n{result.stdout}")
+            report = load_json(report_file)
+            report.pop("generated_at")
+            reports.append(report)
+        assert_true(reports[0] == reports[1], "parallel load_report.json should match the sequential report")
+        paths = [item["path"] for item in reports[1]["data_files"]]
+        assert_true(paths == sorted(paths), "load_report.json entries should stay in sorted file order")
+
+
+def test_streaming_xlsx_inspector() -> None:
+    import openpyxl
+
+    inspector = load_module(XLSX_INSPECT)
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "数据"
+    ws.append(["名称", "数量", 3, 2.5, True, None])
+    for index in range(40):
+        ws.append([f"r{index}", index, index * 0.5])
+    ws.merge_cells("A10:B11")
+    ws.merge_cells("C20:C25")
+    wb.create_sheet("空")
+    wb.create_sheet("稀疏")["C3"] = "x"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "book.xlsx"
+        wb.save(path)
+        report = inspector.inspect_workbook(path, sample_limit=8)
+        full = openpyxl.load_workbook(path, read_only=True, data_only=True)
+        for sheet in report["sheets"]:
+            ws = full[sheet["name"]]
+            assert_true((sheet["rows"], sheet["cols"]) == (ws.max_row, ws.max_column), f"{sheet['name']}: dimensions should match openpyxl")
+        full.close()
+    assert_true([sheet["name"] for sheet in report["sheets"]] == ["数据", "空", "稀疏"], "sheets should keep workbook order")
+    assert_true(report["sheets"][0]["sample_cols"] == ["名称", "数量", "3", "2.5", "True", ""], "header row should match openpyxl values")
+    assert_true(report["sheets"][2]["sample_cols"] == ["", "", ""], "missing header row should be blank")
+    assert_true(report["merged_cells"] == 2 and report["sheets"][0]["merged_cells"] == 2, "merged cells should be counted per sheet")
+
+
+def test_csv_sniff_cache() -> None:
+    sniff = load_module(CSV_SNIFF)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        gbk_file = root / "gbk.csv"
+        gbk_file.write_bytes("时间;温度\n1;20.5\n2;21.0\n".encode("gbk"))
+        bom_file = root / "bom.tsv"
+        bom_file.write_text("a\tb\n1\t2\n", encoding="utf-8-sig")
+        cache_file = root / "cache" / "csv_sniff.json"
+        assert_true(sniff.sniff_csv(gbk_file, cache_file) == {"encoding": "gbk", "sep": ";"}, "GBK semicolon file should be sniffed")
+        assert_true(sniff.sniff_csv(bom_file, cache_file) == {"encoding": "utf-8-sig", "sep": "\t"}, "BOM tab file should be sniffed")
+        cache = load_json(cache_file)
+        assert_true(cache.get(sniff.file_fingerprint(gbk_file)) == {"encoding": "gbk", "sep": ";"}, "sniff result should be cached by fingerprint")
+        assert_true(sniff.read_attempts(gbk_file, ("utf-8",), (",",), cache_file)[0] == ("gbk", ";"), "read_attempts should put the sniffed params first")
+        cache[sniff.file_fingerprint(gbk_file)] = {"encoding": "gb18030", "sep": ";"}
+        cache_file.write_text(json.dumps(cache), encoding="utf-8")
+        assert_true(sniff.sniff_csv(gbk_file, cache_file)["encoding"] == "gb18030", "cached entry should be reused without re-sniffing")
+
+
+def test_parallel_figures_keep_plan_order() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,actual,predicted\n" + "".join(f"{i},{i * 1.5},{i * 1.4}\n" for i in range(30)), encoding="utf-8-sig")
+        hints = ["heatmap", "prediction_comparison", "scatter", "line"]
+        figures = [
+            {
+                "figure_id": f"fig_{index}",
+                "title": f"图 {index}",
+                "template_hint": hint,
+                "data_source": "paper_output/data_cleaned/demo_cleaned.csv",
+                "output_path": f"paper_output/figures/fig_{index}.png",
+            }
+            for index, hint in enumerate(hints)
+        ]
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "visualization_plan.json").write_text(json.dumps({"figures": figures}), encoding="utf-8")
+        result = run([sys.executable, str(PAPER_FIGURES), "--jobs", "2"], cwd)
+        assert_true(result.returncode == 0, f"generate_paper_figures_from_plan --jobs 2 should pass\n{result.stdout[-2000:]}")
+        index = load_json(cwd / "paper_output" / "figure_index.json")
+        assert_true([item["figure_id"] for item in index["figures"]] == [item["figure_id"] for item in figures], "figure_index.json should follow plan order")
+        assert_true(all(item["exists"] for item in index["figures"]), "every planned figure should be rendered")
+
+
+def test_render_cache_skips_unchanged_figures() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,actual,predicted\n" + "".join(f"{i},{i * 1.5},{i * 1.4}\n" for i in range(30)), encoding="utf-8-sig")
+        figures = [
+            {
+                "figure_id": f"fig_{index}",
+                "template_hint": hint,
+                "data_source": "paper_output/data_cleaned/demo_cleaned.csv",
+                "output_path": f"paper_output/figures/fig_{index}.png",
+            }
+            for index, hint in enumerate(["prediction_comparison", "line"])
+        ]
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "visualization_plan.json").write_text(json.dumps({"figures": figures}), encoding="utf-8")
+        pngs = [cwd / item["output_path"] for item in figures]
+
+        result = run([sys.executable, str(PAPER_FIGURES)], cwd)
+        assert_true(result.returncode == 0, f"first figure run should pass\n{result.stdout[-2000:]}")
+        mtimes = [path.stat().st_mtime_ns for path in pngs]
+        result = run([sys.executable, str(PAPER_FIGURES)], cwd)
+        index = load_json(cwd / "paper_output" / "figure_index.json")
+        assert_true(all(item["cached"] and item["exists"] for item in index["figures"]), "unchanged specs should be cache hits")
+        assert_true([path.stat().st_mtime_ns for path in pngs] == mtimes, "cache hits must not rewrite PNGs")
+        assert_true(index["figures"][0]["template"] == "prediction_comparison", "cache hits should keep the recorded template")
+
+        data.write_text("t,actual,predicted\n" + "".join(f"{i},{i * 2.5},{i * 2.4}\n" for i in range(30)), encoding="utf-8-sig")
+        pngs[1].unlink()
+        result = run([sys.executable, str(PAPER_FIGURES)], cwd)
+        index = load_json(cwd / "paper_output" / "figure_index.json")
+        assert_true(not any(item["cached"] for item in index["figures"]), "changed source data should invalidate the cache")
+        assert_true(all(path.exists() for path in pngs), "invalidated figures should be rendered again")
+
+
+def test_column_profile_converts_each_column_once() -> None:
+    import pandas as pd
+
+    templates = load_module(FIGURE_TEMPLATES)
+    calls = []
+    original = templates.safe_numeric
+    templates.safe_numeric = lambda series: calls.append(series.name) or original(series)
+    columns = {f"v{i}": [float(i + row) for row in range(12)] for i in range(30)}
+    columns.update({f"c{i}": [f"g{row % 3}" for row in range(12)] for i in range(30)})
+    df = pd.DataFrame(columns)
+    cats = templates.categorical_columns(df)
+    x_col = templates.pick_x(df, {})
+    y_cols = templates.pick_y(df, {}, x_col)
+    assert_true(len(calls) == df.shape[1], f"each column should be converted once, got {len(calls)} conversions")
+    assert_true(cats == [f"c{i}" for i in range(30)], "categorical columns should keep table order")
+    assert_true((x_col, y_cols) == ("c0", ["v0", "v1", "v2"]), "pick_x/pick_y should use the cached profile")
+    df["extra"] = 1.0
+    assert_true(templates.numeric_columns(df)[-1] == "extra", "adding a column should rebuild the profile")
+
+
+def test_long_series_downsampling_is_indexed() -> None:
+    import numpy as np
+
+    templates = load_module(FIGURE_TEMPLATES)
+    x = np.arange(10000, dtype=float)
+    y = np.sin(x / 300)
+    y[6789] = 9.0
+    keep = templates.lttb_indices(x, y, 500)
+    assert_true(len(keep) == 500 and keep[0] == 0 and keep[-1] == 9999, "LTTB should keep the requested count and both ends")
+    assert_true(6789 in set(keep) and (np.diff(keep) > 0).all(), "LTTB should keep spikes and row order")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "long_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,actual,predicted\n" + "".join(f"{i},{i % 97},{i % 89}\n" for i in range(3000)), encoding="utf-8")
+        figures = [
+            {"figure_id": "fig_short", "template_hint": "line", "data_source": "paper_output/data_cleaned/long_cleaned.csv", "output_path": "paper_output/figures/fig_short.png", "max_points": 5000},
+            {"figure_id": "fig_long", "template_hint": "line", "data_source": "paper_output/data_cleaned/long_cleaned.csv", "output_path": "paper_output/figures/fig_long.png"},
+        ]
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "visualization_plan.json").write_text(json.dumps({"figures": figures}), encoding="utf-8")
+        result = run([sys.executable, str(PAPER_FIGURES), "--max-points", "200"], cwd)
+        assert_true(result.returncode == 0, f"generate_paper_figures_from_plan --max-points should pass\n{result.stdout[-2000:]}")
+        index = {item["figure_id"]: item for item in load_json(cwd / "paper_output" / "figure_index.json")["figures"]}
+        assert_true(index["fig_short"]["downsampling"] == "", "a spec max_points above the row count should plot every row")
+        assert_true(index["fig_long"]["downsampling"].startswith("minmax: 3000 -> "), f"long series should be thinned: {index['fig_long']}")
+
+
+def test_fast_eda_mode_reports_chart_timing() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "wide_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        header = ",".join(f"x{i}" for i in range(4))
+        data.write_text(header + "\n" + "".join(",".join(str((row * (i + 3)) % 17) for i in range(4)) + "\n" for row in range(400)), encoding="utf-8")
+        result = run([sys.executable, str(VISUALIZE_DATA), "--sample-rows", "100", "--annot-max-cols", "2"], cwd)
+        assert_true(result.returncode == 0, f"visualize_data.py fast mode should pass\n{result.stdout[-2000:]}")
+        report = load_json(cwd / "paper_output" / "figures" / "eda_report.json")
+        dataset = report["datasets"][0]
+        assert_true(dataset["fast_mode"] and dataset["sampled_rows"] == 100, f"rows above --sample-rows should switch to fast mode: {dataset}")
+        charts = {item["chart"]: item for item in dataset["charts"]}
+        assert_true(charts["pairplot"]["rows"] == 100 and charts["correlation_heatmap"]["rows"] == 400, "only the pairplot/KDE should use sampled rows")
+        assert_true(all((cwd / item["file"]).exists() and item["seconds"] >= 0 for item in dataset["charts"]), "every timed chart should exist")
+
+
+def test_font_resolver_caches_glyph_checked_font() -> None:
+    import matplotlib
+
+    fonts = load_module(FONT_RESOLVER)
+    last_resort = Path(matplotlib.get_data_path()) / "fonts" / "ttf" / "LastResortHE-Regular.ttf"
+    if last_resort.exists():
+        assert_true(not fonts.covers_cjk(str(last_resort)), "placeholder-only fonts must not count as CJK coverage")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = Path(tmp) / "font.json"
+        first = fonts.resolve_cjk_font(cache)
+        assert_true(cache.exists(), "the resolved font (or its absence) should be cached")
+        assert_true(first is None or fonts.covers_cjk(first["path"]), "a resolved font must cover the sample glyphs")
+        original = fonts.find_cjk_font
+        fonts.find_cjk_font = lambda: (_ for _ in ()).throw(AssertionError("font scan should not rerun"))
+        try:
+            assert_true(fonts.resolve_cjk_font(cache) == first, "the second resolve should come from the cache")
+        finally:
+            fonts.find_cjk_font = original
+
+
+def test_figure_variants_are_indexed() -> None:
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,actual,predicted\n" + "".join(f"{i},{i * 1.5},{i * 1.4}\n" for i in range(30)), encoding="utf-8")
+        figures = [{"figure_id": "fig_1", "template_hint": "prediction_comparison", "data_source": "paper_output/data_cleaned/demo_cleaned.csv", "output_path": "paper_output/figures/fig_1.png"}]
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "visualization_plan.json").write_text(json.dumps({"figures": figures}), encoding="utf-8")
+        result = run([sys.executable, str(PAPER_FIGURES)], cwd)
+        assert_true(result.returncode == 0, f"generate_paper_figures_from_plan should pass\n{result.stdout[-2000:]}")
+        variants = load_json(cwd / "paper_output" / "figure_index.json")["figures"][0]["variants"]
+        assert_true(set(variants) == {"png", "svg", "pdf", "docx_png"}, f"all figure variants should be indexed: {variants}")
+        assert_true(all((cwd / item["path"]).stat().st_size == item["bytes"] for item in variants.values()), "variant byte sizes should match the files")
+        assert_true(variants["docx_png"]["bytes"] < variants["png"]["bytes"], "the docx raster should be smaller than the 300-dpi master")
+        with Image.open(cwd / variants["docx_png"]["path"]) as image:
+            assert_true(image.width == round(14.2 / 2.54 * 220), f"docx raster should match the Cm(14.2) embed width, got {image.width}px")
+
+
+def test_contact_sheet_rebuilds_only_changed_thumbnails() -> None:
+    from PIL import Image
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        figures_dir = cwd / "paper_output" / "figures"
+        figures_dir.mkdir(parents=True)
+        figures = []
+        for index, color in enumerate(["#2563eb", "#16a34a", "#dc2626"]):
+            Image.new("RGB", (2400, 1500), color).save(figures_dir / f"fig_{index}.png")
+            figures.append({"figure_id": f"fig_{index}", "path": f"paper_output/figures/fig_{index}.png", "title": f"Figure {index}"})
+        figures.append({"figure_id": "fig_missing", "path": "paper_output/figures/missing.png"})
+        index_file = cwd / "paper_output" / "figure_index.json"
+        index_file.write_text(json.dumps({"figures": figures}), encoding="utf-8")
+
+        result = run([sys.executable, str(CONTACT_SHEET), "--columns", "2", "--rows", "1", "--thumb-width", "200"], cwd)
+        assert_true(result.returncode == 0, f"contact_sheet.py should pass\n{result.stdout[-2000:]}")
+        manifest = load_json(figures_dir / "thumbs" / "thumbs.json")
+        assert_true(manifest["pages"] == ["paper_output/figures/figure_contact_sheet.png", "paper_output/figures/figure_contact_sheet_p2.png"], f"3 figures at 2 per page should make 2 pages: {manifest['pages']}")
+        assert_true([item["thumb_size"] for item in manifest["thumbnails"]] == [[200, 125]] * 3, "thumbnails should keep the aspect ratio at the requested width")
+        assert_true("重建 3 张" in result.stdout and "缺失 1 张" in result.stdout, result.stdout)
+
+        Image.new("RGB", (2400, 1500), "#7c3aed").save(figures_dir / "fig_a.png")
+        Image.new("RGB", (1500, 1500), "#0891b2").save(figures_dir / "fig_b.png")
+        clashing = [{"figure_id": "图 A", "path": "paper_output/figures/fig_a.png"}, {"figure_id": "图:A", "path": "paper_output/figures/fig_b.png"}]
+        index_file.write_text(json.dumps({"figures": clashing}), encoding="utf-8")
+        run([sys.executable, str(CONTACT_SHEET), "--thumb-width", "200"], cwd)
+        thumbs = load_json(figures_dir / "thumbs" / "thumbs.json")["thumbnails"]
+        assert_true(len({item["thumb"] for item in thumbs}) == 2, f"ids that sanitize alike should get distinct thumbnails: {thumbs}")
+        assert_true([Image.open(cwd / item["thumb"]).size for item in thumbs] == [(200, 125), (200, 200)], "each thumbnail should come from its own source")
+        index_file.write_text(json.dumps({"figures": figures}), encoding="utf-8")
+        run([sys.executable, str(CONTACT_SHEET), "--columns", "2", "--rows", "1", "--thumb-width", "200"], cwd)
+
+        Image.new("RGB", (2400, 1500), "#f59e0b").save(figures_dir / "fig_1.png")
+        result = run([sys.executable, str(CONTACT_SHEET), "--columns", "2", "--rows", "1", "--thumb-width", "200"], cwd)
+        assert_true("重建 1 张" in result.stdout, f"only the changed source should be re-thumbnailed\n{result.stdout}")
+
+        thumbs_dir = figures_dir / "thumbs"
+        (thumbs_dir / "fig_0.jpg").write_bytes(b"unhashed name from an older run")
+        index_file.write_text(json.dumps({"figures": figures[:2]}), encoding="utf-8")
+        run([sys.executable, str(CONTACT_SHEET), "--columns", "2", "--rows", "1", "--thumb-width", "200"], cwd)
+        assert_true(not (figures_dir / "figure_contact_sheet_p2.png").exists(), "pages beyond the current figure count should be removed")
+        kept = {Path(item["thumb"]).name for item in load_json(thumbs_dir / "thumbs.json")["thumbnails"]}
+        on_disk = {path.name for path in thumbs_dir.iterdir()}
+        assert_true(len(kept) == 2 and on_disk == kept | {"thumbs.json"}, f"thumbnails no figure uses should be pruned: {sorted(on_disk)}")
+
+        (figures_dir / "fig_1.png").write_bytes(b"not an image")
+        result = run([sys.executable, str(CONTACT_SHEET), "--columns", "2", "--rows", "1", "--thumb-width", "200"], cwd)
+        assert_true(result.returncode == 0 and "缺失 1 张" in result.stdout, f"an undecodable figure should be skipped and counted as missing\n{result.stdout}")
+        thumbs = load_json(thumbs_dir / "thumbs.json")["thumbnails"]
+        assert_true([item["figure_id"] for item in thumbs] == ["fig_0"], f"only decodable figures should stay on the sheet: {thumbs}")
+        assert_true({path.name for path in thumbs_dir.iterdir()} == {Path(thumbs[0]["thumb"]).name, "thumbs.json"}, "the broken figure's old thumbnail should be pruned")
+
+
+def test_template_registry_lists_and_validates_without_matplotlib() -> None:
+    probe = (
+        "import os, runpy, sys; sys.argv = sys.argv[1:]; sys.path.insert(0, os.path.dirname(sys.argv[0]))\n"
+        "try:\n    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+        "except SystemExit as exc:\n    code = exc.code\n"
+        "heavy = sorted(name for name in ('matplotlib', 'pandas', 'seaborn') if name in sys.modules)\n"
+        "print('HEAVY=' + ','.join(heavy)); sys.exit(code)\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,value\n1,2\n", encoding="utf-8")
+        figures = [
+            {"figure_id": "fig_1", "title": "模型残差", "data_source": "paper_output/data_cleaned/demo_cleaned.csv", "output_path": "paper_output/figures/fig_1.png"},
+            {"figure_id": "fig_2", "template_hint": "plot_radar", "data_source": "paper_output/data_cleaned/missing.csv", "output_path": "paper_output/figures/fig_1.png"},
+        ]
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "visualization_plan.json").write_text(json.dumps({"figures": figures}), encoding="utf-8")
+        listed = run([sys.executable, "-c", probe, str(PAPER_FIGURES), "--list-templates"], cwd)
+        assert_true(listed.returncode == 0, f"--list-templates should pass\n{listed.stdout[-2000:]}")
+        assert_true("residual_distribution" in listed.stdout and "HEAVY=\n" in listed.stdout, f"listing should not import plotting libraries\n{listed.stdout}")
+        checked = run([sys.executable, "-c", probe, str(PAPER_FIGURES), "--validate"], cwd)
+        assert_true(checked.returncode == 1 and "HEAVY=\n" in checked.stdout, f"--validate should fail without plotting imports\n{checked.stdout}")
+        for expected in ("data_source not found", "output_path reused", "unknown template 'radar'"):
+            assert_true(expected in checked.stdout, f"validation should report {expected!r}\n{checked.stdout}")
+        registry = load_module(PAPER_FIGURES.with_name("figure_registry.py"))
+        assert_true(registry.infer_template(figures[0]) == "residual_distribution", "keyword inference should survive the registry move")
+
+
+def test_data_profile_classifies_on_the_whole_file() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "problem_files" / "station.csv"
+        data.parent.mkdir(parents=True)
+        lines = ["station,stamp,reading"]
+        for i in range(1200):
+            # Station codes look numeric for the first 600 rows only.
+            station = str(100 + i % 7) if i < 600 else f"S-{i % 7}"
+            reading = "NA" if i % 10 == 0 else f"{i * 0.5:.1f}"
+            lines.append(f"{station},2024-01-{i % 28 + 1:02d} 08:00,{reading}")
+        data.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        result = run([sys.executable, str(BUILD_PLAN)], cwd)
+        assert_true(result.returncode == 0, f"build_data_visualization_plan should pass\n{result.stdout[-2000:]}")
+        dataset = load_json(cwd / "paper_output" / "plan" / "data_plan.json")["data_files"][0]
+        assert_true(dataset["numeric_columns"] == ["reading"], f"codes that turn textual after row 500 are not numeric: {dataset}")
+        assert_true(dataset["datetime_columns"] == ["stamp"] and dataset["rows_sampled"] == 1200, f"whole file should be profiled: {dataset}")
+        figure = load_json(cwd / "paper_output" / "plan" / "visualization_plan.json")["figures"][0]
+        assert_true(figure["candidate_x"] == "stamp", f"datetime column should be the x candidate: {figure}")
+
+        profile_file = cwd / "paper_output" / "cache" / "data_profile.json"
+        stored = load_json(profile_file)["files"]["problem_files/station.csv"]
+        columns = {item["name"]: item for item in stored["columns"]}
+        reading = columns["reading"]
+        assert_true(reading["nulls"] == 120 and reading["non_null"] == 1080, f"NA tokens should count as null: {reading}")
+        assert_true(reading["min"] == 0.5 and reading["max"] == 599.5 and len(reading["sample"]) == 64, f"unexpected reading stats: {reading}")
+        assert_true(columns["station"]["distinct_exact"] and columns["station"]["distinct"] == 14, f"small columns should be counted exactly: {columns['station']}")
+        assert_true(not reading["distinct_exact"] and abs(reading["distinct"] - 1080) < 60, f"large columns should use the HyperLogLog estimate: {reading['distinct']}")
+
+        module = load_module(DATA_PROFILE)
+        payload = load_json(profile_file)
+        payload["files"]["problem_files/station.csv"]["rows"] = -1
+        profile_file.write_text(json.dumps(payload), encoding="utf-8")
+        previous = Path.cwd()
+        try:
+            os.chdir(cwd)
+            cached = module.profile_path(Path("problem_files/station.csv"), profile_file)
+            assert_true(cached["rows"] == -1, "an unchanged file should reuse data_profile.json")
+            data.write_text("\n".join(lines[:101]) + "\n", encoding="utf-8")
+            fresh = module.profile_path(Path("problem_files/station.csv"), profile_file)
+            assert_true(fresh["rows"] == 100 and fresh["numeric_columns"] == ["station", "reading"], f"a changed file should be re-profiled: {fresh['rows']}")
+        finally:
+            os.chdir(previous)
+
+
+def test_evidence_gate_rejects_stale_artifacts_by_hash() -> None:
+    header = {"schema_version": "1.0", "generated_by": "tests/run_tests.py", "generated_at": "2026-01-01T00:00:00"}
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "data_cleaned").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "model_route.json").write_text(json.dumps({**header, "questions": [{"question_id": "Q1", "title": "预测", "task_type": "预测"}]}), encoding="utf-8")
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.write_text("t,x,y\n" + "".join(f"{i},{i * 2},{i * 3 + 1}\n" for i in range(40)), encoding="utf-8")
+        (cwd / "paper_output" / "figure_index.json").write_text(json.dumps({**header, "figures": []}), encoding="utf-8")
+        (cwd / "paper_output" / "tasks.json").write_text(json.dumps([{"id": "q1", "section": "问题一", "status": "pending", "question_id": "Q1"}]), encoding="utf-8")
+        result = run([sys.executable, str(RESULT_CONTRACTS)], cwd)
+        assert_true(result.returncode == 0, f"build_result_contracts should pass\n{result.stdout[-2000:]}")
+        result = run([sys.executable, "paper_output/code/modeling/run_modeling.py"], cwd)
+        assert_true(result.returncode == 0, f"run_modeling should pass\n{result.stdout[-2000:]}")
+        promote_scaffold_results(cwd)
+        provenance = load_json(cwd / "paper_output" / "results" / "model_results.json")["questions"][0]["execution_provenance"]
+        roles = {item["role"] for item in provenance["file_hashes"].values()}
+        assert_true(roles == {"source_code", "helper", "input", "output"}, f"provenance should hash code, inputs and outputs: {provenance}")
+
+        report_file = cwd / "paper_output" / "qa" / "evidence_gate_report.json"
+        result = run([sys.executable, str(EVIDENCE_GATE)], cwd)
+        first = load_json(report_file)
+        assert_true(result.returncode == 0 and first["status"] == "PASS", f"fresh results should pass\n{result.stdout}")
+        assert_true(not first["verification"]["reused"] and first["verification"]["rehashed"] == 4, f"first gate hashes every file: {first['verification']}")
+        run([sys.executable, str(EVIDENCE_GATE)], cwd)
+        assert_true(load_json(report_file)["verification"]["reused"], "an untouched project should reuse the previous verdict")
+        cache_file = cwd / "paper_output" / "cache" / "evidence_gate.json"
+        cache = load_json(cache_file)
+        cache["checker"] = "older-checker"
+        cache_file.write_text(json.dumps(cache), encoding="utf-8")
+        run([sys.executable, str(EVIDENCE_GATE)], cwd)
+        assert_true(not load_json(report_file)["verification"]["reused"], "a verdict from different checking code must not be reused")
+
+        with tempfile.TemporaryDirectory() as copy_tmp:
+            moved = Path(copy_tmp) / "project"
+            shutil.copytree(cwd, moved)
+            copied_data = moved / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+            copied_data.write_text(copied_data.read_text(encoding="utf-8") + "40,80,121\n", encoding="utf-8")
+            result = run([sys.executable, str(EVIDENCE_GATE)], moved)
+            copied = load_json(moved / "paper_output" / "qa" / "evidence_gate_report.json")
+            assert_true(result.returncode == 1 and "SHA-256" in result.stdout, f"an input edited in a copied project should fail the gate\n{result.stdout}")
+            assert_true(not copied["verification"]["reused"], "a cache written for another project root must not be reused")
+
+        data.touch()
+        run([sys.executable, str(EVIDENCE_GATE)], cwd)
+        touched = load_json(report_file)
+        assert_true(touched["status"] == "PASS" and touched["verification"]["rehashed"] == 1, f"a touched file is re-hashed, not rejected: {touched['verification']}")
+
+        table = cwd / provenance["output_artifacts"][0]
+        table.write_text(table.read_text(encoding="utf-8-sig").replace("0", "9"), encoding="utf-8-sig")
+        result = run([sys.executable, str(EVIDENCE_GATE)], cwd)
+        assert_true(result.returncode == 1 and "SHA-256" in result.stdout, f"an edited output table should fail the gate\n{result.stdout}")
+
+
+def test_workflow_dag_skips_unchanged_stages_and_runs_independent_ones_in_parallel() -> None:
+    dag = load_module(WORKFLOW_DAG)
+    copy_step = "import sys, time\nfrom pathlib import Path\ntime.sleep(0.4)\nPath('out').mkdir(exist_ok=True)\nPath('out/{0}.txt').write_text(Path('in/{0}.txt').read_text())\n"
+    stages = [
+        dag.Stage("a", "A", "./step_a.py", inputs=("in/a.txt",), outputs=("out/a.txt",)),
+        dag.Stage("b", "B", "./step_b.py", inputs=("in/b.txt",), outputs=("out/b.txt",)),
+        dag.Stage("c", "C", "./step_c.py", inputs=("out/*.txt",), outputs=("report.txt",), required=True),
+        dag.Stage("d", "D", "./step_d.py", inputs=("report.txt",), outputs=("final.txt",)),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "in").mkdir()
+        for name in ("a", "b"):
+            (cwd / "in" / f"{name}.txt").write_text(name, encoding="utf-8")
+            (cwd / f"step_{name}.py").write_text(copy_step.format(name), encoding="utf-8")
+        (cwd / "step_c.py").write_text("from pathlib import Path\nPath('report.txt').write_text(Path('out/a.txt').read_text() + Path('out/b.txt').read_text())\n", encoding="utf-8")
+        (cwd / "step_d.py").write_text("from pathlib import Path\nPath('final.txt').write_text(Path('report.txt').read_text().upper())\n", encoding="utf-8")
+        assert_true(dag.dependencies(stages) == {"a": [], "b": [], "c": ["a", "b"], "d": ["c"]}, f"edges follow declared artifacts: {dag.dependencies(stages)}")
+
+        first = {item["name"]: item for item in dag.build(stages, cwd, jobs=2)["stages"]}
+        assert_true(all(item["status"] == "ok" for item in first.values()), f"first build runs every stage: {first}")
+        assert_true(first["b"]["started_ms"] < first["a"]["started_ms"] + first["a"]["elapsed_ms"], f"independent stages should overlap: {first}")
+        assert_true((cwd / "final.txt").read_text() == "AB", "stages should run in dependency order")
+        log = load_json(cwd / "paper_output" / "build_log.json")
+        assert_true(log["schema_version"] and [item["name"] for item in log["stages"]] == ["a", "b", "c", "d"], f"build log lists every stage: {log}")
+
+        second = dag.build(stages, cwd, jobs=2)
+        assert_true(all(item["status"] == "skipped" for item in second["stages"]), f"unchanged inputs should skip every stage: {second['stages']}")
+
+        (cwd / "in" / "b.txt").write_text("x", encoding="utf-8")
+        third = {item["name"]: item["status"] for item in dag.build(stages, cwd, jobs=2)["stages"]}
+        assert_true(third == {"a": "skipped", "b": "ok", "c": "ok", "d": "ok"}, f"only stages downstream of the edit rerun: {third}")
+        assert_true((cwd / "final.txt").read_text() == "AX", "downstream outputs should be rebuilt")
+
+        (cwd / "step_c.py").write_text("raise SystemExit(3)\n", encoding="utf-8")
+        failed = dag.build(stages, cwd, jobs=2)
+        statuses = {item["name"]: item["status"] for item in failed["stages"]}
+        assert_true(failed["returncode"] == 3 and statuses["c"] == "failed" and statuses["d"] == "blocked", f"a failed required stage stops the build: {statuses}")
+
+
+def test_watch_gates_reruns_only_affected_gates() -> None:
+    driver = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from pathlib import Path
+import watch_gates
+
+preflight = Path("paper_output/preflight_report.json")
+watcher = watch_gates.GateWatcher("S8")
+watcher.run_once()
+idle = watcher.poll()
+preflight.write_text(json.dumps({"status": "PASS", "checks": []}), encoding="utf-8")
+deltas = watcher.poll()
+print(json.dumps({"idle": idle, "deltas": deltas, "cycles": {gate.name: gate.result["cycle"] for gate in watcher.gates}}))
+"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "paper_output").mkdir()
+        (cwd / "paper_output" / "preflight_report.json").write_text(json.dumps({"status": "FAIL"}), encoding="utf-8")
+        result = run([sys.executable, "-c", driver, str(WATCH_GATES.parent)], cwd)
+        assert_true(result.returncode == 0, f"watcher driver should run\n{result.stdout[-2000:]}")
+        output = json.loads(result.stdout.strip().splitlines()[-1])
+        assert_true(output["idle"] == [], f"an unchanged tree should not re-run any gate: {output['idle']}")
+        assert_true([(item["gate"], item["from"], item["to"]) for item in output["deltas"]] == [("S0", "FAIL", "PASS")], f"only S0 should flip: {output['deltas']}")
+        assert_true(output["deltas"][0]["trigger"] == ["paper_output/preflight_report.json"], f"delta should name the changed file: {output['deltas']}")
+        rerun = sorted(name for name, cycle in output["cycles"].items() if cycle == 2)
+        assert_true(rerun == ["S0"], f"only the gate reading the changed file re-runs: {output['cycles']}")
+        status = load_json(cwd / "paper_output" / "qa" / "status.json")
+        assert_true(status["gates"]["S0"]["status"] == "PASS" and status["deltas"][-1]["gate"] == "S0", f"status.json should stream the delta: {status}")
+        guard = load_json(cwd / "paper_output" / "qa" / "workflow_guard_report.json")
+        assert_true(guard["steps"][0]["status"] == "PASS", "the guard report should be refreshed from the watcher's step results")
+
+
+def test_contract_context_is_shared_by_every_gate() -> None:
+    context = load_module(QA_ALL.with_name("contract_context.py"))
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        shutil.copytree(DEMO_MODELING.parents[2], cwd, dirs_exist_ok=True)
+        contracts = context.ContractContext(cwd)
+        metrics = cwd / "paper_output" / "results" / "metrics.json"
+        first = contracts.by_question("metrics")
+        assert_true(contracts.load_path(Path(tmp, "paper_output", "results", "..", "results", "metrics.json")) is contracts.get("metrics"), "different spellings of one file should share a parse")
+        assert_true(contracts.by_question("metrics") is first and contracts.parsed == 1, "an unchanged contract should be parsed and indexed once")
+        metrics.write_text(json.dumps({"items": [{"question_id": "Q9", "metric_name": "x"}]}), encoding="utf-8")
+        assert_true(list(contracts.by_question("metrics")) == ["Q9"] and contracts.parsed == 2, "a rewritten contract should be re-read")
+
+        result = run([sys.executable, str(QA_ALL), "--step", "S8"], cwd)
+        report = load_json(cwd / "paper_output" / "qa" / "qa_all_report.json")
+        gates = {item["gate"]: item for item in report["gates"]}
+        assert_true(set(gates) == {"evidence_gate", "contract_warnings", "paper_format", "workflow_guard:S8"}, f"qa_all should run every gate: {list(gates)}")
+        assert_true(result.returncode == (1 if report["status"] == "FAIL" else 0), f"exit code should follow the combined status\n{result.stdout[-2000:]}")
+        assert_true(report["contracts"]["parsed"] == report["contracts"]["files"], f"each contract should be parsed once per run: {report['contracts']}")
+        assert_true(report["contracts"]["requests"] > report["contracts"]["files"], "gates should share parsed contracts")
+        guard = load_json(cwd / "paper_output" / "qa" / "workflow_guard_report.json")
+        alone = run([sys.executable, str(WATCH_GATES.with_name("workflow_guard.py")), "--step", "S8"], cwd)
+        assert_true(alone.returncode == (0 if guard["status"] == "PASS" else 1), "the standalone guard should agree with qa_all")
+        assert_true(load_json(cwd / "paper_output" / "qa" / "workflow_guard_report.json")["steps"] == guard["steps"], "qa_all and workflow_guard.py should report the same steps")
+
+
+def test_contract_schemas_report_json_pointers_in_every_gate() -> None:
+    schema = load_module(QA_ALL.with_name("contract_schema.py"))
+    assert_true(schema.validator("metrics") is schema.validator("metrics"), "schemas should be compiled once")
+    metrics = {"schema_version": "1.0", "generated_by": "t", "items": [{"question_id": "Q1", "metric_name": "rmse", "value": 0.1}, {"metric_name": " ", "value": True}, 3]}
+    errors = [str(error) for error in schema.validate("metrics", metrics)]
+    assert_true(
+        errors
+        == [
+            "metrics.json /items/1/question_id: 缺少必填字段",
+            "metrics.json /items/1/metric_name: 不能为空",
+            "metrics.json /items/1/value: 应为数值 或 字符串 或 null，实际为 布尔值",
+            "metrics.json /items/2: 应为对象，实际为 整数",
+        ],
+        f"errors should carry JSON pointers: {errors}",
+    )
+    assert_true([str(item) for item in schema.missing_header("metrics", metrics)] == ["metrics.json /generated_at: 缺少表头字段"], "a missing header field is listed separately")
+    assert_true(not schema.validate("table_index", {"schema_version": "1", "generated_by": "t", "generated_at": "t", "tables": [{"table_id": "T1", "question_id": "ALL", "path": "tables/a.csv"}]}), "a valid contract has no errors")
+    assert_true([error.pointer for error in schema.validate("figure_index", {"schema_version": "1", "generated_by": "t", "generated_at": "t", "figures": [{"figure_id": "F1", "path": "C:\\out\\a.png"}]})] == ["/figures/0/path"], "Windows absolute paths are rejected")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        shutil.copytree(DEMO_MODELING.parents[2], cwd, dirs_exist_ok=True)
+        clean = run([sys.executable, str(REPO_ROOT / "scripts" / "check_workflow_contracts.py")], cwd)
+        assert_true(clean.returncode == 0, f"the demo contracts should satisfy the schemas\n{clean.stdout[-2000:]}")
+        metrics_file = cwd / "paper_output" / "results" / "metrics.json"
+        metrics = load_json(metrics_file)
+        del metrics["generated_at"]
+        metrics_file.write_text(json.dumps(metrics, ensure_ascii=False), encoding="utf-8")
+        header_warning = "metrics.json /generated_at: 缺少表头字段"
+        headerless = run([sys.executable, str(REPO_ROOT / "scripts" / "check_workflow_contracts.py")], cwd)
+        assert_true(headerless.returncode == 0 and header_warning in headerless.stdout, f"a missing header should only warn\n{headerless.stdout[-2000:]}")
+        conclusions_file = cwd / "paper_output" / "results" / "conclusions.json"
+        conclusions = load_json(conclusions_file)
+        conclusions["items"][1]["conclusion_text"] = " "
+        conclusions_file.write_text(json.dumps(conclusions, ensure_ascii=False), encoding="utf-8")
+        expected = "conclusions.json /items/1/conclusion_text: 不能为空"
+
+        broken = run([sys.executable, str(REPO_ROOT / "scripts" / "check_workflow_contracts.py")], cwd)
+        assert_true(broken.returncode == 1 and expected in broken.stdout, f"check_workflow_contracts should use the schema\n{broken.stdout[-2000:]}")
+        run([sys.executable, str(QA_ALL)], cwd)
+        evidence = load_json(cwd / "paper_output" / "qa" / "evidence_gate_report.json")
+        guard = load_json(cwd / "paper_output" / "qa" / "workflow_guard_report.json")
+        assert_true(f"契约结构错误：{expected}" in evidence["failures"], f"evidence gate should report the pointer: {evidence['failures']}")
+        assert_true(f"S5: 契约结构错误：{expected}" in guard["failures"], f"workflow guard should report the pointer: {guard['failures']}")
+        assert_true(f"契约表头不完整：{header_warning}" in evidence["warnings"], f"evidence gate should warn about the header: {evidence['warnings']}")
+        assert_true(not any(header_warning in item for item in evidence["failures"] + guard["failures"]), "a missing header must not fail any gate")
+
+
+def test_contract_lock_takes_over_only_stale_locks_it_owns() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "model_route.json").write_text(json.dumps({"questions": [{"question_id": "Q1", "title": "预测"}]}), encoding="utf-8")
+        result = run([sys.executable, str(RESULT_CONTRACTS)], cwd)
+        assert_true(result.returncode == 0, f"build_result_contracts should pass\n{result.stdout[-2000:]}")
+        helper = load_module(cwd / "paper_output" / "code" / "modeling" / "result_contract_io.py")
+        assert_true(not hasattr(helper, "contract_lock") and helper.locked.__module__ == "file_lock", "the helper should use the shared file_lock.locked")
+        lock = sys.modules["file_lock"].lock_path(helper.CONTRACTS_LOCK_TARGET)
+        assert_true(lock == cwd / "paper_output" / "results" / ".contracts.lock", f"unexpected contract lock path: {lock}")
+        lock.parent.mkdir(parents=True, exist_ok=True)
+        lock.write_text("4242:stale", encoding="ascii")
+        os.utime(lock, (time.time() - 3600, time.time() - 3600))
+        with helper.locked(helper.CONTRACTS_LOCK_TARGET, timeout=2):
+            assert_true(lock.read_text(encoding="ascii") != "4242:stale", "a stale lock should be taken over")
+        assert_true(not lock.exists(), "the owner should remove its own lock")
+
+        with helper.locked(helper.CONTRACTS_LOCK_TARGET, timeout=2):
+            lock.unlink()
+            lock.write_text("4243:other", encoding="ascii")
+        assert_true(lock.read_text(encoding="ascii") == "4243:other", "releasing must not remove a lock owned by another process")
+        assert_true(not list(lock.parent.glob(".contracts.lock.*")), "no aside files should be left behind")
+
+
+def test_generated_helper_reuses_csv_sniff() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "model_route.json").write_text(json.dumps({"questions": [{"question_id": "Q1", "title": "预测"}]}), encoding="utf-8")
+        result = run([sys.executable, str(RESULT_CONTRACTS)], cwd)
+        assert_true(result.returncode == 0, f"build_result_contracts should pass\n{result.stdout[-2000:]}")
+        modeling = cwd / "paper_output" / "code" / "modeling"
+        assert_true((modeling / "csv_sniff.py").read_text(encoding="utf-8").endswith(CSV_SNIFF.read_text(encoding="utf-8")), "the scaffold should ship the shared sniffer")
+        assert_true((modeling / "file_lock.py").is_file(), "the scaffold should ship the lock csv_sniff.py imports")
+
+        data = cwd / "utf16.tsv"
+        data.write_text("时间\t温度\n1\t20.5\n2\t21.0\n", encoding="utf-16")
+        code = "import sys; from pathlib import Path; sys.path.insert(0, 'paper_output/code/modeling'); import result_contract_io as io; frame, encoding = io.read_dataframe_with_encoding(Path('utf16.tsv')); print(encoding, list(frame.columns))"
+        result = run([sys.executable, "-c", code], cwd)
+        assert_true(result.returncode == 0 and "utf-16 ['时间', '温度']" in result.stdout, f"the helper should read UTF-16 files via csv_sniff\n{result.stdout}")
+        sniff = load_module(CSV_SNIFF)
+        cache = load_json(cwd / "paper_output" / "cache" / "csv_sniff.json")
+        assert_true(cache.get(sniff.file_fingerprint(data)) == {"encoding": "utf-16", "sep": "\t"}, f"the helper should write csv_sniff.py cache entries: {cache}")
+
+
+def test_shared_cache_merges_survive_concurrent_writers() -> None:
+    writer = (
+        "import sys\n"
+        "from pathlib import Path\n"
+        "sys.path.insert(0, sys.argv[1])\n"
+        "import csv_sniff, render_cache\n"
+        "for i in range(25):\n"
+        "    key = f'{sys.argv[2]}-{i}'\n"
+        "    render_cache.save_manifest({key: {'key': key, 'files': []}})\n"
+        "    csv_sniff.save_cache_entry(csv_sniff.CACHE_FILE, key, {'encoding': 'utf-8', 'sep': ','})\n"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        processes = [subprocess.Popen([sys.executable, "-c", writer, str(CSV_SNIFF.parent), f"w{n}"], cwd=cwd) for n in range(4)]
+        assert_true(all(process.wait(timeout=120) == 0 for process in processes), "concurrent writers should finish")
+        expected = {f"w{n}-{i}" for n in range(4) for i in range(25)}
+        manifest = load_json(cwd / "paper_output" / "figures" / "render_manifest.json")["entries"]
+        assert_true(set(manifest) == expected, f"render_manifest.json lost {len(expected - set(manifest))} entries")
+        sniffed = load_json(cwd / "paper_output" / "cache" / "csv_sniff.json")
+        assert_true(set(sniffed) == expected, f"csv_sniff.json lost {len(expected - set(sniffed))} entries")
+        assert_true(not list(cwd.rglob("*.lock")), "locks should be released")
+
+
+def test_workflow_dag_rebuilds_deleted_eda_figures() -> None:
+    dag = load_module(WORKFLOW_DAG)
+    eda = [stage for stage in dag.DATA_STAGES if stage.name == "eda"]
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,x,y\n" + "".join(f"{i},{i * 2},{(i * 7) % 11}\n" for i in range(40)), encoding="utf-8")
+        first = dag.build(eda, cwd, jobs=2)
+        assert_true(first["stages"][0]["status"] == "ok", f"eda should run: {first['stages']}")
+        figures = sorted((cwd / "paper_output" / "figures" / "demo_cleaned").glob("*.png"))
+        assert_true(figures, "eda should write per-dataset figures")
+        assert_true(dag.build(eda, cwd, jobs=2)["stages"][0]["status"] == "skipped", "an unchanged project should skip eda")
+
+        figures[0].unlink()
+        rebuilt = dag.build(eda, cwd, jobs=2)["stages"][0]
+        assert_true(rebuilt["status"] == "ok" and figures[0].exists(), f"a deleted EDA figure should be rebuilt: {rebuilt}")
+        assert_true(dag.build(eda, cwd, jobs=2)["stages"][0]["status"] == "skipped", "cached datasets should still list their figures")
+
+
+def test_figures_without_question_pass_the_contract_schemas() -> None:
+    header = {"schema_version": "1.0", "generated_by": "tests/run_tests.py", "generated_at": "2026-01-01T00:00:00"}
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        data.parent.mkdir(parents=True)
+        data.write_text("t,actual,predicted\n" + "".join(f"{i},{i * 1.5},{i * 1.4}\n" for i in range(30)), encoding="utf-8")
+        figure = {"figure_id": "fig_overview", "title": "数据总览", "template_hint": "line", "data_source": "paper_output/data_cleaned/demo_cleaned.csv", "output_path": "paper_output/figures/fig_overview.png"}
+        (cwd / "paper_output" / "plan").mkdir(parents=True)
+        (cwd / "paper_output" / "plan" / "visualization_plan.json").write_text(json.dumps({**header, "figures": [figure]}), encoding="utf-8")
+        result = run([sys.executable, str(PAPER_FIGURES)], cwd)
+        assert_true(result.returncode == 0, f"generate_paper_figures_from_plan should pass\n{result.stdout[-2000:]}")
+        assert_true(load_json(cwd / "paper_output" / "figure_index.json")["figures"][0]["question_id"] is None, "a figure without a question keeps question_id null")
+
+        run([sys.executable, str(QA_ALL)], cwd)
+        reports = [load_json(cwd / "paper_output" / "qa" / name) for name in ("evidence_gate_report.json", "workflow_guard_report.json")]
+        schema_failures = [item for report in reports for item in report["failures"] + report.get("warnings", []) if "契约结构错误" in str(item)]
+        assert_true(not schema_failures, f"generator output should satisfy the schemas: {schema_failures}")
+
+
+def write_modeling_project(cwd: Path, qids: list[str]) -> None:
+    """A scaffolded project with one cleaned dataset and the plan contracts check_workflow_contracts.py reads."""
+    header = {"schema_version": "1.0", "generated_by": "tests/run_tests.py", "generated_at": "2026-01-01T00:00:00"}
+    (cwd / "paper_output" / "step1").mkdir(parents=True)
+    (cwd / "paper_output" / "plan").mkdir(parents=True)
+    (cwd / "paper_output" / "step1" / "problem_analysis.json").write_text(json.dumps({**header, "questions": [{"id": qid} for qid in qids]}), encoding="utf-8")
+    route = [{"question_id": qid, "title": f"问题 {qid}", "task_type": "预测"} for qid in qids]
+    (cwd / "paper_output" / "plan" / "model_route.json").write_text(json.dumps({**header, "questions": route}, ensure_ascii=False), encoding="utf-8")
+    (cwd / "paper_output" / "plan" / "rubric_alignment.json").write_text(json.dumps({**header, "items": [{"question_id": qid} for qid in qids]}), encoding="utf-8")
+    evidence = {"result_summary": "", "key_metrics": [], "tables": [], "conclusions": [], "evidence_status": "missing"}
+    tasks = [{"id": qid.lower(), "section": f"问题 {qid}", "status": "pending", "question_id": qid, **evidence} for qid in qids]
+    (cwd / "paper_output" / "tasks.json").write_text(json.dumps(tasks, ensure_ascii=False), encoding="utf-8")
+    (cwd / "paper_output" / "figure_index.json").write_text(json.dumps({**header, "figures": []}), encoding="utf-8")
+    data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+    data.parent.mkdir(parents=True)
+    data.write_text("t,x,y\n" + "".join(f"{i},{i * 2},{i * 3 + 1}\n" for i in range(40)), encoding="utf-8")
+    result = run([sys.executable, str(RESULT_CONTRACTS)], cwd)
+    assert_true(result.returncode == 0, f"build_result_contracts should pass\n{result.stdout[-2000:]}")
+
+
+def promote_scaffold_results(cwd: Path) -> None:
+    # Stand-in for the Agent replacing scaffold results with reviewed ones.
+    for name, key in (("results/model_results.json", "questions"), ("results/metrics.json", "items"), ("results/conclusions.json", "items"), ("tables/table_index.json", "tables")):
+        path = cwd / "paper_output" / name
+        data = load_json(path)
+        for item in data.get(key, []):
+            item.update({field: "final" for field in ("status", "evidence_status") if field in item})
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def test_question_shards_are_compacted_once_per_run() -> None:
+    qids = ["Q1", "Q2", "Q3"]
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        write_modeling_project(cwd, qids)
+        modeling = cwd / "paper_output" / "code" / "modeling"
+        results = cwd / "paper_output" / "results"
+        shards = results / "shards"
+
+        drafts = (results / "model_results.json").read_bytes()
+        env = {**os.environ, "MATHMODEL_DEFER_CONTRACT_COMPACTION": "1"}
+        deferred = subprocess.run([sys.executable, str(modeling / "q1_model.py")], cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        assert_true(deferred.returncode == 0, f"q1_model.py should pass\n{deferred.stdout[-2000:]}")
+        assert_true(load_json(shards / "q1.json")["question_id"] == "Q1", "a deferred run should leave its shard")
+        assert_true((results / "model_results.json").read_bytes() == drafts, "a deferred run should not rewrite the contracts")
+        run([sys.executable, str(modeling / "q2_model.py")], cwd)
+        assert_true(not list(shards.glob("*.json")), "a direct run compacts its own shard and any pending ones")
+        run_ids = {item["question_id"] for item in load_json(results / "model_results.json")["questions"] if "execution_provenance" in item}
+        assert_true(run_ids == {"Q1", "Q2"}, f"compaction merges several questions: {run_ids}")
+
+        for attempt in range(2):
+            result = run([sys.executable, str(modeling / "run_modeling.py")], cwd)
+            assert_true(result.returncode == 0 and "Compacted contract shards: Q1, Q2, Q3" in result.stdout, f"the sequential runner should compact once, after every question\n{result.stdout[-2000:]}")
+        questions = [item["question_id"] for item in load_json(results / "model_results.json")["questions"]]
+        assert_true(sorted(questions) == qids, f"a re-run replaces each question's entries: {questions}")
+        metrics = load_json(results / "metrics.json")["items"]
+        assert_true(len(metrics) == 3 * len({item["metric_name"] for item in metrics}), f"metrics should not be appended twice: {len(metrics)}")
+
+        promote_scaffold_results(cwd)
+        checked = run([sys.executable, str(REPO_ROOT / "scripts" / "check_workflow_contracts.py")], cwd)
+        assert_true(checked.returncode == 0, f"compacted contracts should satisfy check_workflow_contracts\n{checked.stdout[-2000:]}")
+        gate = run([sys.executable, str(EVIDENCE_GATE)], cwd)
+        assert_true(gate.returncode == 0, f"compacted contracts should pass the evidence gate\n{gate.stdout[-2000:]}")
+
+
+def test_numeric_dataset_cache_is_reused_until_the_source_changes() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        write_modeling_project(cwd, ["Q1"])
+        helper = load_module(cwd / "paper_output" / "code" / "modeling" / "result_contract_io.py")
+        data = cwd / "paper_output" / "data_cleaned" / "demo_cleaned.csv"
+        reads: list[Path] = []
+        read_dataframe = helper.read_dataframe_with_encoding
+
+        def counting_read(path: Path):
+            reads.append(path)
+            return read_dataframe(path)
+
+        helper.read_dataframe_with_encoding = counting_read
+        frame, source = helper.load_first_numeric_dataset()
+        metas = list((cwd / "paper_output" / "cache" / "datasets").glob("*/meta.json"))
+        assert_true(source == data and len(reads) == 1 and len(metas) == 1, f"a miss should parse the CSV and store the cache: {reads} {metas}")
+        assert_true(list(frame.columns) == ["t", "x", "y"], f"unexpected columns: {list(frame.columns)}")
+
+        frame, _ = helper.load_first_numeric_dataset()
+        assert_true(len(reads) == 1, "a hit should not parse the CSV again")
+        values = frame["x"].to_numpy()
+        while values is not None and not isinstance(values, helper.np.memmap):
+            values = values.base
+        assert_true(values is not None, "a hit should stay backed by the .npy memmaps")
+        assert_true(helper.numeric_frame(frame) is frame, "handlers should not coerce the cached frame again")
+        assert_true(float(frame["y"].iloc[-1]) == 118.0, "the cached values should match the CSV")
+
+        with data.open("a", encoding="utf-8") as handle:
+            handle.write("40,80,121\n")
+        frame, _ = helper.load_first_numeric_dataset()
+        assert_true(len(reads) == 2 and len(frame) == 41, f"a size change should invalidate the cache: {len(reads)} {len(frame)}")
+
+        stamp = data.stat().st_mtime + 5
+        os.utime(data, (stamp, stamp))
+        frame, _ = helper.load_first_numeric_dataset()
+        assert_true(len(reads) == 3 and len(frame) == 41, f"an mtime change should invalidate the cache: {len(reads)}")
+        helper.load_first_numeric_dataset()
+        assert_true(len(reads) == 3, "the refreshed cache should be hit again")
+
+
+def test_parallel_modeling_run_writes_logs_manifest_and_contracts() -> None:
+    qids = ["Q1", "Q2", "Q3"]
+    with tempfile.TemporaryDirectory() as tmp:
+        cwd = Path(tmp)
+        write_modeling_project(cwd, qids)
+        modeling = cwd / "paper_output" / "code" / "modeling"
+        results = cwd / "paper_output" / "results"
+        result = run([sys.executable, str(modeling / "run_modeling.py"), "--jobs", "2"], cwd)
+        assert_true(result.returncode == 0, f"run_modeling.py --jobs 2 should pass\n{result.stdout[-2000:]}")
+        assert_true("Compacted contract shards: Q1, Q2, Q3" in result.stdout, f"the parallel runner should compact once\n{result.stdout[-2000:]}")
+
+        logs = sorted(path.name for path in (modeling / "logs").glob("*.log"))
+        assert_true(logs == ["q1_model.log", "q2_model.log", "q3_model.log"], f"each question should get its own log: {logs}")
+        manifest = load_json(modeling / "run_manifest.json")
+        assert_true(manifest["jobs"] == 2, f"the manifest should record the worker count: {manifest['jobs']}")
+        records = {item["script"]: item for item in manifest["questions"]}
+        assert_true(sorted(records) == ["q1_model.py", "q2_model.py", "q3_model.py"], f"the manifest should list every script: {sorted(records)}")
+        for script, record in records.items():
+            assert_true(record["exit_code"] == 0, f"{script} should exit cleanly: {record}")
+            assert_true(isinstance(record["wall_time_seconds"], (int, float)) and record["wall_time_seconds"] > 0, f"{script} needs a wall time: {record}")
+            assert_true("peak_rss_mb" in record, f"{script} needs a peak RSS field: {record}")
+            if hasattr(os, "wait4"):
+                assert_true(isinstance(record["peak_rss_mb"], (int, float)) and record["peak_rss_mb"] > 0, f"{script} needs a peak RSS: {record}")
+            assert_true(record["log_path"] == f"logs/{script[:-3]}.log", f"{script} should point at its log: {record}")
+
+        assert_true(not list((results / "shards").glob("*.json")), "no shards should be left after the run")
+        questions = load_json(results / "model_results.json")["questions"]
+        run_ids = sorted(item["question_id"] for item in questions if "execution_provenance" in item)
+        assert_true(run_ids == qids and len(questions) == len(qids), f"the compacted contracts should hold every question once: {run_ids}")
+        metric_ids = {item["question_id"] for item in load_json(results / "metrics.json")["items"]}
+        assert_true(metric_ids == set(qids), f"every question should contribute metrics: {metric_ids}")
+
+
 def main() -> int:
     setup_sandbox.main()
     tests = [
@@ -111,6 +1027,36 @@ def main() -> int:
         test_missing_pypdf,
         test_robust_loader_and_workflow_guard,
         test_format_gate,
+        test_q3_batch_matches_scalar,
+        test_q2_batch_matches_scalar,
+        test_sampling_kernels,
+        test_streaming_clean_matches_in_memory,
+        test_parallel_loader_keeps_report_order,
+        test_streaming_xlsx_inspector,
+        test_csv_sniff_cache,
+        test_parallel_figures_keep_plan_order,
+        test_render_cache_skips_unchanged_figures,
+        test_column_profile_converts_each_column_once,
+        test_long_series_downsampling_is_indexed,
+        test_fast_eda_mode_reports_chart_timing,
+        test_font_resolver_caches_glyph_checked_font,
+        test_figure_variants_are_indexed,
+        test_contact_sheet_rebuilds_only_changed_thumbnails,
+        test_template_registry_lists_and_validates_without_matplotlib,
+        test_data_profile_classifies_on_the_whole_file,
+        test_evidence_gate_rejects_stale_artifacts_by_hash,
+        test_workflow_dag_skips_unchanged_stages_and_runs_independent_ones_in_parallel,
+        test_watch_gates_reruns_only_affected_gates,
+        test_contract_context_is_shared_by_every_gate,
+        test_contract_schemas_report_json_pointers_in_every_gate,
+        test_contract_lock_takes_over_only_stale_locks_it_owns,
+        test_generated_helper_reuses_csv_sniff,
+        test_shared_cache_merges_survive_concurrent_writers,
+        test_workflow_dag_rebuilds_deleted_eda_figures,
+        test_figures_without_question_pass_the_contract_schemas,
+        test_question_shards_are_compacted_once_per_run,
+        test_numeric_dataset_cache_is_reused_until_the_source_changes,
+        test_parallel_modeling_run_writes_logs_manifest_and_contracts,
     ]
     for test in tests:
         test()